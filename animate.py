@@ -0,0 +1,301 @@
+"""Export a recorded drawing as an animation of it being drawn (APNG or GIF).
+
+    segments = load_segments('flower.mesel')
+    write_animation('flower.png', segments, 400, 300, frames=100)
+
+The display list is split into --frames runs of consecutive segments, so a
+100k-segment drawing becomes 100 frames of a thousand segments each. One
+canvas is kept for the whole animation and each frame draws only its own
+segments on it, with raster.py's anti-aliased renderer (NumPy when
+available). A frame then stores only the rectangle of pixels that changed,
+as APNG fcTL/fdAT chunks or as a GIF image placed on top of the last
+frame, and pixels inside it that stay the same are transparent, so the
+file grows with how much is drawn, not with how many frames there are. The last frame is held for HOLD_CENTISECONDS before the
+animation loops.
+
+GIF has 256 colors, one of them kept for transparency. The palette holds ramps from the background to each
+pen color the drawing uses, which covers the anti-aliased edges; pixels
+where lines of different colors overlap get the nearest entry.
+
+Usage: python animate.py drawing.json|program.mesel out.png|out.gif [--size 400x300] [--fit]
+                         [--frames 100] [--fps 25]
+"""
+import struct
+import sys
+import time
+import zlib
+from typing import Iterator, List, NamedTuple, Sequence, Tuple
+from mesel_runtime import BACKGROUND, Segment
+import raster
+from raster import (COMPRESSION, PNG_SIGNATURE, bounds, chunk, draw_numpy, draw_python,
+                    load_segments, rgb, to_pixels)
+
+DEFAULT_FRAMES = 100
+DEFAULT_FPS = 25
+HOLD_CENTISECONDS = 200  # how long the finished drawing stays before looping
+
+GIF_COLORS = 256
+TRANSPARENT = 255  # GIF palette index of pixels a frame doesn't change
+LZW_MAX_CODE = 4095
+
+class Frame(NamedTuple):
+    left: int
+    top: int
+    width: int
+    height: int
+    pixels: bytes   # 8-bit RGB, row by row
+    changed: bytes  # 1 for each pixel this frame changes, 0 where the last frame shows through
+
+def render_frames(segments: Sequence[Segment], width: int, height: int, fit: bool = False,
+                  frames: int = DEFAULT_FRAMES, background=BACKGROUND) -> Iterator[Frame]:
+    """The whole first frame, then the rectangle each later frame changes."""
+    numpy = raster.numpy
+    lines = to_pixels(segments, width, height, fit)  # one transform for every frame
+    background = rgb(background)
+    per_frame = max(1, -(-len(lines) // max(1, frames)))
+    if numpy is not None:
+        canvas = numpy.empty((height, width, 3), dtype=numpy.float32)
+        canvas[:] = background
+        shown = numpy.rint(canvas).astype(numpy.uint8)
+    else:
+        canvas = [[float(c) for c in background] * width for _ in range(height)]
+        shown = [bytearray(int(v + 0.5) for v in row) for row in canvas]
+    for start in range(0, max(len(lines), 1), per_frame):
+        group = lines[start:start + per_frame]
+        boxes = [box for box in (bounds(line, 0, height, width) for line in group) if box is not None]
+        if start == 0:
+            box = (0, height, 0, width)
+        elif boxes:
+            box = (min(b[0] for b in boxes), max(b[1] for b in boxes),
+                   min(b[2] for b in boxes), max(b[3] for b in boxes))
+        else:
+            box = None  # all off screen
+        if box is not None:
+            row0, row1 = box[:2]
+            if numpy is not None:
+                draw_numpy(canvas[row0:row1], group, row0)
+            else:
+                draw_python(canvas[row0:row1], group, row0)
+        yield update(canvas, shown, box, first=start == 0)
+
+def update(canvas, shown, box, first: bool) -> Frame:
+    """Copy box of canvas to shown, as a Frame cropped to the pixels that changed."""
+    numpy = raster.numpy
+    if box is None:
+        box = (0, 1, 0, 1)  # a frame that changes nothing, to keep the timing
+    row0, row1, col0, col1 = box
+    if numpy is not None:
+        new = numpy.rint(canvas[row0:row1, col0:col1]).astype(numpy.uint8)
+        changed = (new != shown[row0:row1, col0:col1]).any(axis=2)
+        shown[row0:row1, col0:col1] = new
+        if first:
+            changed[:] = True
+        rows, cols = numpy.flatnonzero(changed.any(axis=1)), numpy.flatnonzero(changed.any(axis=0))
+        if len(rows):
+            r0, r1, c0, c1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        else:
+            r0, r1, c0, c1 = 0, 1, 0, 1
+        new, changed = new[r0:r1, c0:c1], changed[r0:r1, c0:c1]
+        return Frame(col0 + int(c0), row0 + int(r0), new.shape[1], new.shape[0],
+                     new.tobytes(), changed.astype(numpy.uint8).tobytes())
+    width = col1 - col0
+    new = [bytes(int(v + 0.5) for v in canvas[row][col0 * 3:col1 * 3]) for row in range(row0, row1)]
+    changed = []
+    for row, values in zip(range(row0, row1), new):
+        old = shown[row][col0 * 3:col1 * 3]
+        changed.append([first or values[i * 3:i * 3 + 3] != old[i * 3:i * 3 + 3] for i in range(width)])
+        shown[row][col0 * 3:col1 * 3] = values
+    rows = [i for i, flags in enumerate(changed) if any(flags)] or [0]
+    cols = [i for i in range(width) if any(changed[r][i] for r in rows)] or [0]
+    r0, r1, c0, c1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+    return Frame(col0 + c0, row0 + r0, c1 - c0, r1 - r0,
+                 b''.join(values[c0 * 3:c1 * 3] for values in new[r0:r1]),
+                 bytes(flag for flags in changed[r0:r1] for flag in flags[c0:c1]))
+
+def scanlines(frame: Frame) -> bytes:
+    """Unfiltered RGBA PNG scanlines of frame, transparent where it changes nothing."""
+    numpy = raster.numpy
+    if numpy is not None:
+        pixels = numpy.frombuffer(frame.pixels, dtype=numpy.uint8).reshape(frame.height, frame.width, 3)
+        changed = numpy.frombuffer(frame.changed, dtype=numpy.uint8).reshape(frame.height, frame.width, 1)
+        rows = numpy.zeros((frame.height, frame.width * 4 + 1), dtype=numpy.uint8)  # filter byte 0 (None)
+        rows[:, 1:] = numpy.concatenate([pixels * changed, changed * 255], axis=2).reshape(frame.height, -1)
+        return rows.tobytes()
+    rows = bytearray()
+    for i in range(frame.width * frame.height):
+        if i % frame.width == 0:
+            rows.append(0)
+        rows += frame.pixels[i * 3:i * 3 + 3] + b'\xff' if frame.changed[i] else b'\x00\x00\x00\x00'
+    return bytes(rows)
+
+def encode_apng(width: int, height: int, frames: Sequence[Frame], delays: Sequence[int],
+                level: int = COMPRESSION) -> bytes:
+    """Looping 8-bit RGBA APNG; each frame is drawn over the last, delays are in centiseconds."""
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    data = [PNG_SIGNATURE, chunk(b'IHDR', header), chunk(b'acTL', struct.pack('>II', len(frames), 0))]
+    sequence = 0
+    for i, (frame, delay) in enumerate(zip(frames, delays)):
+        # dispose_op NONE keeps the frame; blend_op OVER keeps what its
+        # transparent pixels cover, except on the first frame, which is opaque
+        data.append(chunk(b'fcTL', struct.pack('>IIIIIHHBB', sequence, frame.width, frame.height,
+                                               frame.left, frame.top, delay, 100, 0, int(i > 0))))
+        sequence += 1
+        compressed = zlib.compress(scanlines(frame), level)
+        if i == 0:
+            data.append(chunk(b'IDAT', compressed))  # the first frame is the default image too
+        else:
+            data.append(chunk(b'fdAT', struct.pack('>I', sequence) + compressed))
+            sequence += 1
+    data.append(chunk(b'IEND', b''))
+    return b''.join(data)
+
+def gif_palette(segments: Sequence[Segment], background=BACKGROUND) -> List[Tuple[int, int, int]]:
+    """Ramps from the background to each pen color, or a color cube if there
+    are too many; TRANSPARENT is left out."""
+    background = rgb(background)
+    colors = [color for color in dict.fromkeys(rgb(s[4]) for s in segments) if color != background]
+    levels = (TRANSPARENT - 1) // max(1, len(colors))
+    if levels < 4:
+        return [(r * 51, g * 51, b * 51) for r in range(6) for g in range(6) for b in range(6)]
+    return [background] + [tuple(round(b + (c - b) * step / levels) for b, c in zip(background, color))
+                           for color in colors for step in range(1, levels + 1)]
+
+class Quantizer:
+    """Maps RGB pixels to the nearest palette entry."""
+
+    def __init__(self, palette: Sequence[Tuple[int, int, int]]):
+        self.palette = list(palette)
+        self.nearest = {}  # color -> index, without NumPy
+
+    def indexes(self, pixels: bytes, changed: bytes) -> bytes:
+        """Palette indexes of pixels, TRANSPARENT where they don't change."""
+        numpy = raster.numpy
+        if numpy is not None:
+            values = numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(-1, 3).astype(numpy.int32)
+            keys = values[:, 0] << 16 | values[:, 1] << 8 | values[:, 2]
+            unique, inverse = numpy.unique(keys, return_inverse=True)
+            colors = numpy.stack([unique >> 16, unique >> 8 & 255, unique & 255], axis=1).astype(numpy.float32)
+            palette = numpy.array(self.palette, dtype=numpy.float32)
+            # |c - p|^2 without the |c|^2 every entry shares
+            distance = (palette * palette).sum(axis=1) - 2 * colors @ palette.T
+            indexes = distance.argmin(axis=1).astype(numpy.uint8)[inverse.reshape(-1)]
+            indexes[numpy.frombuffer(changed, dtype=numpy.uint8) == 0] = TRANSPARENT
+            return indexes.tobytes()
+        result = bytearray()
+        for i, flag in enumerate(changed):
+            if not flag:
+                result.append(TRANSPARENT)
+                continue
+            color = pixels[i * 3:i * 3 + 3]
+            index = self.nearest.get(color)
+            if index is None:
+                index = self.nearest[color] = min(
+                    range(len(self.palette)),
+                    key=lambda j: sum((a - b) ** 2 for a, b in zip(color, self.palette[j])))
+            result.append(index)
+        return bytes(result)
+
+def lzw(indexes: bytes, minimum: int = 8) -> bytes:
+    """GIF LZW compression of palette indexes."""
+    clear, end = 1 << minimum, (1 << minimum) + 1
+    size = minimum + 1
+    table = {}
+    next_code = end + 1
+    out = bytearray()
+    bits, count = clear, size  # starts with a clear code
+    prefix = indexes[0]
+    for value in indexes[1:]:
+        key = prefix << 8 | value
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        bits |= prefix << count
+        count += size
+        while count >= 8:
+            out.append(bits & 255)
+            bits >>= 8
+            count -= 8
+        # The decoder adds its entries a code later, so it widens its codes
+        # after reading this one
+        if next_code == 1 << size and size < 12:
+            size += 1
+        if next_code <= LZW_MAX_CODE:
+            table[key] = next_code
+            next_code += 1
+        else:
+            bits |= clear << count
+            count += size
+            table.clear()
+            next_code, size = end + 1, minimum + 1
+        prefix = value
+    for code in (prefix, end):
+        bits |= code << count
+        count += size
+        if next_code == 1 << size and size < 12:
+            size += 1
+    return bytes(out) + bits.to_bytes((count + 7) // 8, 'little')
+
+def sub_blocks(data: bytes) -> bytes:
+    return b''.join(bytes([len(data[i:i + 255])]) + data[i:i + 255]
+                    for i in range(0, len(data), 255)) + b'\x00'
+
+def encode_gif(width: int, height: int, frames: Sequence[Frame], delays: Sequence[int],
+               palette: Sequence[Tuple[int, int, int]]) -> bytes:
+    """Looping GIF; each frame is drawn over the last, delays are in centiseconds."""
+    quantizer = Quantizer(palette)
+    colors = list(palette) + [(0, 0, 0)] * (GIF_COLORS - len(palette))
+    data = [b'GIF89a', struct.pack('<HHBBB', width, height, 0xF7, 0, 0),  # 256-color global table
+            bytes(c for color in colors for c in color),
+            b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00']  # loop forever
+    for frame, delay in zip(frames, delays):
+        # Graphic control: disposal 1 leaves the frame in place for the next,
+        # and TRANSPARENT pixels show the last frame through
+        data.append(b'\x21\xf9\x04\x05' + struct.pack('<HB', delay, TRANSPARENT) + b'\x00')
+        data.append(b'\x2c' + struct.pack('<HHHHB', frame.left, frame.top, frame.width, frame.height, 0))
+        data.append(b'\x08' + sub_blocks(lzw(quantizer.indexes(frame.pixels, frame.changed))))
+    data.append(b'\x3b')
+    return b''.join(data)
+
+def render_animation(segments: Sequence[Segment], width: int = 400, height: int = 300, fit: bool = False,
+                     frames: int = DEFAULT_FRAMES, fps: float = DEFAULT_FPS, format: str = 'apng',
+                     background=BACKGROUND) -> bytes:
+    """The drawing of segments as an animated PNG ('apng') or GIF ('gif')."""
+    if format not in ('apng', 'gif'):
+        raise ValueError(f"Unknown animation format '{format}', expected apng or gif")
+    shots = list(render_frames(segments, width, height, fit, frames, background))
+    delay = max(1, round(100 / fps))
+    delays = [delay] * (len(shots) - 1) + [max(delay, HOLD_CENTISECONDS)]
+    if format == 'gif':
+        return encode_gif(width, height, shots, delays, gif_palette(segments, background))
+    return encode_apng(width, height, shots, delays)
+
+def write_animation(path: str, segments: Sequence[Segment], *args, **kwargs) -> int:
+    """Write render_animation() to path, as a GIF if it ends in .gif; returns its size."""
+    kwargs.setdefault('format', 'gif' if path.lower().endswith('.gif') else 'apng')
+    data = render_animation(segments, *args, **kwargs)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+def main():
+    import argparse
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('input', help='segments written with MESEL_RECORD, or a .mesel program')
+    arg_parser.add_argument('output', help='animation to write: .png for APNG, or .gif')
+    arg_parser.add_argument('--size', default='400x300', help='image size, WIDTHxHEIGHT')
+    arg_parser.add_argument('--fit', action='store_true', help='zoom to the drawing')
+    arg_parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help='frames to split the drawing into')
+    arg_parser.add_argument('--fps', type=float, default=DEFAULT_FPS, help='frames per second')
+    args = arg_parser.parse_args()
+
+    width, height = (int(n) for n in args.size.lower().split('x'))
+    segments = load_segments(args.input)
+    start = time.perf_counter()
+    size = write_animation(args.output, segments, width, height, args.fit, args.frames, args.fps)
+    seconds = time.perf_counter() - start
+    print(f"Animated {len(segments)} segments in {min(args.frames, max(len(segments), 1))} frames to "
+          f"{args.output} ({width}x{height}, {size} bytes) in {seconds:.2f} s", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
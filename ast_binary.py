@@ -0,0 +1,247 @@
+"""Compact binary format for parsed Mesel ASTs.
+
+    data = dump(ast)     # bytes
+    ast = load(data)     # the same parser.py nodes again
+
+Layout, all integers as unsigned LEB128 varints:
+
+    magic  b'MAST'
+    version
+    string table   count, then (byte length, UTF-8 bytes) per string
+    root node
+
+A node is its tag (the index of its class in NODE_CLASSES plus one), the
+byte length of the rest of the node, then the node itself: its NodeType as
+a string table index, its line as a zigzag delta from the line of the node
+before it, its column, and then its fields in declaration order:
+
+    node           a child node, or tag 0 for None
+    list of nodes  count, then the nodes
+    list of str    count, then a string table index per item
+    str, TokenType string table index plus one, 0 for None
+    number         0 and an 8-byte little-endian double, or 1 and a zigzag int
+
+Names, string literals and enum members are stored once in the string
+table, so a program that uses a variable a thousand times pays for its
+name once. The result is plain bytes, so it can be written to disk, sent
+to a worker process as is, or read from shared memory with load().
+New node classes go at the end of NODE_CLASSES, which keeps old data
+readable; reordering it or changing a node's fields needs a new VERSION.
+"""
+import struct
+import typing
+from dataclasses import fields
+from typing import Dict, List, Union
+from ast_nodes import NodeType
+from lexer import TokenType
+import parser as mesel_parser
+from parser import (Node, Program, Block, VariableDeclaration, Assignment, BinaryOperation,
+                    UnaryOperation, Number, String, Identifier, Print, ForLoop, WhileLoop,
+                    IfStatement, Break, Continue, TurtleCommand, ColorCommand, WidthCommand, Import,
+                    Procedure, Return, Call, CallStatement, ListLiteral, Index, Input)
+
+MAGIC = b'MAST'
+VERSION = 1
+
+NODE_CLASSES = (Program, Block, VariableDeclaration, Assignment, BinaryOperation, UnaryOperation,
+                Number, String, Identifier, Print, ForLoop, WhileLoop, IfStatement, Break,
+                Continue, TurtleCommand, ColorCommand, WidthCommand, Import, Procedure, Return,
+                Call, CallStatement, ListLiteral, Index, Input)
+
+# Field kinds
+NODE, NODES, STR, TOKEN, NUMBER, STRS = range(6)
+
+DOUBLE = struct.Struct('<d')
+
+def field_kind(annotation) -> int:
+    if typing.get_origin(annotation) is Union:
+        # Optional[X]: None is encoded by every kind that can hold it
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+    if typing.get_origin(annotation) in (list, List):
+        return STRS if typing.get_args(annotation) == (str,) else NODES
+    if annotation is str:
+        return STR
+    if annotation is TokenType:
+        return TOKEN
+    if annotation is float:
+        return NUMBER
+    if isinstance(annotation, type) and issubclass(annotation, Node):
+        return NODE
+    raise TypeError(f"Can't serialize AST field of type {annotation!r}")
+
+def node_schema(cls) -> tuple:
+    hints = typing.get_type_hints(cls, vars(mesel_parser))
+    return tuple((field.name, field_kind(hints[field.name])) for field in fields(cls)
+                 if field.name not in ('type', 'line', 'column'))
+
+SCHEMAS = {cls: node_schema(cls) for cls in NODE_CLASSES}
+TAGS = {cls: tag for tag, cls in enumerate(NODE_CLASSES, 1)}
+
+def write_varint(out: bytearray, value: int):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+def unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+class Writer:
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+        self.line = 0
+
+    def intern(self, value: str) -> int:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def node(self, out: bytearray, node: Node):
+        if node is None:
+            out.append(0)
+            return
+        cls = type(node)
+        body = bytearray()
+        write_varint(body, self.intern(node.type.name))
+        write_varint(body, zigzag(node.line - self.line))
+        self.line = node.line
+        write_varint(body, node.column)
+        for name, kind in SCHEMAS[cls]:
+            value = getattr(node, name)
+            if kind == NODE:
+                self.node(body, value)
+            elif kind == NODES:
+                write_varint(body, len(value))
+                for item in value:
+                    self.node(body, item)
+            elif kind == STR:
+                write_varint(body, 0 if value is None else self.intern(value) + 1)
+            elif kind == TOKEN:
+                write_varint(body, 0 if value is None else self.intern(value.name) + 1)
+            elif kind == STRS:
+                write_varint(body, len(value))
+                for item in value:
+                    write_varint(body, self.intern(item))
+            elif isinstance(value, int):
+                body.append(1)
+                write_varint(body, zigzag(value))
+            else:
+                body.append(0)
+                body += DOUBLE.pack(value)
+        out.append(TAGS[cls])
+        write_varint(out, len(body))
+        out += body
+
+def dump(node: Node) -> bytes:
+    """Serialize a parser.py AST to bytes."""
+    writer = Writer()
+    body = bytearray()
+    writer.node(body, node)
+    out = bytearray(MAGIC)
+    write_varint(out, VERSION)
+    write_varint(out, len(writer.strings))
+    for value in writer.strings:
+        encoded = value.encode('utf-8')
+        write_varint(out, len(encoded))
+        out += encoded
+    out += body
+    return bytes(out)
+
+class Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.line = 0
+        self.strings: List[str] = []
+        self.node_types: Dict[str, NodeType] = NodeType.__members__
+        self.token_types: Dict[str, TokenType] = TokenType.__members__
+
+    def varint(self) -> int:
+        data = self.data
+        pos = self.pos
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80:
+            self.pos = pos
+            return byte
+        value = byte & 0x7f
+        shift = 7
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return value
+            shift += 7
+
+    def node(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == 0:
+            return None
+        if tag > len(NODE_CLASSES):
+            raise ValueError(f"Unknown AST node tag {tag} at byte {self.pos - 1}")
+        cls = NODE_CLASSES[tag - 1]
+        length = self.varint()
+        end = self.pos + length
+        strings = self.strings
+        values = [self.node_types[strings[self.varint()]]]
+        self.line += unzigzag(self.varint())
+        values.append(self.line)
+        values.append(self.varint())
+        for name, kind in SCHEMAS[cls]:
+            if kind == NODE:
+                values.append(self.node())
+            elif kind == NODES:
+                values.append([self.node() for _ in range(self.varint())])
+            elif kind == STR:
+                index = self.varint()
+                values.append(strings[index - 1] if index else None)
+            elif kind == TOKEN:
+                index = self.varint()
+                values.append(self.token_types[strings[index - 1]] if index else None)
+            elif kind == STRS:
+                values.append([strings[self.varint()] for _ in range(self.varint())])
+            else:
+                form = self.data[self.pos]
+                self.pos += 1
+                if form:
+                    values.append(unzigzag(self.varint()))
+                else:
+                    values.append(DOUBLE.unpack_from(self.data, self.pos)[0])
+                    self.pos += DOUBLE.size
+        if self.pos != end:
+            raise ValueError(f"Corrupt AST data: {cls.__name__} node ends at byte {self.pos}, expected {end}")
+        return cls(*values)
+
+def load(data: Union[bytes, bytearray, memoryview]) -> Node:
+    """Rebuild the AST that dump() serialized."""
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a Mesel AST (bad magic)")
+    reader = Reader(data)
+    reader.pos = len(MAGIC)
+    try:
+        version = reader.varint()
+        if version != VERSION:
+            raise ValueError(f"Unsupported Mesel AST version {version}, expected {VERSION}")
+        for _ in range(reader.varint()):
+            length = reader.varint()
+            if reader.pos + length > len(data):
+                raise IndexError(reader.pos + length)
+            reader.strings.append(bytes(data[reader.pos:reader.pos + length]).decode('utf-8'))
+            reader.pos += length
+        node = reader.node()
+    except (IndexError, struct.error):
+        raise ValueError("Truncated Mesel AST data") from None
+    except UnicodeDecodeError:
+        raise ValueError("Corrupt Mesel AST data: a string isn't UTF-8") from None
+    except KeyError as e:
+        raise ValueError(f"Corrupt Mesel AST data: unknown name {e}") from None
+    if reader.pos != len(data):
+        raise ValueError(f"Trailing bytes after Mesel AST at byte {reader.pos}")
+    return node
@@ -21,6 +21,14 @@ class NodeType(Enum):
     TURTLE_COMMAND = 'TURTLE_COMMAND'
     COLOR_COMMAND = 'COLOR_COMMAND'
     WIDTH_COMMAND = 'WIDTH_COMMAND'
+    IMPORT = 'IMPORT'
+    PROCEDURE = 'PROCEDURE'
+    RETURN = 'RETURN'
+    CALL = 'CALL'
+    CALL_STATEMENT = 'CALL_STATEMENT'
+    LIST = 'LIST'
+    INDEX = 'INDEX'
+    INPUT = 'INPUT'
 
 # Base node class
 @dataclass
@@ -0,0 +1,68 @@
+"""Measure animate.py exporting a large drawing, against redrawing every frame.
+
+Animates a random walk of --segments segments (the one bench_raster.py
+draws) in --frames frames as APNG and as GIF, and reports the time and
+file size of each. For comparison it renders a few frames the way a
+screen recording would, the whole drawing so far from scratch, and
+extrapolates to every frame; and it encodes the same frames as whole
+opaque images to show what dirty rectangles and transparency save.
+
+Usage: python benchmarks/bench_animate.py [--segments 100000] [--frames 100] [--size 400x300]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import animate
+import raster
+from bench_raster import random_walk
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--segments', type=int, default=100_000)
+    arg_parser.add_argument('--frames', type=int, default=100)
+    arg_parser.add_argument('--size', default='400x300')
+    arg_parser.add_argument('--samples', type=int, default=5, help='frames to redraw from scratch')
+    args = arg_parser.parse_args()
+    width, height = (int(n) for n in args.size.lower().split('x'))
+    segments = random_walk(args.segments)
+
+    print(f"{args.segments} segments, {args.frames} frames, {width}x{height}, "
+          f"{'NumPy' if raster.numpy is not None else 'no NumPy'}")
+    for format in ('apng', 'gif'):
+        start = time.perf_counter()
+        data = animate.render_animation(segments, width, height, frames=args.frames, format=format)
+        seconds = time.perf_counter() - start
+        print(f"{format:>20} {seconds:8.2f} s {len(data) / 1024:10.0f} KB")
+
+    frames = list(animate.render_frames(segments, width, height, frames=args.frames))
+    full, canvas = [], animate.Frame(0, 0, width, height, b'', b'\x01' * width * height)
+    shown = bytearray(frames[0].pixels)
+    for frame in frames:
+        # The frame pasted into the whole image, as an encoder without deltas stores it
+        for row in range(frame.height):
+            for col in range(frame.width):
+                if frame.changed[row * frame.width + col]:
+                    start = ((frame.top + row) * width + frame.left + col) * 3
+                    source = (row * frame.width + col) * 3
+                    shown[start:start + 3] = frame.pixels[source:source + 3]
+        full.append(canvas._replace(pixels=bytes(shown)))
+    delays = [4] * len(frames)
+    cropped = len(animate.encode_apng(width, height, frames, delays))
+    uncropped = len(animate.encode_apng(width, height, full, delays))
+    print(f"{'apng whole frames':>20} {'':10} {uncropped / 1024:10.0f} KB  deltas save "
+          f"{1 - cropped / uncropped:.0%}")
+
+    per_frame = -(-len(segments) // args.frames)
+    start = time.perf_counter()
+    for i in range(1, args.samples + 1):
+        raster.render_png(segments[:per_frame * args.frames * i // args.samples], width, height)
+    redraw = (time.perf_counter() - start) / args.samples * args.frames
+    print(f"{'redraw every frame':>20} {redraw:8.2f} s  (from {args.samples} frames)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Compare loading a binary AST with re-parsing the source and with pickle.
+
+For each size the best of --repeat runs is reported, along with the size of
+the source, the ast_binary encoding and the pickled AST.
+
+Usage: python benchmarks/bench_ast_binary.py [--sizes 10K,100K,1M] [--repeat N]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ast_binary
+from lexer import Lexer
+from parser import Parser
+from program_generator import generate_program, parse_size
+
+def best_of(repeat: int, function, argument) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def parse(source: str):
+    return Parser(Lexer(source).tokenize()).parse()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default='10K,100K,1M')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    print(f"{'size':>6s} {'parse ms':>10s} {'load ms':>10s} {'unpickle ms':>12s}"
+          f" {'source KB':>10s} {'binary KB':>10s} {'pickle KB':>10s}")
+    for label in args.sizes.split(','):
+        source = generate_program(parse_size(label), seed=args.seed)
+        ast = parse(source)
+        data = ast_binary.dump(ast)
+        pickled = pickle.dumps(ast)
+        if ast_binary.load(data) != ast:
+            print(f"{label:>6s} round trip changed the AST")
+            sys.exit(1)
+        print(f"{label:>6s} {best_of(args.repeat, parse, source) * 1000:10.1f}"
+              f" {best_of(args.repeat, ast_binary.load, data) * 1000:10.1f}"
+              f" {best_of(args.repeat, pickle.loads, pickled) * 1000:12.1f}"
+              f" {len(source.encode('utf-8')) / 1024:10.0f} {len(data) / 1024:10.0f}"
+              f" {len(pickled) / 1024:10.0f}")
+
+if __name__ == '__main__':
+    main()
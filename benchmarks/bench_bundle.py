@@ -0,0 +1,79 @@
+"""Compare starting lessons from source with starting them from a bundle.
+
+Writes --lessons random programs of --size bytes, bundles them, then times
+getting every lesson's code object ready to run: from source (read, lex,
+parse, generate, compile) and from the bundle (open it once, unmarshal the
+lesson). Also times opening the bundle and loading a single lesson, which
+is what `python lessons.pyz LESSON` pays.
+
+Usage: python benchmarks/bench_bundle.py [--lessons N] [--size 4K] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+from bundle import Bundle, build_bundle
+from program_generator import generate_program, parse_size
+
+def from_source(paths):
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            code = CodeGenerator().generate(Parser(Lexer(f.read()).tokenize()).parse())
+        compile(code, path, 'exec')
+
+def from_bundle(path, lessons):
+    with Bundle(path) as bundle:
+        for lesson in lessons:
+            bundle.load(lesson)
+
+def best_of(repeat: int, function, *arguments) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*arguments)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lessons', type=int, default=200)
+    arg_parser.add_argument('--size', default='4K')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, 'lessons')
+        os.makedirs(directory)
+        paths = []
+        for i in range(args.lessons):
+            paths.append(os.path.join(directory, f'lesson{i}.mesel'))
+            with open(paths[-1], 'w', encoding='utf-8') as f:
+                f.write(generate_program(parse_size(args.size), seed=i))
+        archive = os.path.join(tmp, 'lessons.pyz')
+        start = time.perf_counter()
+        index = build_bundle(directory, archive)
+        build = time.perf_counter() - start
+        lessons = sorted(index['lessons'])
+
+        results = [
+            ('build bundle', build),
+            ('all from source', best_of(args.repeat, from_source, paths)),
+            ('all from bundle', best_of(args.repeat, from_bundle, archive, lessons)),
+            ('one from source', best_of(args.repeat, from_source, paths[:1])),
+            ('one from bundle', best_of(args.repeat, from_bundle, archive, lessons[:1])),
+        ]
+        print(f"{args.lessons} lessons of {args.size}, bundle {os.path.getsize(archive) / 1024:.0f} KB")
+    for name, seconds in results:
+        print(f"{name:16s} {seconds * 1000:9.2f} ms")
+
+if __name__ == '__main__':
+    main()
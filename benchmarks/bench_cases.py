@@ -0,0 +1,92 @@
+"""Measure the cost per test case of cases.run_cases against a process per case.
+
+Compiles a small input-driven program and runs it against --cases input
+vectors three ways: one `python program.py` process per case with the
+answers on stdin, cases.run_cases in this process, and the program's main
+called directly with the answers already installed, which is the floor
+run_cases aims for. Reports the time per case of each.
+
+Usage: python benchmarks/bench_cases.py [--cases 2000] [--subprocess-cases 50]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+import mesel_runtime
+from cases import compile_program, run_cases
+from compiler import compile_source
+
+PROGRAM = """
+ተግባር ድምር_እስከ(n)
+    ቁጥር ድምሩ = 0
+    ቁጥር i = 0
+    ድገም i < n
+        አስቀምጥ ድምሩ = ድምሩ + i
+        አስቀምጥ i = i + 1
+    ጨርስ
+    መልስ ድምሩ
+ጨርስ
+ቁጥር ሀ = ጠይቅ
+ቁጥር ለ = ጠይቅ
+ያሳይ ድምር_እስከ(ሀ) * ለ
+"""
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--cases', type=int, default=2000)
+    arg_parser.add_argument('--subprocess-cases', type=int, default=50,
+                            help='cases to run as processes; they are much slower')
+    args = arg_parser.parse_args()
+    cases = [[i % 50, i] for i in range(args.cases)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.mesel')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(PROGRAM)
+        program = compile_program(path)
+        with open(program.path, 'w', encoding='utf-8') as f:
+            f.write(compile_source(PROGRAM).code)
+
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(ROOT))
+        start = time.perf_counter()
+        for inputs in cases[:args.subprocess_cases]:
+            subprocess.run([sys.executable, program.path], input=f"{inputs[0]}\n{inputs[1]}\n",
+                           capture_output=True, text=True, check=True, env=env)
+        process = (time.perf_counter() - start) / args.subprocess_cases
+
+        start = time.perf_counter()
+        results = run_cases(program, cases)
+        in_process = (time.perf_counter() - start) / len(cases)
+        if any(result.error for result in results):
+            print(f"a case failed: {next(result.error for result in results if result.error)}",
+                  file=sys.stderr)
+            return 1
+
+        namespace = {'__name__': '__mesel__'}
+        exec(program.code, namespace)
+        body = namespace['main']
+        previous = mesel_runtime.set_output(mesel_runtime.CaptureOutput())
+        try:
+            start = time.perf_counter()
+            for inputs in cases:
+                mesel_runtime.set_input(mesel_runtime.ListInput(inputs))
+                body()
+            direct = (time.perf_counter() - start) / len(cases)
+        finally:
+            mesel_runtime.set_output(previous)
+            mesel_runtime.set_input(mesel_runtime.ConsoleInput())
+
+    print(f"{'process per case':>18} {process * 1e3:9.3f} ms/case  ({args.subprocess_cases} cases)")
+    print(f"{'run_cases':>18} {in_process * 1e3:9.3f} ms/case  {process / in_process:7.0f}x faster")
+    print(f"{'main() alone':>18} {direct * 1e3:9.3f} ms/case  run_cases adds "
+          f"{(in_process - direct) * 1e6:.0f} us/case")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
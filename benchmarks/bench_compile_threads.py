@@ -0,0 +1,59 @@
+"""Measure how compiler.compile_source scales across threads.
+
+Generates --programs different programs of --size bytes each with
+program_generator.py, compiles them all serially, then from a thread pool
+for each --threads count, checks that every threaded result is the serial
+one, and reports programs per second and the speedup of each. Threads only
+run Python in parallel on a free-threaded build (python3.13t); under the
+GIL the speedup stays around 1x, and the run checks that concurrent calls
+don't interfere. Which build is running is shown first.
+
+Usage: python benchmarks/bench_compile_threads.py [--programs 64] [--size 16K] [--threads 1,2,4,8] [--target python]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+sys.path.insert(0, ROOT)
+
+from code_generator import TARGETS
+from compiler import CompileOptions, compile_source
+from program_generator import generate_program, parse_size
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--programs', type=int, default=64)
+    arg_parser.add_argument('--size', type=parse_size, default=parse_size('16K'))
+    arg_parser.add_argument('--threads', default='1,2,4,8')
+    arg_parser.add_argument('--target', choices=list(TARGETS), default='python')
+    args = arg_parser.parse_args()
+
+    options = CompileOptions(target=args.target)
+    sources = [generate_program(args.size, seed=seed) for seed in range(args.programs)]
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"{args.programs} programs of {args.size} bytes, Python {sys.version.split()[0]}, "
+          f"GIL {'enabled' if gil else 'disabled'}, {os.cpu_count()} cores available")
+
+    start = time.perf_counter()
+    serial = [compile_source(source, options) for source in sources]
+    serial_seconds = time.perf_counter() - start
+    print(f"{'serial':>10} {serial_seconds:8.2f} s  {args.programs / serial_seconds:8.1f} programs/s")
+
+    for threads in (int(n) for n in args.threads.split(',')):
+        with ThreadPoolExecutor(threads) as pool:
+            start = time.perf_counter()
+            results = list(pool.map(compile_source, sources, [options] * len(sources)))
+            seconds = time.perf_counter() - start
+        if any((a.code, a.diagnostics) != (b.code, b.diagnostics) for a, b in zip(results, serial)):
+            print(f"{threads} threads: results differ from the serial compiles", file=sys.stderr)
+            return 1
+        print(f"{threads:>2} threads {seconds:8.2f} s  {args.programs / seconds:8.1f} programs/s  "
+              f"{serial_seconds / seconds:5.2f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
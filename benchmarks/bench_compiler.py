@@ -0,0 +1,161 @@
+"""Time the Lexer, Parser and CodeGenerator on generated programs.
+
+Every size in the sweep runs in its own subprocess, so the peak RSS it
+reports belongs to that size alone. For each phase the best of --repeat
+runs is kept and turned into throughput: tokens/s for the lexer and
+nodes/s for the parser and code generator.
+
+    python benchmarks/bench_compiler.py                       # 1K..1M
+    python benchmarks/bench_compiler.py --sizes 1K,10K,100K,1M,10M,100M
+    python benchmarks/bench_compiler.py --save-baseline       # write baseline.json
+    python benchmarks/bench_compiler.py --compare             # fail on regressions
+
+--compare exits with status 1 when a phase is more than --threshold slower
+(or peak RSS more than --threshold larger) than in the stored baseline.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from program_generator import generate_program, parse_size
+
+DEFAULT_SIZES = '1K,10K,100K,1M'
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+PHASES = ('lex', 'parse', 'codegen')
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def measure(path: str, repeat: int) -> dict:
+    """Compile the program at path `repeat` times and return its metrics."""
+    from lexer import Lexer
+    from parser import Parser, walk
+    from code_generator import CodeGenerator
+
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    best = dict.fromkeys(PHASES, float('inf'))
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = Lexer(source).tokenize()
+        lexed = time.perf_counter()
+        ast = Parser(tokens).parse()
+        parsed = time.perf_counter()
+        code = CodeGenerator().generate(ast)
+        generated = time.perf_counter()
+        for phase, elapsed in zip(PHASES, (lexed - start, parsed - lexed, generated - parsed)):
+            best[phase] = min(best[phase], elapsed)
+    nodes = sum(1 for _ in walk(ast))
+    return {
+        'bytes': len(source.encode('utf-8')),
+        'tokens': len(tokens),
+        'nodes': nodes,
+        'output_bytes': len(code.encode('utf-8')),
+        'seconds': best,
+        'tokens_per_s': len(tokens) / best['lex'],
+        'nodes_per_s': {'parse': nodes / best['parse'], 'codegen': nodes / best['codegen']},
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+def run_size(label: str, size: int, args) -> dict:
+    source = generate_program(size, args.depth, args.density, args.amharic, args.seed)
+    with tempfile.NamedTemporaryFile('w', suffix='.mesel', encoding='utf-8', delete=False) as f:
+        f.write(source)
+        path = f.name
+    del source
+    try:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', path, '--repeat', str(args.repeat)],
+            check=True, capture_output=True, text=True)
+    finally:
+        os.unlink(path)
+    metrics = json.loads(result.stdout)
+    metrics['size'] = label
+    return metrics
+
+def report(results: list):
+    print(f"{'size':>6} {'tokens':>10} {'nodes':>10} {'lex ms':>9} {'parse ms':>9} {'gen ms':>9}"
+          f" {'tokens/s':>11} {'nodes/s':>11} {'RSS MB':>8}")
+    for r in results:
+        s = r['seconds']
+        rss = f"{r['peak_rss_kb'] / 1024:8.1f}" if r['peak_rss_kb'] is not None else '       -'
+        print(f"{r['size']:>6} {r['tokens']:>10} {r['nodes']:>10} {s['lex'] * 1000:9.1f}"
+              f" {s['parse'] * 1000:9.1f} {s['codegen'] * 1000:9.1f} {r['tokens_per_s']:11.0f}"
+              f" {r['nodes_per_s']['parse']:11.0f} {rss}")
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Return a description of every metric that regressed past the threshold."""
+    regressions = []
+    for r in results:
+        base = baseline.get(r['size'])
+        if base is None:
+            continue
+        for phase in PHASES:
+            # Compare time per byte so small differences in generated size don't count
+            now = r['seconds'][phase] / r['bytes']
+            before = base['seconds'][phase] / base['bytes']
+            if now > before * (1 + threshold):
+                regressions.append(f"{r['size']} {phase}: {now / before - 1:+.0%} time per byte")
+        if r['peak_rss_kb'] and base.get('peak_rss_kb'):
+            if r['peak_rss_kb'] > base['peak_rss_kb'] * (1 + threshold):
+                regressions.append(f"{r['size']} peak RSS: {r['peak_rss_kb'] / base['peak_rss_kb'] - 1:+.0%}")
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                            help=f'comma separated program sizes (default {DEFAULT_SIZES})')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--depth', type=int, default=4)
+    arg_parser.add_argument('--density', type=float, default=0.4)
+    arg_parser.add_argument('--amharic', type=float, default=0.7)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--json', help='also write the results to this file')
+    arg_parser.add_argument('--baseline', default=BASELINE)
+    arg_parser.add_argument('--save-baseline', action='store_true')
+    arg_parser.add_argument('--compare', action='store_true')
+    arg_parser.add_argument('--threshold', type=float, default=0.25,
+                            help='allowed slowdown before --compare fails (default 0.25)')
+    arg_parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.repeat)))
+        return
+
+    results = [run_size(label, parse_size(label), args) for label in args.sizes.split(',')]
+    report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({r['size']: r for r in results}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    if args.compare:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == '__main__':
+    main()
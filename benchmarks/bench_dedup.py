@@ -0,0 +1,78 @@
+"""Measure how much running submissions costs with and without dedup.py.
+
+Makes --submissions copies of the example programs, each respelled the
+way students' copies differ (comments, spacing, number spellings, a ዙር 0
+here and there), then compares running every one of them with hashing
+them all and running only one per digest, through a ResultStore.
+
+Usage: python benchmarks/bench_dedup.py [--submissions 200]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dedup import ResultStore, file_digest, run_submission
+
+def respell(code: str, rng: random.Random) -> str:
+    lines = []
+    for line in code.split('\n'):
+        indent = len(line) - len(line.lstrip())
+        line = ' ' * (indent * rng.choice((1, 2))) + line.lstrip()
+        if rng.random() < 0.2:
+            line += '  # ' + rng.choice(('ካሬ', 'loop', 'ይህ'))
+        if rng.random() < 0.1 and line.strip().startswith('ሂድ'):
+            line += '\n' + ' ' * indent + 'ዙር 0'
+        lines.append(line.replace(' 90', ' 90.0') if rng.random() < 0.5 else line)
+    return '\n'.join(lines)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--submissions', type=int, default=200)
+    args = arg_parser.parse_args()
+    rng = random.Random(0)
+    examples = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'examples', '*.mesel'))):
+        with open(path, encoding='utf-8') as f:
+            examples.append(f.read())
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.submissions):
+            path = os.path.join(directory, f"submission{i}.mesel")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(respell(examples[i % len(examples)], rng))
+            paths.append(path)
+
+        start = time.perf_counter()
+        everything = [run_submission(path) for path in paths]
+        run_all = time.perf_counter() - start
+
+        start = time.perf_counter()
+        digests = [file_digest(path) for path in paths]
+        hashing = time.perf_counter() - start
+        with ResultStore(os.path.join(directory, 'results.sqlite')) as store:
+            start = time.perf_counter()
+            deduplicated = [store.cached(digest, 'run', lambda: run_submission(path))
+                            for digest, path in zip(digests, paths)]
+            stored = time.perf_counter() - start
+            misses = store.misses
+        if deduplicated != everything:
+            print("deduplicated results differ from running every submission", file=sys.stderr)
+            return 1
+
+    print(f"{args.submissions} submissions of {len(examples)} programs, {len(set(digests))} distinct digests")
+    print(f"{'run every one':>16} {run_all * 1e3:9.1f} ms")
+    print(f"{'hash':>16} {hashing * 1e3:9.1f} ms  {hashing / len(paths) * 1e6:7.0f} us/submission")
+    print(f"{'run by digest':>16} {stored * 1e3:9.1f} ms  {misses} ran, "
+          f"{(hashing + stored) / run_all:.1%} of running every one")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Measure how fast fingerprint.py grades a class of drawing submissions.
+
+Makes --submissions drawings: squares of random size, position and step
+count (which match the reference) and random walks (which don't), then
+times fingerprinting them all and scoring each against the reference.
+
+Usage: python benchmarks/bench_fingerprint.py [--submissions N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mesel_runtime import RecordingTurtle
+from fingerprint import fingerprint, similarity
+
+def submission(rng: random.Random):
+    t = RecordingTurtle()
+    t.x, t.y = rng.uniform(-200, 200), rng.uniform(-200, 200)
+    if rng.random() < 0.5:
+        size, steps = rng.choice((50, 80, 100, 120)), rng.randint(1, 20)
+        for _ in range(4):
+            for _ in range(steps):
+                t.forward(size / steps)
+            t.left(90)
+    else:
+        for _ in range(rng.randint(10, 200)):
+            t.forward(rng.uniform(1, 30))
+            t.left(rng.uniform(-120, 120))
+    return t.segments
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--submissions', type=int, default=20_000)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    drawings = [submission(rng) for _ in range(args.submissions)]
+    segments = sum(len(drawing) for drawing in drawings)
+    t = RecordingTurtle()
+    for _ in range(4):
+        t.forward(100)
+        t.left(90)
+    reference = fingerprint(t.segments)
+
+    start = time.perf_counter()
+    prints = [fingerprint(drawing) for drawing in drawings]
+    fingerprinted = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = [similarity(print_, reference) for print_ in prints]
+    scored = time.perf_counter() - start
+    exact = sum(print_.digest == reference.digest for print_ in prints)
+
+    print(f"{args.submissions} submissions, {segments} segments")
+    print(f"fingerprint  {fingerprinted * 1000:9.1f} ms  {args.submissions / fingerprinted:10,.0f} drawings/s")
+    print(f"similarity   {scored * 1000:9.1f} ms  {args.submissions / scored:10,.0f} drawings/s")
+    print(f"{exact} match the reference exactly, {sum(score > 0.8 for score in scores)} score above 0.8")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Measure how lexer.tokenize_parallel scales with the number of processes.
+
+Generates a --size program with program_generator.py, lexes it serially
+with Lexer.tokenize, then with tokenize_parallel for each --workers count,
+checks that every run returns exactly the serial tokens, and reports the
+time and speedup of each. Speedup is capped by the cores available (shown
+first) and by the work tokenize_parallel does in the parent process:
+finding chunk boundaries and rebuilding Token tuples from the workers'
+results.
+
+Usage: python benchmarks/bench_lexer_parallel.py [--size 8M] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+sys.path.insert(0, ROOT)
+
+import lexer
+from lexer import Lexer, tokenize_parallel
+from program_generator import generate_program, parse_size
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', type=parse_size, default=parse_size('8M'))
+    arg_parser.add_argument('--workers', default='1,2,4,8')
+    args = arg_parser.parse_args()
+
+    source = generate_program(args.size)
+    print(f"{len(source.encode('utf-8'))} bytes, {len(source)} characters, "
+          f"{os.cpu_count()} cores available")
+
+    start = time.perf_counter()
+    serial = Lexer(source).tokenize()
+    serial_seconds = time.perf_counter() - start
+    print(f"{'serial':>10} {serial_seconds:8.2f} s  {len(serial) / serial_seconds:10.0f} tokens/s")
+
+    # Chunk even the smallest sizes, so that every worker count is measured
+    lexer.MIN_CHUNK = 1
+    for workers in (int(n) for n in args.workers.split(',')):
+        start = time.perf_counter()
+        tokens = tokenize_parallel(source, workers)
+        seconds = time.perf_counter() - start
+        if tokens != serial:
+            print(f"{workers} workers: tokens differ from the serial lexer", file=sys.stderr)
+            return 1
+        print(f"{workers:>2} workers {seconds:8.2f} s  {len(tokens) / seconds:10.0f} tokens/s  "
+              f"{serial_seconds / seconds:5.2f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
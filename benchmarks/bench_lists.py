@@ -0,0 +1,71 @@
+"""Measure whole-list arithmetic against the same work done element by element.
+
+Both programs compute the sum of squares of 0 .. N-1: one with list
+operations (ድምር(ሀ * ሀ)), one with a Mesel loop. The list version is timed
+with NumPy and with the array.array fallback.
+
+Usage: python benchmarks/bench_lists.py [--size N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mesel_lists
+import mesel_runtime
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+
+VECTORIZED = '''
+ቁጥር ሀ = ክልል({size})
+ያሳይ ድምር(ሀ * ሀ)
+'''
+
+LOOP = '''
+ቁጥር ድምር_ = 0
+ቁጥር ለ = 0
+ድገም ለ < {size}
+    አስቀምጥ ድምር_ = ድምር_ + ለ * ለ
+    አስቀምጥ ለ = ለ + 1
+ጨርስ
+ያሳይ ድምር_
+'''
+
+def time_program(source: str, repeat: int) -> float:
+    code = compile(CodeGenerator().generate(Parser(Lexer(source).tokenize()).parse()), '<bench>', 'exec')
+    best = float('inf')
+    previous = mesel_runtime.set_output(mesel_runtime.CaptureOutput())
+    try:
+        for _ in range(repeat):
+            namespace = {'__name__': '__bench__'}
+            exec(code, namespace)
+            start = time.perf_counter()
+            mesel_runtime.run(namespace['main'], drawing=False)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        mesel_runtime.set_output(previous)
+    return best
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', type=int, default=1_000_000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    results = []
+    if mesel_lists.numpy is not None:
+        results.append(('lists (numpy)', time_program(VECTORIZED.format(size=args.size), args.repeat)))
+    with mock.patch.object(mesel_lists, 'numpy', None):
+        results.append(('lists (array)', time_program(VECTORIZED.format(size=args.size), args.repeat)))
+    results.append(('loop', time_program(LOOP.format(size=args.size), args.repeat)))
+
+    for name, seconds in results:
+        print(f"{name:16s} {seconds * 1000:9.1f} ms  {args.size / seconds / 1e6:8.2f} M elements/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Measure ያሳይ throughput on a print-heavy program.
+
+The program prints --lines numbers from a loop. It is timed as a
+subprocess writing to a pipe, once with the default buffered channel and
+once with every ያሳይ turned back into a bare print(), and in this process
+with the capture and callback channels.
+
+Usage: python benchmarks/bench_output.py [--lines N] [--repeat N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mesel_runtime
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+
+PROGRAM = '''
+አስቀምጥ ሀ = 0
+እድግ {lines}
+    አስቀምጥ ሀ = ሀ + 1
+    ያሳይ ሀ * 2
+ጨርስ
+'''
+
+def translate(source: str) -> str:
+    return CodeGenerator().generate(Parser(Lexer(source).tokenize()).parse())
+
+def time_subprocess(path: str, repeat: int) -> float:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, path], env=env, check=True, stdout=subprocess.PIPE)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_in_process(code: str, channel, repeat: int) -> float:
+    best = float('inf')
+    previous = mesel_runtime.set_output(channel)
+    try:
+        for _ in range(repeat):
+            namespace = {'__name__': '__bench__'}
+            exec(code, namespace)
+            start = time.perf_counter()
+            mesel_runtime.run(namespace['main'], drawing=False)
+            best = min(best, time.perf_counter() - start)
+            if hasattr(channel, 'lines'):
+                channel.lines = []
+    finally:
+        mesel_runtime.set_output(previous)
+    return best
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=100_000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    buffered = translate(PROGRAM.format(lines=args.lines))
+    unbuffered = buffered.replace('from mesel_runtime import run, show',
+                                  'from mesel_runtime import run\nshow = print')
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, code in (('print()', unbuffered), ('buffered', buffered)):
+            path = os.path.join(tmp, 'program.py')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(code)
+            results.append((name + ' (subprocess)', time_subprocess(path, args.repeat)))
+    results.append(('capture', time_in_process(buffered, mesel_runtime.CaptureOutput(), args.repeat)))
+    batches = []
+    callback = mesel_runtime.CallbackOutput(batches.append)
+    results.append(('callback', time_in_process(buffered, callback, args.repeat)))
+
+    for name, seconds in results:
+        print(f"{name:24s} {seconds * 1000:9.1f} ms  {args.lines / seconds / 1e6:6.2f} M lines/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Compare the hand-written front end with the Lark LALR one.
+
+Both parse the same generated programs. For each size the best of --repeat
+runs is reported along with the peak memory tracemalloc saw while parsing.
+The Lark parser is built once before timing, so the numbers leave out the
+grammar analysis it does on first use.
+
+Usage: python benchmarks/bench_parsers.py [--sizes 1K,10K,100K] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lexer import Lexer
+from parser import Parser
+from program_generator import generate_program, parse_size
+
+def parse_hand(source: str):
+    return Parser(Lexer(source).tokenize()).parse()
+
+def parse_lark(source: str):
+    from lark_frontend import parse_source
+    return parse_source(source)
+
+FRONT_ENDS = (('hand', parse_hand), ('lark', parse_lark))
+
+def measure(parse, source: str, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(source)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parse(source)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default='1K,10K,100K')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    from lark_frontend import get_parser
+    get_parser()
+
+    print(f"{'size':>6s}  {'parser':6s} {'best ms':>10s} {'peak KB':>10s}")
+    for label in args.sizes.split(','):
+        source = generate_program(parse_size(label), seed=args.seed)
+        if parse_hand(source) != parse_lark(source):
+            print(f"{label:>6s}  front ends disagree on the generated program")
+            sys.exit(1)
+        for name, parse in FRONT_ENDS:
+            best, peak = measure(parse, source, args.repeat)
+            print(f"{label:>6s}  {name:6s} {best * 1000:10.1f} {peak / 1024:10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Measure PNG rendering throughput of raster.py in segments per second.
+
+Renders a random walk of --segments segments (short lines in a few
+colors, like a student drawing) at each --sizes resolution with NumPy,
+with NumPy and --workers processes, and without NumPy for the smallest
+size.
+
+Usage: python benchmarks/bench_raster.py [--segments N] [--sizes 400x300,2000x1500] [--workers N]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import raster
+from mesel_runtime import Segment
+
+def random_walk(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    x = y = heading = 0.0
+    segments = []
+    color = 'blue'
+    for i in range(count):
+        heading += rng.uniform(-30, 30)
+        step = rng.uniform(1, 8)
+        nx = max(-390, min(390, x + step * math.cos(math.radians(heading))))
+        ny = max(-290, min(290, y + step * math.sin(math.radians(heading))))
+        if i % 500 == 0:
+            color = rng.choice(('red', 'green', 'blue', 'black'))
+        segments.append(Segment(x, y, nx, ny, color, 2))
+        x, y = nx, ny
+    return segments
+
+def best_of(repeat: int, segments, width: int, height: int, workers: int = 1) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        raster.render_png(segments, width, height, workers=workers)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--segments', type=int, default=100_000)
+    arg_parser.add_argument('--sizes', default='400x300,2000x1500')
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    segments = random_walk(args.segments)
+    sizes = [tuple(int(n) for n in size.split('x')) for size in args.sizes.split(',')]
+    results = []
+    for width, height in sizes:
+        if raster.numpy is not None:
+            results.append((f'{width}x{height} numpy', best_of(args.repeat, segments, width, height)))
+            if args.workers > 1:
+                results.append((f'{width}x{height} numpy x{args.workers}',
+                                best_of(args.repeat, segments, width, height, args.workers)))
+    width, height = sizes[0]
+    with mock.patch.object(raster, 'numpy', None):
+        count = min(len(segments), 10_000)
+        seconds = best_of(1, segments[:count], width, height)
+        results.append((f'{width}x{height} python', seconds * len(segments) / count))
+
+    for name, seconds in results:
+        print(f"{name:24s} {seconds * 1000:9.1f} ms  {len(segments) / seconds:12,.0f} segments/s")
+
+if __name__ == '__main__':
+    main()
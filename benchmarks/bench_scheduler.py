@@ -0,0 +1,127 @@
+"""Measure how many Mesel programs fit in a GB under scheduler.py against a process each.
+
+Starts --programs copies of a program that draws a star and then loops
+forever, on one scheduler.py event loop, lets each take a few turns and
+reports the memory they added per program. Then starts --processes
+copies as `python program.py` processes and reports their proportional
+set size (PSS, so shared library pages are split between them) per
+process. Also reports how much slower the 'steps' target runs the flower
+example than the 'python' target, which is what yielding at every step
+costs. Memory is read from /proc, so this runs on Linux only.
+
+Usage: python benchmarks/bench_scheduler.py [--programs 2000] [--processes 20] [--slice 1000]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from compiler import CompileOptions, compile_source
+from mesel_runtime import RecordingTurtle, complete
+from scheduler import ProgramRun
+from cases import compile_program
+
+PROGRAM = """
+እድግ 5
+    ሂድ 100
+    ዙር 144
+ጨርስ
+ቁጥር i = 0
+ድገም i >= 0
+    አስቀምጥ i = i + 1
+ጨርስ
+"""
+
+GB = 2 ** 30
+
+def resident_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def proportional_bytes(pid: int) -> int:
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) * 1024
+    raise ValueError(f"no Pss for process {pid}")
+
+async def scheduled_bytes(program, count: int, slice_steps: int, turns: int):
+    """Memory added per program, and steps per second, with count programs mid-run."""
+    gc.collect()
+    before = resident_bytes()
+    runs = [ProgramRun(program) for _ in range(count)]
+    start = time.perf_counter()
+    for run in runs:
+        run.task = asyncio.create_task(run.run(slice_steps))
+    for _ in range(turns + 1):
+        await asyncio.sleep(0)  # every program takes a turn per sleep
+    seconds = time.perf_counter() - start
+    used = resident_bytes() - before
+    steps = sum(run.steps for run in runs)
+    for run in runs:
+        run.cancel()
+    await asyncio.gather(*(run.task for run in runs), return_exceptions=True)
+    return used / count, steps / seconds
+
+def process_bytes(path: str, count: int) -> float:
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(ROOT), MESEL_BACKEND='record')
+    processes = [subprocess.Popen([sys.executable, path], env=env) for _ in range(count)]
+    try:
+        time.sleep(1 + count * 0.05)  # started, and looping
+        return sum(proportional_bytes(process.pid) for process in processes) / count
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+def step_overhead() -> float:
+    with open(os.path.join(os.path.dirname(ROOT), 'examples', 'flower.mesel'), encoding='utf-8') as f:
+        source = f.read()
+    seconds = []
+    for target in ('python', 'steps'):
+        namespace = {'__name__': '__mesel__'}
+        exec(compile_source(source, CompileOptions(target=target)).code, namespace)
+        main = namespace['main'] if target == 'python' else complete(namespace['main'])
+        start = time.perf_counter()
+        main(RecordingTurtle())
+        seconds.append(time.perf_counter() - start)
+    return seconds[1] / seconds[0]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--programs', type=int, default=2000)
+    arg_parser.add_argument('--processes', type=int, default=20)
+    arg_parser.add_argument('--slice', type=int, default=1000, help='steps per turn')
+    arg_parser.add_argument('--turns', type=int, default=3, help='turns each program takes before measuring')
+    args = arg_parser.parse_args()
+    if not os.path.exists('/proc/self/statm'):
+        print("needs /proc (Linux)", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.mesel')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(PROGRAM)
+        program = compile_program(path, target='steps')
+        with open(program.path, 'w', encoding='utf-8') as f:
+            f.write(compile_source(PROGRAM).code)
+        scheduled, steps_per_second = asyncio.run(
+            scheduled_bytes(program, args.programs, args.slice, args.turns))
+        process = process_bytes(program.path, args.processes)
+
+    print(f"{'process each':>14} {process / 1024:9.1f} KB/program {GB / process:9.0f} programs/GB"
+          f"  ({args.processes} processes)")
+    print(f"{'scheduler.py':>14} {scheduled / 1024:9.1f} KB/program {GB / scheduled:9.0f} programs/GB"
+          f"  {process / scheduled:.0f}x more, {steps_per_second / 1e6:.2f} M steps/s")
+    print(f"{'steps target':>14} runs flower.mesel {step_overhead():.2f}x as long as the python target")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
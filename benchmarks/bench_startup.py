@@ -0,0 +1,87 @@
+"""Measure how long generated programs take to start and finish.
+
+Compares a program that only does arithmetic and printing with one that
+draws. The drawing program runs with MESEL_WAIT=0, so the number covers Tk
+startup and drawing rather than the time spent waiting for somebody to
+close the window. Pass --backend to time the drawing program on another
+mesel_runtime backend.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--backend NAME]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+
+PLAIN_PROGRAM = '''
+ጀምር
+    አስቀምጥ ሀ = 10
+    አስቀምጥ ለ = 5
+    አስቀምጥ ውጤት = ሀ + ለ
+    ያሳይ ውጤት
+ጨርስ
+'''
+
+DRAWING_PROGRAM = '''
+ጀምር
+    እድግ 4
+        ሂድ 100
+        ዙር 90
+    ጨርስ
+ጨርስ
+'''
+
+def translate(source: str) -> str:
+    tokens = Lexer(source).tokenize()
+    ast = Parser(tokens).parse()
+    return CodeGenerator().generate(ast)
+
+def time_run(path: str, runs: int, backend: str = None):
+    env = dict(os.environ, PYTHONPATH=ROOT, MESEL_WAIT='0')
+    if backend:
+        env['MESEL_BACKEND'] = backend
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, path], env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return None, result.stderr.decode('utf-8', 'replace').strip().splitlines()[-1]
+        timings.append(elapsed)
+    return timings, None
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--runs', type=int, default=10)
+    arg_parser.add_argument('--backend', help='mesel_runtime backend for the drawing program')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ('plain', PLAIN_PROGRAM, None),
+            ('drawing', DRAWING_PROGRAM, args.backend),
+        ]
+        for name, source, backend in cases:
+            path = os.path.join(tmp, f'{name}.py')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(translate(source))
+            timings, error = time_run(path, args.runs, backend)
+            if timings is None:
+                print(f"{name:8s} failed: {error}")
+                continue
+            print(f"{name:8s} median {statistics.median(timings) * 1000:8.1f} ms"
+                  f"  min {min(timings) * 1000:8.1f} ms  ({args.runs} runs)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Compare the Tk canvas work of turtle.Turtle and mesel_runtime.CanvasTurtle.
+
+Draws the same long figure (--segments short lines, changing color every
+--run segments) with the standard turtle.Turtle under tracer(0) and with
+the CanvasTurtle the tk backend uses, and reports for each the time to
+draw, the number of canvas items left behind and the time one window
+update takes afterwards. Needs a display.
+
+Usage: python benchmarks/bench_tk.py [--segments N] [--run N]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mesel_runtime import CanvasTurtle
+
+COLORS = ('red', 'green', 'blue', 'black')
+
+def draw(t, segments: int, run: int):
+    for i in range(segments):
+        if i % run == 0:
+            t.color(COLORS[i // run % len(COLORS)])
+        t.forward(3 + i % 7)
+        t.left(61 + i % 3)
+
+def measure(screen, make_turtle, segments: int, run: int):
+    screen.clear()
+    screen.tracer(0)
+    canvas = screen.getcanvas()
+    t = make_turtle(screen)
+    start = time.perf_counter()
+    draw(t, segments, run)
+    if hasattr(t, 'flush'):
+        t.flush()
+    screen.update()
+    drawn = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(10):
+        canvas.move('all', 1, 0)  # make the canvas redraw everything
+        screen.update()
+    frame = (time.perf_counter() - start) / 10
+    return drawn, len(canvas.find_all()), frame
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--segments', type=int, default=50000)
+    arg_parser.add_argument('--run', type=int, default=5000, help='segments drawn in each color')
+    args = arg_parser.parse_args()
+
+    import tkinter
+    import turtle
+    try:
+        screen = turtle.Screen()
+    except tkinter.TclError as e:
+        print(f"bench_tk needs a display: {e}", file=sys.stderr)
+        return 1
+
+    def standard(screen):
+        t = turtle.Turtle()
+        t.speed(0)
+        t.hideturtle()
+        return t
+
+    print(f"{args.segments} segments, {args.run} per color")
+    print(f"{'turtle':14} {'draw s':>8} {'items':>8} {'frame ms':>9}")
+    for name, make_turtle in (('turtle.Turtle', standard),
+                              ('CanvasTurtle', lambda screen: CanvasTurtle(screen.getcanvas()))):
+        drawn, items, frame = measure(screen, make_turtle, args.segments, args.run)
+        print(f"{name:14} {drawn:8.3f} {items:8d} {frame * 1000:9.2f}")
+    screen.bye()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
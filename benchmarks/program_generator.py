@@ -0,0 +1,163 @@
+"""Generate random, valid Mesel programs for benchmarking.
+
+Programs are built from the statement and expression grammar the
+hand-written Parser accepts, so every generated file lexes, parses and
+translates. The knobs are:
+
+    size                  approximate size of the program in UTF-8 bytes
+    max_depth             deepest nesting of loops, branches and blocks
+    expression_density    0..1, how likely an operand grows into a
+                          larger expression instead of a literal/name
+    amharic_ratio         0..1, share of identifiers written in Ge'ez
+                          script rather than ASCII letters
+
+Usage: python benchmarks/program_generator.py SIZE [--seed N] > program.mesel
+"""
+import argparse
+import random
+import sys
+from typing import List
+
+# Names that are not Mesel keywords, so they lex as identifiers
+AMHARIC_NAMES = [
+    'ሀ', 'ለ', 'ሐ', 'መ', 'ረ', 'ሰ', 'ርዝመት', 'ጎን', 'ክብ', 'እድሜ', 'ውጤት',
+    'ቁመት', 'ስፋቱ', 'ማዕዘን', 'ቁጥሩ', 'ድምር', 'ብዛት', 'መጠን', 'ርቀት', 'ፍጥነት',
+]
+ASCII_NAMES = [
+    'a', 'b', 'c', 'x', 'y', 'z', 'side', 'angle', 'count', 'total',
+    'size', 'step', 'speed', 'n', 'i', 'j', 'k', 'width2', 'value', 'age',
+]
+COLOR_NAMES = ['ቀይ', 'አረንጓዴ', 'ሰማያዊ', 'ቢጫ', 'ጥቁር', 'ነጭ']
+WORDS = ['ሰላም', 'ዓለም', 'ውጤት', 'ጨርሷል', 'ቁጥር', 'ልጆች']
+ARITHMETIC = ['+', '-', '*']
+COMPARISONS = ['>', '<', '>=', '<=', '==', '!=']
+
+class ProgramGenerator:
+    def __init__(self, max_depth: int = 4, expression_density: float = 0.4,
+                 amharic_ratio: float = 0.7, seed: int = 0):
+        self.max_depth = max_depth
+        self.expression_density = expression_density
+        self.amharic_ratio = amharic_ratio
+        self.random = random.Random(seed)
+        self.names = [self.new_name() for _ in range(12)]
+
+    def new_name(self) -> str:
+        if self.random.random() < self.amharic_ratio:
+            return self.random.choice(AMHARIC_NAMES)
+        return self.random.choice(ASCII_NAMES)
+
+    def number(self) -> str:
+        if self.random.random() < 0.8:
+            return str(self.random.randint(0, 360))
+        return f"{self.random.randint(0, 99)}.{self.random.randint(0, 9)}"
+
+    def expression(self, defined: List[str], depth: int = 0) -> str:
+        roll = self.random.random()
+        if depth < 4 and roll < self.expression_density:
+            left = self.expression(defined, depth + 1)
+            right = self.expression(defined, depth + 1)
+            if self.random.random() < 0.1:
+                return f"({left} {self.random.choice(ARITHMETIC)} {right})"
+            if self.random.random() < 0.05:
+                return f"{left} / {self.random.randint(1, 9)}"
+            return f"{left} {self.random.choice(ARITHMETIC)} {right}"
+        if defined and roll < self.expression_density + (1 - self.expression_density) / 2:
+            return self.random.choice(defined)
+        return self.number()
+
+    def condition(self, defined: List[str]) -> str:
+        left = self.expression(defined)
+        right = self.expression(defined)
+        return f"{left} {self.random.choice(COMPARISONS)} {right}"
+
+    def statement(self, lines: List[str], defined: List[str], depth: int, in_loop: bool):
+        pad = '    ' * depth
+        roll = self.random.random()
+        nested = depth < self.max_depth
+        if nested and roll < 0.08:
+            lines.append(f"{pad}እድግ {self.random.randint(1, 10)}")
+            self.body(lines, defined, depth + 1, True)
+        elif nested and roll < 0.12:
+            variable = self.random.choice(self.names)
+            lines.append(f"{pad}እድግ {variable} = {self.random.randint(0, 5)}, {self.random.randint(5, 20)}")
+            self.body(lines, defined + [variable], depth + 1, True)
+        elif nested and roll < 0.18:
+            lines.append(f"{pad}ከሆነ {self.condition(defined)}")
+            self.body(lines, defined, depth + 1, in_loop)
+            if self.random.random() < 0.5:
+                lines.append(f"{pad}ካልሆነ")
+                self.body(lines, defined, depth + 1, in_loop)
+        elif nested and roll < 0.20:
+            lines.append(f"{pad}ድገም {self.condition(defined)}")
+            self.body(lines, defined, depth + 1, True)
+        elif nested and roll < 0.22:
+            lines.append(f"{pad}ጀምር")
+            self.body(lines, defined, depth + 1, in_loop)
+        elif roll < 0.45:
+            name = self.random.choice(self.names)
+            lines.append(f"{pad}አስቀምጥ {name} = {self.expression(defined)}")
+            if name not in defined:
+                defined.append(name)
+        elif roll < 0.52:
+            if self.random.random() < 0.3:
+                lines.append(f'{pad}ያሳይ "{self.random.choice(WORDS)}"')
+            else:
+                lines.append(f"{pad}ያሳይ {self.expression(defined)}")
+        elif roll < 0.70:
+            lines.append(f"{pad}ሂድ {self.expression(defined)}")
+        elif roll < 0.85:
+            lines.append(f"{pad}ዙር {self.expression(defined)}")
+        elif roll < 0.89:
+            lines.append(f"{pad}{self.random.choice(['ስዕል_ጀምር', 'ስዕል_አቁም'])}")
+        elif roll < 0.93:
+            lines.append(f"{pad}ቀለም {self.random.choice(COLOR_NAMES)}")
+        elif roll < 0.96:
+            lines.append(f"{pad}ስፋት {self.random.randint(1, 10)}")
+        elif in_loop and roll < 0.97:
+            lines.append(f"{pad}{self.random.choice(['ተው', 'ቀጥል'])}")
+        else:
+            lines.append(f"{pad}# {self.random.choice(WORDS)}")
+
+    def body(self, lines: List[str], defined: List[str], depth: int, in_loop: bool):
+        for _ in range(self.random.randint(1, 4)):
+            self.statement(lines, list(defined), depth, in_loop)
+        lines.append('    ' * (depth - 1) + 'ጨርስ')
+
+    def generate(self, size: int) -> str:
+        """Return a program of roughly `size` bytes wrapped in ጀምር/ጨርስ."""
+        lines = ['ጀምር']
+        defined: List[str] = []
+        written = 0
+        while written < size:
+            start = len(lines)
+            self.statement(lines, defined, 1, False)
+            written += sum(len(line.encode('utf-8')) + 1 for line in lines[start:])
+        lines.append('ጨርስ')
+        return '\n'.join(lines) + '\n'
+
+def generate_program(size: int, max_depth: int = 4, expression_density: float = 0.4,
+                     amharic_ratio: float = 0.7, seed: int = 0) -> str:
+    generator = ProgramGenerator(max_depth, expression_density, amharic_ratio, seed)
+    return generator.generate(size)
+
+def parse_size(text: str) -> int:
+    """Parse sizes like 512, 10K, 1M or 100MB into bytes."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('size', type=parse_size)
+    arg_parser.add_argument('--depth', type=int, default=4)
+    arg_parser.add_argument('--density', type=float, default=0.4)
+    arg_parser.add_argument('--amharic', type=float, default=0.7)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stdout.write(generate_program(args.size, args.depth, args.density, args.amharic, args.seed))
+
+if __name__ == '__main__':
+    main()
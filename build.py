@@ -0,0 +1,160 @@
+"""Compile the modules a Mesel program imports, with an on-disk cache.
+
+`አስገባ "ቅርጾች"` runs the statements of ቅርጾች.mesel, found relative to the
+importing file, at that point of the program. Every imported module is
+compiled once per build into its own Python module in the cache directory
+(__mesel_cache__ next to the generated program), which mesel_runtime loads
+at most once per run.
+
+The cache keeps a manifest of every module's source hash, imports and
+build key. A module's key covers its own source, the keys of everything it
+imports and the compiler itself, so editing one module rebuilds that
+module and the modules that import it, directly or not, and nothing else.
+An unchanged module isn't even re-parsed: its imports and the procedures
+it defines come from the manifest.
+
+    cache = BuildCache('__mesel_cache__')
+    modules = cache.compile_imports('main.mesel', ast)
+    code = CodeGenerator(modules).generate(ast)
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List
+from lexer import Lexer
+from parser import Parser, Program, Import, walk
+from code_generator import CodeGenerator, ModuleRef, Signature
+from mesel_constants import CACHE_DIR
+
+MANIFEST = 'manifest.json'
+SOURCE_EXTENSION = '.mesel'
+
+# Changing any of these can change the generated code, so they are part of every key
+COMPILER_FILES = ('lexer.py', 'parser.py', 'code_generator.py', 'ast_nodes.py', 'mesel_constants.py')
+
+def compiler_hash(files=COMPILER_FILES) -> str:
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in files:
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def imports_of(ast: Program) -> List[Import]:
+    return [node for node in walk(ast) if isinstance(node, Import)]
+
+def resolve(importer: str, path: str) -> str:
+    """Absolute path of the file `አስገባ "path"` refers to in importer."""
+    if not os.path.splitext(path)[1]:
+        path += SOURCE_EXTENSION
+    return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(importer)), path))
+
+def module_name(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha256(path.encode('utf-8')).hexdigest()[:10]
+    stem = re.sub(r'\W', '_', stem)
+    return f"mesel_{stem}_{digest}" if stem.isidentifier() else f"mesel_{digest}"
+
+class BuildCache:
+    def __init__(self, cache_dir: str, optimize: bool = False):
+        self.cache_dir = cache_dir
+        self.optimize = optimize
+        self.manifest_path = os.path.join(cache_dir, MANIFEST)
+        self.manifest: Dict[str, dict] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self.compiler = None
+        self.built: Dict[str, ModuleRef] = {}
+        self.keys: Dict[str, str] = {}
+        self.compiled: List[str] = []
+        self.cached: List[str] = []
+
+    @staticmethod
+    def for_output(output_file: str, optimize: bool = False) -> 'BuildCache':
+        """The cache a generated program loads its modules from."""
+        return BuildCache(os.path.join(os.path.dirname(os.path.abspath(output_file)), CACHE_DIR),
+                          optimize)
+
+    def compile_imports(self, source_file: str, ast: Program) -> Dict[str, ModuleRef]:
+        """Build everything ast imports and map each import path to its module."""
+        modules = {}
+        for node in imports_of(ast):
+            if node.path not in modules:
+                modules[node.path] = self.module(resolve(source_file, node.path),
+                                                 [os.path.abspath(source_file)], node)
+        self.save()
+        return modules
+
+    def module(self, path: str, importers: List[str], node: Import) -> ModuleRef:
+        if path in importers:
+            cycle = importers[importers.index(path):] + [path]
+            raise Exception(f"Error at line {node.line}, column {node.column}: import cycle "
+                            + " -> ".join(os.path.basename(p) for p in cycle))
+        ref = self.built.get(path)
+        if ref is not None:
+            return ref
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            raise Exception(f"Error at line {node.line}, column {node.column}: "
+                            f"cannot import '{node.path}', {path} not found") from None
+        source_hash = hashlib.sha256(data).hexdigest()
+        entry = self.manifest.get(path)
+        ast = None
+        if entry is not None and entry['source'] == source_hash:
+            imports = entry['imports']
+        else:
+            ast = Parser(Lexer(data.decode('utf-8')).tokenize()).parse()
+            first = {}
+            for child in imports_of(ast):
+                first.setdefault(child.path, [child.path, child.line, child.column])
+            imports = sorted(first.values())
+
+        # Build dependencies first; their keys go into this module's key
+        modules = {}
+        for imported, line, column in imports:
+            modules[imported] = self.module(resolve(path, imported), importers + [path],
+                                            Import(node.type, line, column, imported))
+        if self.compiler is None:
+            self.compiler = compiler_hash()
+        key = hashlib.sha256('\n'.join([self.compiler, source_hash, f"optimize={self.optimize}"] + [
+            f"{imported}={self.keys[resolve(path, imported)]}" for imported, _, _ in imports
+        ]).encode('utf-8')).hexdigest()
+
+        name = module_name(path)
+        output = os.path.join(self.cache_dir, name + '.py')
+        if entry is not None and entry['key'] == key and os.path.exists(output):
+            ref = ModuleRef(name, frozenset(entry['features']),
+                            {procedure: Signature(*signature, name)
+                             for procedure, signature in entry['procedures'].items()})
+            self.cached.append(path)
+        else:
+            if ast is None:
+                ast = Parser(Lexer(data.decode('utf-8')).tokenize()).parse()
+            generator = CodeGenerator(modules, self.optimize)
+            code = generator.generate(ast)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(code)
+            # Procedures defined in the module, for the files that import it
+            ref = ModuleRef(name, frozenset(generator.features),
+                            {procedure: signature._replace(module=name)
+                             for procedure, signature in generator.procedures.items()
+                             if signature.module is None})
+            self.compiled.append(path)
+        self.manifest[path] = {'source': source_hash, 'imports': imports, 'key': key,
+                               'module': name, 'features': sorted(ref.features),
+                               'procedures': {procedure: list(signature[:3])
+                                              for procedure, signature in ref.procedures.items()}}
+        self.keys[path] = key
+        self.built[path] = ref
+        return ref
+
+    def save(self):
+        if self.compiled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
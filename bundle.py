@@ -0,0 +1,178 @@
+"""Ship a tree of Mesel lessons as one precompiled zipapp.
+
+    python translator.py --bundle lessons/ lessons.pyz
+    python lessons.pyz                  # list the lessons
+    python lessons.pyz shapes/square    # run lessons/shapes/square.mesel
+
+Every .mesel file under the lesson directory is compiled once, ahead of
+time, and stored in the archive as a marshalled code object, so a lesson
+starts without lexing, parsing or generating code. A lesson and the
+modules it imports are each stored once, however many lessons use them.
+The archive also holds index.json, which maps each lesson to its compiled
+module and the modules it needs, and the runtime (mesel_runtime,
+mesel_constants, mesel_lists and this file, with .pyc files) so it runs
+with nothing but Python installed.
+
+Bundle reads the zip directory and the index when it is opened and
+decodes a module's code only when a lesson that needs it runs. Marshalled
+code only loads on the Python version that wrote it, so a bundle records
+that version and refuses to run on another one.
+"""
+import importlib.util
+import json
+import marshal
+import os
+import sys
+import types
+import zipfile
+from typing import Dict, List
+
+INDEX = 'index.json'
+FORMAT = 1
+CODE_DIR = 'code'
+SOURCE_EXTENSION = '.mesel'
+INTERPRETER = '/usr/bin/env python3'
+
+# Shipped in every bundle, so lessons can import them from the archive
+RUNTIME_FILES = ('mesel_runtime.py', 'mesel_constants.py', 'mesel_lists.py', 'bundle.py')
+
+MAIN = """import os
+import sys
+import bundle
+sys.exit(bundle.main(os.path.dirname(__file__), sys.argv[1:]))
+"""
+
+PYTHON = importlib.util.MAGIC_NUMBER.hex()
+
+class Bundle:
+    """A lesson archive written by build_bundle()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self.index = json.loads(self.archive.read(INDEX))
+        if self.index['format'] != FORMAT:
+            raise ValueError(f"{path} is bundle format {self.index['format']}, expected {FORMAT}")
+        if self.index['python'] != PYTHON:
+            raise RuntimeError(f"{path} was built for another Python version; "
+                               f"rebuild it with translator.py --bundle")
+        self.codes: Dict[str, types.CodeType] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.archive.close()
+
+    def lessons(self) -> List[str]:
+        return sorted(self.index['lessons'])
+
+    def code(self, module: str) -> types.CodeType:
+        code = self.codes.get(module)
+        if code is None:
+            code = self.codes[module] = marshal.loads(self.archive.read(f"{CODE_DIR}/{module}"))
+        return code
+
+    def load(self, lesson: str) -> types.CodeType:
+        """Import what lesson needs and return its code."""
+        entry = self.index['lessons'].get(lesson)
+        if entry is None:
+            raise KeyError(f"No lesson '{lesson}' in {self.path}")
+        for name in entry['requires']:
+            if name not in sys.modules:
+                module = types.ModuleType(name)
+                module.__file__ = os.path.join(self.path, name)
+                sys.modules[name] = module
+                exec(self.code(name), module.__dict__)
+        return self.code(entry['module'])
+
+    def run(self, lesson: str):
+        code = self.load(lesson)
+        namespace = {'__name__': '__main__',
+                     '__file__': os.path.join(self.path, lesson + SOURCE_EXTENSION)}
+        exec(code, namespace)
+
+def find_lessons(directory: str) -> Dict[str, str]:
+    """Lesson name ('shapes/square') -> path of every .mesel file under directory."""
+    from mesel_constants import CACHE_DIR
+    lessons = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != CACHE_DIR and not d.startswith('.'))
+        for name in files:
+            if name.endswith(SOURCE_EXTENSION):
+                path = os.path.abspath(os.path.join(root, name))
+                lesson = os.path.relpath(path, directory)[:-len(SOURCE_EXTENSION)]
+                lessons[lesson.replace(os.sep, '/')] = path
+    return lessons
+
+def build_bundle(directory: str, output_file: str, optimize: bool = False) -> dict:
+    """Compile every lesson under directory into the zipapp output_file and return its index."""
+    import tempfile
+    import py_compile
+    from ast_nodes import NodeType
+    from parser import Import
+    from build import BuildCache, module_name, resolve
+
+    lessons = find_lessons(directory)
+    if not lessons:
+        raise Exception(f"No {SOURCE_EXTENSION} files in {directory}")
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = BuildCache(tmp, optimize)
+        for lesson, path in sorted(lessons.items()):
+            cache.module(path, [], Import(NodeType.IMPORT, 1, 1, lesson))
+
+        def requires(path: str, seen: set, order: List[str]):
+            # Imported modules before the modules that import them
+            for imported, _, _ in cache.manifest[path]['imports']:
+                dependency = resolve(path, imported)
+                if dependency not in seen:
+                    seen.add(dependency)
+                    requires(dependency, seen, order)
+                    order.append(module_name(dependency))
+            return order
+
+        index = {'format': FORMAT, 'python': PYTHON, 'optimize': optimize,
+                 'lessons': {lesson: {'module': module_name(path), 'requires': requires(path, set(), [])}
+                             for lesson, path in lessons.items()}}
+
+        with open(output_file, 'wb') as f:
+            f.write(b'#!' + INTERPRETER.encode('utf-8') + b'\n')
+            with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('__main__.py', MAIN)
+                for name in RUNTIME_FILES:
+                    source = os.path.join(here, name)
+                    compiled = os.path.join(tmp, name + 'c')
+                    # Unchecked, since zip entries keep no usable source mtime
+                    py_compile.compile(source, compiled, name, doraise=True,
+                                       invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+                    archive.write(source, name)
+                    archive.write(compiled, name + 'c')
+                for path, ref in cache.built.items():
+                    with open(os.path.join(tmp, ref.name + '.py'), encoding='utf-8') as source:
+                        code = compile(source.read(), os.path.relpath(path, directory), 'exec')
+                    archive.writestr(f"{CODE_DIR}/{ref.name}", marshal.dumps(code))
+                archive.writestr(INDEX, json.dumps(index, ensure_ascii=False, indent=1, sort_keys=True))
+    os.chmod(output_file, 0o755)
+    return index
+
+def main(path: str, argv: List[str]) -> int:
+    """Command line of a bundle: list its lessons or run one."""
+    import argparse
+    arg_parser = argparse.ArgumentParser(prog=os.path.basename(path),
+                                         description='Run a lesson from this Mesel bundle.')
+    arg_parser.add_argument('lesson', nargs='?', help='lesson to run; lists the lessons if left out')
+    args = arg_parser.parse_args(argv)
+    with Bundle(path) as bundle:
+        if args.lesson is None:
+            print('\n'.join(bundle.lessons()))
+            return 0
+        try:
+            bundle.run(args.lesson)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}", file=sys.stderr)
+            return 1
+    return 0
@@ -0,0 +1,210 @@
+"""Run one Mesel program against many input vectors in a single process.
+
+    program = compile_program('sum.mesel')
+    for result in run_cases(program, [[1, 2], [3, 4], ['x', 5]], timeout=2):
+        print(result.output, result.error)
+
+The program is translated and compiled to a code object once. Each case
+then runs it in this interpreter with a fresh namespace, ጠይቅ answered from
+its inputs (mesel_runtime.ListInput), ያሳይ captured (CaptureOutput) and,
+for drawing programs, a RecordingTurtle, so a case costs about as much as
+running the program body. A case that runs past its timeout is stopped by
+raising CaseTimeout in it from a watchdog thread; like KeyboardInterrupt,
+that can't interrupt a single long call into C (a huge ** for example),
+which stops when the call returns. Modules a program imports are loaded
+once and shared by the cases.
+
+Usage: python cases.py program.mesel cases.json [--timeout 2] [-O]
+
+cases.json holds a list of cases, each a list of answers; one JSON line is
+printed per case.
+"""
+import ctypes
+import sys
+import threading
+import time
+from types import CodeType
+from typing import List, NamedTuple, Optional, Sequence
+import mesel_runtime
+from compiler import CompileOptions, compile_source
+from instrumentation import Metrics
+from mesel_runtime import CaptureOutput, ListInput, RecordingTurtle, Segment
+
+DEFAULT_TIMEOUT = 2.0  # seconds per case
+
+class CaseTimeout(Exception):
+    """Raised in a case that runs past its timeout."""
+
+class CompiledProgram(NamedTuple):
+    path: str          # the .py file load_module finds imported modules next to
+    code: CodeType
+    drawing: bool      # main takes a turtle
+
+class CaseResult(NamedTuple):
+    inputs: tuple
+    output: List[str]          # lines printed with ያሳይ
+    segments: List[Segment]    # what it drew, for drawing programs
+    error: Optional[str]       # None if the case ran to the end
+    seconds: float
+
+    @property
+    def timed_out(self) -> bool:
+        return self.error is not None and self.error.startswith(CaseTimeout.__name__)
+
+def compile_program(filename: str, optimize: bool = False, target: str = 'python') -> CompiledProgram:
+    """Translate a Mesel file, and the files it imports, once for run_cases().
+
+    target 'steps' compiles it for scheduler.py instead.
+    """
+    from translator import build_imports
+    with open(filename, encoding='utf-8') as f:
+        source = f.read()
+    path = filename.rsplit('.', 1)[0] + '.py'
+    metrics = Metrics()
+    imports = None
+    if target == 'python':
+        imports = lambda ast: build_imports(ast, filename, path, metrics, optimize)
+    result = compile_source(source, CompileOptions(target=target, optimize=optimize), imports, metrics)
+    if not result.ok:
+        raise Exception(result.diagnostics[0].message)
+    return CompiledProgram(path, compile(result.code, path, 'exec'), 'turtle' in result.generator.features)
+
+def raise_in(thread_id: int, exception: type):
+    # Never called with NULL to clear a pending exception: on 3.11 that leaves
+    # the interpreter's eval breaker set for good, and a later sys.settrace
+    # (the profiler, coverage) then never gets past its first line
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(exception))
+
+class Watchdog:
+    """Raises CaseTimeout in the thread that armed it once its deadline passes.
+
+    One thread serves every case of a run, so a case doesn't pay for
+    starting a timer.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.deadline = None
+        self.thread_id = None
+        self.fired = False  # CaseTimeout was raised in the armed case
+        self.closed = False
+        self.thread = threading.Thread(target=self.watch, name='mesel-cases-watchdog', daemon=True)
+        self.thread.start()
+
+    def arm(self, timeout: float):
+        with self.condition:
+            self.thread_id = threading.get_ident()
+            self.deadline = time.monotonic() + timeout
+            self.fired = False
+            self.condition.notify()
+
+    def disarm(self) -> bool:
+        """Stop watching the case, and return whether CaseTimeout was raised in it."""
+        with self.condition:
+            self.deadline = None
+            return self.fired
+
+    def absorb(self):
+        """Wait for a CaseTimeout that was raised but not delivered yet."""
+        try:
+            while True:
+                pass  # the interpreter delivers it at the loop's backward jump
+        except CaseTimeout:
+            pass
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+    def watch(self):
+        with self.condition:
+            while not self.closed:
+                if self.deadline is None:
+                    self.condition.wait()
+                    continue
+                remaining = self.deadline - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                else:
+                    raise_in(self.thread_id, CaseTimeout)
+                    self.fired = True
+                    self.deadline = None
+
+def run_case(program: CompiledProgram, inputs: Sequence, watchdog: Watchdog = None,
+             timeout: float = DEFAULT_TIMEOUT) -> CaseResult:
+    """Run program once with inputs as its answers to ጠይቅ."""
+    namespace = {'__name__': '__mesel__', '__file__': program.path}
+    output = CaptureOutput()
+    turtle = RecordingTurtle() if program.drawing else None
+    previous_output = mesel_runtime.set_output(output)
+    previous_input = mesel_runtime.set_input(ListInput(inputs))
+    error = None
+    timed_out = False
+    start = time.perf_counter()
+    try:
+        try:
+            if watchdog is not None:
+                watchdog.arm(timeout)
+            exec(program.code, namespace)
+            if program.drawing:
+                namespace['main'](turtle)
+            else:
+                namespace['main']()
+        except CaseTimeout:
+            timed_out = True
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        # A timeout that fired as the case ended may still be on its way
+        if watchdog is not None and watchdog.disarm() and not timed_out:
+            watchdog.absorb()
+            timed_out = True
+    except CaseTimeout:
+        timed_out = True  # arrived between the case and disarm()
+    finally:
+        seconds = time.perf_counter() - start
+        mesel_runtime.set_output(previous_output)
+        mesel_runtime.set_input(previous_input)
+    if timed_out:
+        error = f"{CaseTimeout.__name__}: ran longer than {timeout:g} s"
+    return CaseResult(tuple(inputs), output.lines, turtle.segments if turtle else [], error, seconds)
+
+def run_cases(program: CompiledProgram, cases: Sequence[Sequence],
+              timeout: Optional[float] = DEFAULT_TIMEOUT) -> List[CaseResult]:
+    """Run program once per case; timeout None lets every case run to the end."""
+    watchdog = Watchdog() if timeout is not None else None
+    try:
+        return [run_case(program, inputs, watchdog, timeout) for inputs in cases]
+    finally:
+        if watchdog is not None:
+            watchdog.close()
+
+def main() -> int:
+    import argparse
+    import json
+    from fingerprint import fingerprint
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('program', help='.mesel program')
+    arg_parser.add_argument('cases', help='JSON file with a list of input lists')
+    arg_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='seconds per case')
+    arg_parser.add_argument('-O', dest='optimize', action='store_true', help='memoize pure procedures')
+    args = arg_parser.parse_args()
+
+    with open(args.cases, encoding='utf-8') as f:
+        cases = json.load(f)
+    try:
+        program = compile_program(args.program, args.optimize)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    for result in run_cases(program, cases, args.timeout):
+        record = {'inputs': list(result.inputs), 'output': result.output, 'error': result.error,
+                  'seconds': round(result.seconds, 6)}
+        if program.drawing:
+            record['drawing'] = fingerprint(result.segments).digest
+        print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,134 @@
 from ast_nodes import *
-from typing import List, Dict, Any
+import keyword
+from types import MappingProxyType
+from typing import List, Dict, Any, Set, NamedTuple, Tuple
 from parser import *
+from mesel_constants import COLORS
+
+# Statements that need a turtle, and therefore a Tk screen, to run
+DRAWING_STATEMENTS = (TurtleCommand, ColorCommand, WidthCommand)
+
+# Separates a generated line from the Mesel position it came from until
+# generate_program moves the positions into the source map
+SOURCE_MARK = '\x00'
+
+class SourceLocation(NamedTuple):
+    line: int
+    column: int
+    kind: str  # NodeType value of the statement, e.g. 'FOR_LOOP'
+
+# Python keywords, and names the generated Python uses for itself: the
+# turtle every drawing function takes, the entry point, range for counted
+# loops and lru_cache under -O. A Mesel name that is one of these gets a
+# leading _, which Mesel names can't start with.
+RESERVED = frozenset({'t', 'main', 'range', 'lru_cache', *keyword.kwlist})
+
+# Entries kept by lru_cache for each memoized procedure under -O
+MEMO_CACHE_SIZE = 4096
+
+# The tables below are read-only, so code generators in different threads
+# can share them.
+
+# List builtins: Mesel name -> (mesel_lists function, accepted argument counts).
+# A procedure with the same name takes precedence.
+BUILTINS = MappingProxyType({
+    'ብዛት': ('length', (1,)),
+    'ድምር': ('total', (1,)),
+    'ትንሹ': ('smallest', (1,)),
+    'ትልቁ': ('largest', (1,)),
+    'ክልል': ('span', (1, 2)),
+})
+
+# How tightly Mesel binary operators bind, loosest first. Generated code
+# parenthesizes operands wherever the target language would group them
+# differently.
+PRECEDENCE = MappingProxyType({
+    TokenType.EQUALS: 1, TokenType.NOT_EQUALS: 1,
+    TokenType.GREATER: 2, TokenType.LESS: 2, TokenType.GREATER_EQUALS: 2, TokenType.LESS_EQUALS: 2,
+    TokenType.PLUS: 3, TokenType.MINUS: 3,
+    TokenType.TIMES: 4, TokenType.DIVIDE_OP: 4, TokenType.MODULO_OP: 4,
+    TokenType.POWER_OP: 5,
+})
+
+# Mesel operators and the Python operators they compile to
+OPERATORS = MappingProxyType({
+    TokenType.PLUS: "+",
+    TokenType.MINUS: "-",
+    TokenType.TIMES: "*",
+    TokenType.DIVIDE_OP: "/",
+    TokenType.MODULO_OP: "%",
+    TokenType.POWER_OP: "**",
+    TokenType.EQUALS: "==",
+    TokenType.NOT_EQUALS: "!=",
+    TokenType.GREATER: ">",
+    TokenType.LESS: "<",
+    TokenType.GREATER_EQUALS: ">=",
+    TokenType.LESS_EQUALS: "<=",
+})
+
+# Code generation targets: name -> (module, class). A target subclasses
+# CodeGenerator and overrides generate_program and the generate_* methods,
+# sharing the analysis, procedure signatures and source maps.
+TARGETS = MappingProxyType({
+    'python': ('code_generator', 'CodeGenerator'),
+    'js': ('js_generator', 'JavaScriptGenerator'),
+    'steps': ('steps_generator', 'SteppingGenerator'),
+})
+
+def private_import(module: str, names) -> str:
+    """Import names from a runtime module with a leading _, so Mesel names can't hide them."""
+    return f"from {module} import {', '.join(f'{name} as _{name}' for name in names)}"
+
+def generator_class(target: str) -> type:
+    """The code generator class for a target in TARGETS."""
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target '{target}', expected one of {', '.join(TARGETS)}")
+    module, name = TARGETS[target]
+    return getattr(__import__(module), name)
+
+class Signature(NamedTuple):
+    arity: int
+    draws: bool              # takes the turtle as its first argument
+    pure: bool               # no output, input, drawing or imports, so calls can be memoized
+    module: str = None       # compiled module it comes from, None for this program
+
+class ModuleRef(NamedTuple):
+    name: str                # Python module name of the compiled module
+    features: frozenset      # what running it needs, as CodeGenerator.analyze reports
+    procedures: Dict[str, Signature] = {}
 
 class CodeGenerator:
-    def __init__(self):
+    """Generates Python that runs with mesel_runtime (the 'python' target)."""
+    target = 'python'
+    extension = '.py'
+
+    def __init__(self, modules: Dict[str, ModuleRef] = None, optimize: bool = False):
+        # Import path as written -> compiled module, filled in by build.py
+        self.modules = modules or {}
+        # -O: memoize pure procedures
+        self.optimize = optimize
+        self.procedures: Dict[str, Signature] = {}
+        self.top_level_procedures: Set[int] = set()
+        self.list_names: Set[str] = set()  # what the program needs from mesel_lists
+        self.import_nodes: List[Import] = []
+        self.current_procedure = None
         self.indent_level = 0
         self.code = []
         self.imports = set(['turtle', 'math'])
         self.variables = set()
+        self.features = set()
+        # Generated line number -> Mesel statement that produced it
+        self.source_map: Dict[int, SourceLocation] = {}
+        self.loop_spans: Dict[int, int] = {}
     
     def generate(self, node: Node) -> str:
+        code = self.generate_node(node)
+        if code and isinstance(node, Statement):
+            first, newline, rest = code.partition('\n')
+            code = f"{first}{SOURCE_MARK}{node.line}:{node.column}:{node.type.value}{newline}{rest}"
+        return code
+    
+    def generate_node(self, node: Node) -> str:
         if isinstance(node, Program):
             return self.generate_program(node)
         elif isinstance(node, Block):
@@ -46,51 +165,211 @@ class CodeGenerator:
             return self.generate_color_command(node)
         elif isinstance(node, WidthCommand):
             return self.generate_width_command(node)
+        elif isinstance(node, Import):
+            return self.generate_import(node)
+        elif isinstance(node, Procedure):
+            return self.generate_procedure(node)
+        elif isinstance(node, Return):
+            return self.generate_return(node)
+        elif isinstance(node, Call):
+            return self.generate_call(node)
+        elif isinstance(node, CallStatement):
+            return self.generate_call(node.call)
+        elif isinstance(node, ListLiteral):
+            return self.generate_list(node)
+        elif isinstance(node, Index):
+            return self.generate_index(node)
+        elif isinstance(node, Input):
+            return self.generate_input(node)
         else:
             raise Exception(f"Unknown node type: {type(node)}")
     
+    def analyze(self, node: Program) -> Set[str]:
+        """Return the names of the runtime features the program uses.
+        
+        This is the one walk over the program: it also fills in procedures,
+        list_names and import_nodes for generate_program.
+        """
+        self.list_names = set()
+        features = set()
+        calls, imports = [], []
+        bodies = []  # (procedure, the nodes in it procedure_signatures looks at)
+        for statement in node.statements:
+            body = [] if isinstance(statement, Procedure) else None
+            if body is not None:
+                bodies.append((statement, body))
+            for child in walk(statement):
+                if isinstance(child, DRAWING_STATEMENTS):
+                    features.add('turtle')
+                elif isinstance(child, Call):
+                    calls.append(child)
+                elif isinstance(child, ListLiteral):
+                    self.list_names.add('vector')
+                    continue
+                elif isinstance(child, Print):
+                    features.add('print')
+                elif isinstance(child, Input):
+                    features.add('input')
+                elif isinstance(child, Import):
+                    imports.append(child)
+                else:
+                    continue
+                if body is not None:
+                    body.append(child)
+        self.import_nodes = imports
+        for child in imports:
+            # A program draws or prints if anything it imports does
+            features.add('import')
+            features |= self.module_ref(child).features - {'import'}
+        self.procedures = self.procedure_signatures(bodies, imports)
+        for child in calls:
+            if self.signature(child).draws:
+                features.add('turtle')
+            if child.name not in self.procedures:
+                self.list_names.add(BUILTINS[child.name][0])
+        return features
+    
+    def procedure_signatures(self, bodies: List[Tuple[Procedure, List[Node]]],
+                             imports: List[Import]) -> Dict[str, Signature]:
+        """Signatures of the procedures defined (with the statements, calls
+        and imports in each body) or imported.
+        
+        A procedure draws if it has a turtle statement or calls a procedure
+        that draws, and is pure if it neither draws, prints, reads input nor imports and
+        only calls pure procedures; both are found by iterating to a fixpoint.
+        """
+        signatures = {}
+        for child in imports:
+            signatures.update(self.module_ref(child).procedures)
+        for definition, _ in bodies:
+            signatures[definition.name] = Signature(len(definition.parameters), False, True)
+        changed = True
+        while changed:
+            changed = False
+            for definition, body in bodies:
+                draws, pure = False, True
+                for child in body:
+                    if isinstance(child, DRAWING_STATEMENTS):
+                        draws, pure = True, False
+                    elif isinstance(child, (Print, Input, Import)):
+                        pure = False
+                        if isinstance(child, Import) and 'turtle' in self.module_ref(child).features:
+                            draws = True
+                    elif isinstance(child, Call) and child.name in signatures:
+                        callee = signatures[child.name]
+                        draws = draws or callee.draws
+                        pure = pure and callee.pure
+                signature = Signature(len(definition.parameters), draws, pure)
+                if signatures[definition.name] != signature:
+                    signatures[definition.name] = signature
+                    changed = True
+        return signatures
+    
+    def signature(self, node: Call) -> Signature:
+        signature = self.procedures.get(node.name)
+        if signature is None and node.name in BUILTINS:
+            arities = BUILTINS[node.name][1]
+            if len(node.arguments) not in arities:
+                raise Exception(f"Error at line {node.line}, column {node.column}: '{node.name}' "
+                                f"takes {' or '.join(map(str, arities))} arguments, got {len(node.arguments)}")
+            return Signature(len(node.arguments), False, True)
+        if signature is None:
+            raise Exception(f"Error at line {node.line}, column {node.column}: "
+                            f"unknown procedure '{node.name}'")
+        if len(node.arguments) != signature.arity:
+            raise Exception(f"Error at line {node.line}, column {node.column}: '{node.name}' "
+                            f"takes {signature.arity} arguments, got {len(node.arguments)}")
+        return signature
+    
+    def module_ref(self, node: Import) -> ModuleRef:
+        ref = self.modules.get(node.path)
+        if ref is None:
+            raise Exception(f"Error at line {node.line}, column {node.column}: "
+                            f"'{node.path}' has not been built; programs with imports "
+                            f"are compiled through build.py")
+        return ref
+    
     def generate_program(self, node: Program) -> str:
-        code = [
-            "import turtle",
-            "def main():",
-            "    screen = turtle.Screen()",
-            "    screen.setup(800, 600)",  # Set window size
-            "    screen.title('Mesel Turtle Graphics')",
-            "    screen.bgcolor('white')",  # Set white background
-            "    screen.tracer(0)",  # Turn off animation for faster drawing
-            "    t = turtle.Turtle()",
-            "    t.speed(0)",  # Fastest speed
-            "    t.pensize(2)",  # Thicker lines
-            "    t.color('blue')",  # Blue color for the flower
-            "    t.penup()",  # Lift pen to move to starting position
-            "    t.goto(0, 0)",  # Center of screen
-            "    t.pendown()",  # Put pen down to start drawing
-            "    try:"
-        ]
-        # Generate statements with proper indentation inside try block
+        self.features = self.analyze(node)
+        drawing = 'turtle' in self.features
+        printing = 'print' in self.features
+        asking = 'input' in self.features
+        importing = 'import' in self.features
+        # Screen setup, teardown, the output channel and module loading live
+        # in mesel_runtime. It only imports Tk for drawing programs, and
+        # programs that need none of it don't import it at all.
+        procedures = [statement for statement in node.statements if isinstance(statement, Procedure)]
+        self.top_level_procedures = {id(procedure) for procedure in procedures}
+        code = []
+        if self.optimize and any(self.procedures[p.name].pure for p in procedures):
+            code.extend(["from functools import lru_cache", ""])
+        if self.list_names:
+            code.append(private_import('mesel_lists', sorted(self.list_names)))
+            if not (drawing or printing or asking or importing):
+                code.append("")
+        if drawing or printing or asking or importing:
+            names = ['run'] + ['show'] * printing + ['ask'] * asking + ['load_module'] * importing
+            code.append(private_import('mesel_runtime', names))
+            for name in sorted({self.module_ref(child).name for child in self.import_nodes}):
+                code.append(f"{name} = _load_module(__file__, '{name}')")
+            code.append("")
+        # Procedures become module-level functions, so they can call each other
+        # and other files can use them after importing this one
+        for procedure in procedures:
+            code.extend(self.generate(procedure).split('\n'))
+            code.append("")
+        code.append("def main(t):" if drawing else "def main():")
         for statement in node.statements:
+            if isinstance(statement, Procedure):
+                continue
             stmt_code = self.generate(statement)
             if stmt_code:
-                # Split into lines and indent each line with 8 spaces (2 levels)
-                lines = stmt_code.split('\n')
-                indented_lines = ['        ' + line for line in lines]  # 8 spaces for try block
-                code.extend(indented_lines)
-        
+                code.extend('    ' + line for line in stmt_code.split('\n'))
+        if not code[-1].startswith('    '):
+            code.append("    pass")
         code.extend([
-            "        screen.update()",  # Update the screen after drawing
-            "        screen.exitonclick()",  # Close window when clicked
-            "    except turtle.Terminator:",
-            "        pass",  # Handle window close gracefully
-            "    finally:",
-            "        try:",
-            "            screen.mainloop()",  # Keep window open until user closes it
-            "        except:",
-            "            pass",  # Ignore any cleanup errors",
             "",
             "if __name__ == '__main__':",
-            "    main()"
+            "    _run(main)" if drawing else
+            "    _run(main, drawing=False)" if printing or asking or importing else "    main()"
         ])
-        return "\n".join(code)
+        return self.extract_source_map("\n".join(code))
+    
+    def extract_source_map(self, code: str) -> str:
+        """Strip the position marks from code and record them in source_map.
+        
+        Loops also get an entry in loop_spans, from their header line to the
+        last generated line of their body.
+        """
+        self.source_map = {}
+        self.loop_spans = {}
+        lines = code.split('\n')
+        for number, line in enumerate(lines, 1):
+            if SOURCE_MARK in line:
+                lines[number - 1], _, mark = line.partition(SOURCE_MARK)
+                mesel_line, mesel_column, kind = mark.split(':')
+                self.source_map[number] = SourceLocation(int(mesel_line), int(mesel_column), kind)
+        for number, location in self.source_map.items():
+            if location.kind in ('FOR_LOOP', 'WHILE_LOOP'):
+                header = lines[number - 1]
+                indent = len(header) - len(header.lstrip())
+                end = number
+                while end < len(lines) and (not lines[end].strip() or
+                                            len(lines[end]) - len(lines[end].lstrip()) > indent):
+                    end += 1
+                while not lines[end - 1].strip():
+                    end -= 1
+                self.loop_spans[number] = end
+        return "\n".join(lines)
+    
+    def source_map_data(self, source_file: str) -> dict:
+        """Return the source map in the JSON shape translator.py writes."""
+        return {
+            'version': 1,
+            'source': source_file,
+            'lines': {str(number): list(location) for number, location in self.source_map.items()},
+            'loops': {str(header): end for header, end in self.loop_spans.items()},
+        }
     
     def generate_block(self, node: Block) -> str:
         code = []
@@ -102,40 +381,46 @@ class CodeGenerator:
     
     def generate_variable_declaration(self, node: VariableDeclaration) -> str:
         value = self.generate_expression(node.value)
-        return f"{node.name} = {value}"
+        return f"{self.name(node.name)} = {value}"
     
     def generate_assignment(self, node: Assignment) -> str:
         value = self.generate_expression(node.value)
-        return f"{node.name} = {value}"
+        return f"{self.name(node.name)} = {value}"
     
     def generate_binary_operation(self, node: BinaryOperation) -> str:
         left = self.generate_expression(node.left)
         right = self.generate_expression(node.right)
         
-        # Map Mesel operators to Python operators
-        operator_map = {
-            TokenType.PLUS: "+",
-            TokenType.MINUS: "-",
-            TokenType.TIMES: "*",
-            TokenType.DIVIDE_OP: "/",
-            TokenType.MODULO_OP: "%",
-            TokenType.POWER_OP: "**",
-            TokenType.EQUALS: "==",
-            TokenType.NOT_EQUALS: "!=",
-            TokenType.GREATER: ">",
-            TokenType.LESS: "<",
-            TokenType.GREATER_EQUALS: ">=",
-            TokenType.LESS_EQUALS: "<="
-        }
-        
-        operator = operator_map.get(node.operator, node.operator)
-        return f"{left} {operator} {right}"
+        operator = OPERATORS.get(node.operator, node.operator)
+        return f"{self.operand(node, node.left, left)} {operator} {self.operand(node, node.right, right)}"
+    
+    def operand(self, node: BinaryOperation, child: Expression, code: str) -> str:
+        """code for child, parenthesized if it wouldn't group as it does in Mesel."""
+        if isinstance(child, BinaryOperation):
+            precedence, inner = PRECEDENCE[node.operator], PRECEDENCE[child.operator]
+            comparisons = PRECEDENCE[TokenType.GREATER]
+            # Mesel groups every operator to the left and compares the result
+            # of a comparison, while ** groups to the right and comparisons chain
+            if (inner < precedence or inner <= comparisons and precedence <= comparisons
+                    or inner == precedence and (child is node.right or node.operator == TokenType.POWER_OP)):
+                return f"({code})"
+        elif isinstance(child, UnaryOperation):
+            # `a == not b` doesn't parse, and -a ** b is -(a ** b)
+            if child.operator != TokenType.MINUS or node.operator == TokenType.POWER_OP:
+                return f"({code})"
+        return code
     
     def generate_unary_operation(self, node: UnaryOperation) -> str:
         expr = self.generate_expression(node.operand)
+        if isinstance(node.operand, (BinaryOperation, UnaryOperation)):
+            expr = f"({expr})"
         operator = "-" if node.operator == TokenType.MINUS else "not "
         return f"{operator}{expr}"
     
+    def name(self, name: str) -> str:
+        """The Python name for a Mesel variable or procedure."""
+        return '_' + name if name in RESERVED else name
+    
     def generate_number(self, node: Number) -> str:
         return str(node.value)
     
@@ -143,10 +428,10 @@ class CodeGenerator:
         return f'"{node.value}"'
     
     def generate_identifier(self, node: Identifier) -> str:
-        return node.name
+        return self.name(node.name)
     
     def generate_print(self, node: Print) -> str:
-        return f"print({self.generate(node.expression)})"
+        return f"_show({self.generate(node.expression)})"
     
     def generate_for_loop(self, node: ForLoop) -> str:
         code = []
@@ -159,44 +444,33 @@ class CodeGenerator:
             # Variable-based loop
             start = int(float(self.generate(node.start)))
             end = int(float(self.generate(node.end)))
-            code.append(f"for {node.variable} in range({start}, {end}):")
-        
-        # Generate body with proper indentation
-        body_code = self.generate(node.body)
-        if body_code:
-            # Split body code into lines and indent each line
-            body_lines = body_code.split('\n')
-            indented_body = '\n'.join("    " + line for line in body_lines)
-            code.append(indented_body)
+            code.append(f"for {self.name(node.variable)} in range({start}, {end}):")
         
+        code.append(self.generate_body(node.body))
         return "\n".join(code)
     
     def generate_while_loop(self, node: WhileLoop) -> str:
         code = []
         code.append(f"while {self.generate(node.condition)}:")
-        self.indent_level += 1
-        for stmt in node.body:
-            code.append(self.indent(self.generate(stmt)))
-        self.indent_level -= 1
+        code.append(self.generate_body(node.body))
         return "\n".join(code)
     
     def generate_if_statement(self, node: IfStatement) -> str:
         code = []
         code.append(f"if {self.generate(node.condition)}:")
-        self.indent_level += 1
-        for stmt in node.then_branch:
-            code.append(self.indent(self.generate(stmt)))
-        self.indent_level -= 1
+        code.append(self.generate_body(node.body))
         
-        if node.else_branch:
+        if node.else_body:
             code.append("else:")
-            self.indent_level += 1
-            for stmt in node.else_branch:
-                code.append(self.indent(self.generate(stmt)))
-            self.indent_level -= 1
+            code.append(self.generate_body(node.else_body))
         
         return "\n".join(code)
     
+    def generate_body(self, node: Block) -> str:
+        # Indent a loop or branch body one level, with `pass` for empty bodies
+        body_code = self.generate(node) or "pass"
+        return '\n'.join("    " + line for line in body_code.split('\n'))
+    
     def generate_break(self, node: Break) -> str:
         return "break"
     
@@ -216,19 +490,63 @@ class CodeGenerator:
             raise Exception(f"Unknown turtle command: {node.command}")
     
     def generate_color_command(self, node: ColorCommand) -> str:
-        color_map = {
-            TokenType.RED: "red",
-            TokenType.GREEN: "green",
-            TokenType.BLUE: "blue",
-            TokenType.YELLOW: "yellow",
-            TokenType.BLACK: "black",
-            TokenType.WHITE: "white"
-        }
-        return f"t.color('{color_map[node.color]}')"
+        return f"t.color('{COLORS[node.color.value]}')"
     
     def generate_width_command(self, node: WidthCommand) -> str:
         return f"t.width({self.generate(node.width)})"
     
+    def generate_procedure(self, node: Procedure) -> str:
+        if id(node) not in self.top_level_procedures:
+            raise Exception(f"Error at line {node.line}, column {node.column}: "
+                            f"procedures must be defined at the top level of a file")
+        signature = self.procedures[node.name]
+        parameters = ['t'] * signature.draws + [self.name(parameter) for parameter in node.parameters]
+        code = []
+        if self.optimize and signature.pure:
+            code.append(f"@lru_cache(maxsize={MEMO_CACHE_SIZE})")
+        code.append(f"def {self.name(node.name)}({', '.join(parameters)}):")
+        self.current_procedure = node
+        try:
+            code.append(self.generate_body(node.body))
+        finally:
+            self.current_procedure = None
+        return "\n".join(code)
+    
+    def generate_return(self, node: Return) -> str:
+        if self.current_procedure is None:
+            raise Exception(f"Error at line {node.line}, column {node.column}: "
+                            f"'መልስ' outside a procedure")
+        if node.value is None:
+            return "return"
+        return f"return {self.generate(node.value)}"
+    
+    def generate_call(self, node: Call) -> str:
+        signature = self.signature(node)
+        if node.name not in self.procedures:
+            function = BUILTINS[node.name][0]
+            return f"_{function}({', '.join(self.generate(argument) for argument in node.arguments)})"
+
+        arguments = ['t'] * signature.draws + [self.generate(argument) for argument in node.arguments]
+        name = f"{signature.module}.{self.name(node.name)}" if signature.module else self.name(node.name)
+        return f"{name}({', '.join(arguments)})"
+    
+    def generate_list(self, node: ListLiteral) -> str:
+        return f"_vector([{', '.join(self.generate(element) for element in node.elements)}])"
+    
+    def generate_index(self, node: Index) -> str:
+        target = self.generate(node.target)
+        if not isinstance(node.target, (Identifier, Call, Index, ListLiteral)):
+            target = f"({target})"
+        return f"{target}[{self.generate(node.index)}]"
+    
+    def generate_input(self, node: Input) -> str:
+        return f'_ask("{node.prompt}")' if node.prompt is not None else "_ask()"
+    
+    def generate_import(self, node: Import) -> str:
+        # Run the imported module's statements here, with this program's turtle
+        ref = self.module_ref(node)
+        return f"{ref.name}.main(t)" if 'turtle' in ref.features else f"{ref.name}.main()"
+    
     def generate_expression(self, node: Expression) -> str:
         if isinstance(node, BinaryOperation):
             return self.generate_binary_operation(node)
@@ -240,6 +558,14 @@ class CodeGenerator:
             return self.generate_number(node)
         elif isinstance(node, String):
             return self.generate_string(node)
+        elif isinstance(node, Call):
+            return self.generate_call(node)
+        elif isinstance(node, ListLiteral):
+            return self.generate_list(node)
+        elif isinstance(node, Index):
+            return self.generate_index(node)
+        elif isinstance(node, Input):
+            return self.generate_input(node)
         else:
             raise ValueError(f"Unknown expression type: {type(node)}")
     
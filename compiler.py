@@ -0,0 +1,118 @@
+"""One call from Mesel source to generated code, safe to share between threads.
+
+    result = compile_source(text, CompileOptions(target='js'))
+    if result.ok:
+        write(result.code)
+    else:
+        for diagnostic in result.diagnostics:
+            print(diagnostic)
+
+Every call makes its own Lexer, Parser and code generator, and the tables
+they share (lexer.KEYWORDS, code_generator.BUILTINS, OPERATORS, ...) are
+read-only, so calls can run at the same time from a thread pool: in
+parallel on a free-threaded (3.13t) build, interleaved under the GIL.
+Errors come back as diagnostics rather than being raised, and the result
+also carries the tokens, the AST and the time each phase took.
+"""
+import re
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+from code_generator import CodeGenerator, ModuleRef, generator_class
+from instrumentation import Metrics
+from lexer import Lexer, Token, tokenize_parallel
+from parser import Parser, Program, walk
+
+PARSERS = ('hand', 'lark')
+
+class CompileOptions(NamedTuple):
+    parser: str = 'hand'     # 'hand' or 'lark'
+    target: str = 'python'   # a code_generator.TARGETS name
+    optimize: bool = False   # -O: memoize pure procedures
+    lex_workers: int = 1     # > 1 lexes large sources in that many processes
+
+class Diagnostic(NamedTuple):
+    phase: str               # 'lex', 'parse', 'imports' or 'codegen'
+    line: Optional[int]
+    column: Optional[int]
+    message: str
+
+    def __str__(self) -> str:
+        return self.message
+
+class CompileResult(NamedTuple):
+    tokens: Optional[Tuple[Token, ...]]   # None with the Lark parser, which lexes as it parses
+    ast: Optional[Program]
+    code: Optional[str]
+    diagnostics: Tuple[Diagnostic, ...]
+    timings: Mapping[str, float]          # phase -> wall-clock seconds
+    generator: Optional[CodeGenerator]    # source map, features and procedures of the program
+
+    @property
+    def ok(self) -> bool:
+        return not self.diagnostics
+
+POSITION = re.compile(r'line (\d+), column (\d+)')
+
+def diagnostic(phase: str, error: Exception) -> Diagnostic:
+    # Compiler errors carry their position in the message ("Error at line
+    # 3, column 5: ...", "Invalid character $ at line 3, column 5")
+    message = str(error)
+    match = POSITION.search(message)
+    line, column = (int(match.group(1)), int(match.group(2))) if match else (None, None)
+    return Diagnostic(phase, line, column, message)
+
+def tokenize(text: str, metrics: Metrics, lex_workers: int = 1) -> Tuple[Token, ...]:
+    with metrics.phase('lex'):
+        if lex_workers > 1:
+            tokens = tuple(tokenize_parallel(text, lex_workers))
+        else:
+            tokens = tuple(Lexer(text).tokenize())
+    metrics.count('tokens', len(tokens))
+    return tokens
+
+def parse(text: str, tokens: Optional[Tuple[Token, ...]], metrics: Metrics, parser: str = 'hand') -> Program:
+    """Parse tokens with the hand-written parser, or text with the Lark grammar."""
+    with metrics.phase('parse'):
+        if parser == 'lark':
+            from lark_frontend import parse_source as lark_parse
+            ast = lark_parse(text)
+        else:
+            ast = Parser(tokens).parse()
+    metrics.count('nodes', sum(1 for _ in walk(ast)))
+    return ast
+
+def compile_source(text: str, options: CompileOptions = CompileOptions(),
+                   imports: Callable[[Program], Dict[str, ModuleRef]] = None,
+                   metrics: Metrics = None) -> CompileResult:
+    """Lex, parse and generate code for text, stopping at the first error.
+
+    imports, if given, is called with the AST before code generation and
+    returns the compiled modules the program imports (see
+    translator.build_imports); without it, programs with imports fail to
+    compile. Phases are timed in metrics, a new Metrics if not given.
+    """
+    if options.parser not in PARSERS:
+        raise ValueError(f"Unknown parser '{options.parser}', expected one of {', '.join(PARSERS)}")
+    if metrics is None:
+        metrics = Metrics()
+    tokens = ast = code = generator = None
+    phase = 'lex'
+    try:
+        if options.parser == 'hand':
+            tokens = tokenize(text, metrics, options.lex_workers)
+        phase = 'parse'
+        ast = parse(text, tokens, metrics, options.parser)
+        modules = {}
+        if imports is not None:
+            phase = 'imports'
+            modules = imports(ast)
+        phase = 'codegen'
+        with metrics.phase('codegen'):
+            generator = generator_class(options.target)(modules, options.optimize)
+            code = generator.generate(ast)
+        metrics.count('output_bytes', len(code.encode('utf-8')))
+        diagnostics = ()
+    except Exception as e:
+        diagnostics = (diagnostic(phase, e),)
+    timings = MappingProxyType({name: stats.wall for name, stats in metrics.phases.items()})
+    return CompileResult(tokens, ast, code, diagnostics, timings, generator)
@@ -0,0 +1,453 @@
+"""Bound what a Mesel program will do before running it.
+
+    cost = estimate_file('student.mesel')
+    print(cost.segments, cost.steps, cost.seconds)   # 12960 38953 0.0111478
+    backend = triage(cost)                           # 'tk', 'headless', 'record' or 'reject'
+
+estimate() interprets the AST abstractly: every number a program
+computes is an Interval that contains it, and the Cost of each statement
+is an Interval per counter (loop iterations, statements, segments drawn,
+ያሳይ calls and scheduler.py steps), so nested loops multiply and the two
+branches of a ከሆነ join. A counted loop runs its constant range. A ድገም
+loop is bounded when its condition compares a variable that the loop
+changes once per iteration by a constant (`ድገም i < n` with `አስቀምጥ i = i + 1`)
+against something the loop doesn't change; any other ድገም loop, recursion,
+an answer to ጠይቅ that decides how much runs, or an import makes the
+upper bound unbounded (math.inf) rather than a guess. Lower bounds assume
+the program runs to the end without an error.
+
+The approximate running time counts statements and segments at rates
+measured on the record backend; the other counters are exact bounds.
+"""
+import math
+import sys
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from code_generator import BUILTINS
+from lexer import Lexer, TokenType
+from parser import *
+
+# Seconds per statement and per segment drawn on the record backend, for
+# the approximate running time
+STATEMENT_SECONDS = 3e-8
+SEGMENT_SECONDS = 8e-7
+
+# More segments than Tk draws in reasonable time: run on the record
+# backend and render with raster.py instead
+HEAVY_SEGMENTS = 100_000
+DEFAULT_MAX_SECONDS = 10.0
+
+class Interval(NamedTuple):
+    lo: float
+    hi: float   # math.inf if unbounded
+
+    @property
+    def bounded(self) -> bool:
+        return self.hi < math.inf
+
+    def __str__(self) -> str:
+        if not self.bounded:
+            return f"unbounded (at least {self.lo:g})"
+        return f"{self.lo:g}" if self.lo == self.hi else f"{self.lo:g}..{self.hi:g}"
+
+TOP = Interval(-math.inf, math.inf)   # any number, or not a number
+NONE = Interval(0.0, 0.0)
+ONE = Interval(1.0, 1.0)
+TRUTH = Interval(0.0, 1.0)            # a comparison that may go either way
+UNBOUNDED = Interval(0.0, math.inf)
+
+def product(x: float, y: float) -> float:
+    return 0.0 if x == 0 or y == 0 else x * y  # no work times unbounded is no work
+
+def plus(a: Interval, b: Interval) -> Interval:
+    return Interval(a.lo + b.lo, a.hi + b.hi)
+
+def times(a: Interval, b: Interval) -> Interval:
+    products = [product(x, y) for x in a for y in b]
+    return Interval(min(products), max(products))
+
+def join(a: Interval, b: Interval) -> Interval:
+    return Interval(min(a.lo, b.lo), max(a.hi, b.hi))
+
+def truth(value: Interval) -> Interval:
+    """1 if value is certainly true, 0 if certainly false, TRUTH if it may be either."""
+    if value.lo > 0 or value.hi < 0:
+        return ONE
+    return NONE if value == NONE else TRUTH
+
+class Cost(NamedTuple):
+    iterations: Interval = NONE   # loop bodies run
+    statements: Interval = NONE
+    segments: Interval = NONE     # lines drawn
+    prints: Interval = NONE       # ያሳይ calls
+    steps: Interval = NONE        # scheduler.py turns: loop iterations, turtle commands, calls and main
+
+    def __add__(self, other: 'Cost') -> 'Cost':
+        return Cost(*(plus(a, b) for a, b in zip(self, other)))
+
+    def scaled(self, count: Interval) -> 'Cost':
+        return Cost(*(times(a, count) for a in self))
+
+    def join(self, other: 'Cost') -> 'Cost':
+        return Cost(*(join(a, b) for a, b in zip(self, other)))
+
+    def at_most(self) -> 'Cost':
+        """This cost, if it may also not be paid at all."""
+        return Cost(*(Interval(0.0, a.hi) for a in self))
+
+    @property
+    def seconds(self) -> Interval:
+        return plus(times(self.statements, Interval(STATEMENT_SECONDS, STATEMENT_SECONDS)),
+                    times(self.segments, Interval(SEGMENT_SECONDS, SEGMENT_SECONDS)))
+
+    @property
+    def bounded(self) -> bool:
+        return all(a.bounded for a in self)
+
+FREE = Cost()
+STATEMENT = Cost(statements=ONE)
+STEP = Cost(steps=ONE)
+ANYTHING = Cost(*[UNBOUNDED] * len(Cost._fields))
+
+class State:
+    """What is known at a point in the program: variable values and whether the pen is down."""
+
+    def __init__(self, variables: Dict[str, Interval], pen: Optional[bool] = True):
+        self.variables = variables
+        self.pen = pen  # None if it may be either
+
+    def copy(self) -> 'State':
+        return State(dict(self.variables), self.pen)
+
+    def merge(self, other: 'State'):
+        """Keep what holds in this state or in other."""
+        self.variables = {name: join(value, other.variables[name]) for name, value in self.variables.items()
+                          if name in other.variables}
+        if self.pen != other.pen:
+            self.pen = None
+
+def assigned(node: Node) -> Set[str]:
+    """Variables node may assign."""
+    names = set()
+    for child in walk(node):
+        if isinstance(child, (VariableDeclaration, Assignment)):
+            names.add(child.name)
+        elif isinstance(child, ForLoop) and child.variable is not None:
+            names.add(child.variable)
+    return names
+
+def exits(node: Node, kinds: tuple = (Break, Continue)) -> bool:
+    """Whether node may leave the block it is in early: a መልስ, or one of
+    kinds that isn't inside a loop of its own."""
+    children = list(walk(node))
+    inside = {id(child) for loop in children if isinstance(loop, (ForLoop, WhileLoop))
+              for child in walk(loop.body)}
+    return any(isinstance(child, Return) or isinstance(child, kinds) and id(child) not in inside
+               for child in children)
+
+class Estimator:
+    def __init__(self, program: Program):
+        self.procedures = {s.name: s for s in program.statements if isinstance(s, Procedure)}
+        self.calls: Dict[tuple, Tuple[Cost, Optional[bool]]] = {}
+        self.active: Set[str] = set()  # procedures being estimated, to catch recursion
+        # What each procedure may do, directly or through a call: 'draw', 'print', 'pen'
+        self.effects: Dict[str, Set[str]] = {name: set() for name in self.procedures}
+        changed = True
+        while changed:
+            changed = False
+            for name, procedure in self.procedures.items():
+                effects = set().union(*(self.effects_of(child) for child in walk(procedure.body)))
+                if effects != self.effects[name]:
+                    self.effects[name] = effects
+                    changed = True
+
+    def effects_of(self, node: Node) -> Set[str]:
+        if isinstance(node, TurtleCommand):
+            if node.command == TokenType.FORWARD:
+                return {'draw'}
+            return {'pen'} if node.command in (TokenType.PEN_UP, TokenType.PEN_DOWN) else set()
+        if isinstance(node, Print):
+            return {'print'}
+        if isinstance(node, Call):
+            return self.effects.get(node.name, set())
+        return {'draw', 'print', 'pen'} if isinstance(node, Import) else set()
+
+    def moves_pen(self, node: Node) -> bool:
+        return any('pen' in self.effects_of(child) for child in walk(node))
+
+    def unknown(self, name: str) -> Cost:
+        """Unbounded work by procedure name, drawing and printing only if it can."""
+        effects = self.effects[name]
+        return ANYTHING._replace(segments=UNBOUNDED if 'draw' in effects else NONE,
+                                 prints=UNBOUNDED if 'print' in effects else NONE)
+
+    def program(self, node: Program) -> Cost:
+        statements = [s for s in node.statements if not isinstance(s, Procedure)]
+        return STEP + self.block(statements, State({}))
+
+    def block(self, statements, state: State) -> Cost:
+        total = FREE
+        exited = False  # a መልስ, ተው or ቀጥል may have skipped the rest
+        for statement in statements:
+            cost = self.statement(statement, state)
+            total = total + (cost.at_most() if exited else cost)
+            exited = exited or exits(statement)
+        return total
+
+    def statement(self, node: Statement, state: State) -> Cost:
+        if isinstance(node, (VariableDeclaration, Assignment)):
+            if node.value is None:
+                state.variables[node.name] = TOP
+                return STATEMENT
+            cost, value = self.expression(node.value, state)
+            state.variables[node.name] = value
+            return STATEMENT + cost
+        if isinstance(node, Print):
+            cost, _ = self.expression(node.expression, state)
+            return STATEMENT + cost + Cost(prints=ONE)
+        if isinstance(node, ForLoop):
+            start_cost, start = self.expression(node.start, state)
+            end_cost, end = self.expression(node.end, state)
+            # The generated range() truncates both ends
+            count = Interval(max(0.0, self.whole(end.lo) - self.whole(start.hi)),
+                             max(0.0, self.whole(end.hi) - self.whole(start.lo)))
+            variable = (node.variable, Interval(self.whole(start.lo), self.whole(end.hi) - 1))
+            return STATEMENT + start_cost + end_cost + self.loop(node.body, count, state, variable)
+        if isinstance(node, WhileLoop):
+            count = self.while_count(node, state)
+            body = self.loop(node.body, count, state)
+            condition, _ = self.expression(node.condition, state)
+            return STATEMENT + body + condition.scaled(plus(count, ONE))
+        if isinstance(node, IfStatement):
+            cost, condition = self.expression(node.condition, state)
+            condition = truth(condition)
+            if condition == ONE:
+                return STATEMENT + cost + self.block(node.body.statements, state)
+            otherwise = node.else_body.statements if node.else_body else []
+            if condition == NONE:
+                return STATEMENT + cost + self.block(otherwise, state)
+            other = state.copy()
+            branches = self.block(node.body.statements, state).join(self.block(otherwise, other))
+            state.merge(other)
+            return STATEMENT + cost + branches
+        if isinstance(node, TurtleCommand):
+            cost = STATEMENT + STEP
+            if node.argument is not None:
+                cost = cost + self.expression(node.argument, state)[0]
+            if node.command == TokenType.FORWARD:
+                drawn = {True: ONE, False: NONE, None: TRUTH}[state.pen]
+                cost = cost + Cost(segments=drawn)
+            elif node.command in (TokenType.PEN_UP, TokenType.PEN_DOWN):
+                state.pen = node.command == TokenType.PEN_DOWN
+            return cost
+        if isinstance(node, WidthCommand):
+            return STATEMENT + self.expression(node.width, state)[0]
+        if isinstance(node, Return):
+            if node.value is None:
+                return STATEMENT
+            return STATEMENT + self.expression(node.value, state)[0]
+        if isinstance(node, CallStatement):
+            return STATEMENT + self.expression(node.call, state)[0]
+        if isinstance(node, Block):
+            return self.block(node.statements, state)
+        if isinstance(node, Import):
+            # The imported file isn't looked at
+            state.pen = None
+            return ANYTHING
+        return STATEMENT  # ColorCommand, Break, Continue; Procedure definitions don't get here
+
+    def whole(self, value: float) -> float:
+        return float(int(value)) if math.isfinite(value) else value
+
+    def loop(self, body: Block, count: Interval, state: State, variable=(None, None)) -> Cost:
+        if count.hi == 0:
+            return FREE  # the body never runs, so it changes nothing either
+        before = state.copy()
+        # Whatever the body assigns may hold anything at the top of an iteration
+        for name in assigned(body):
+            state.variables[name] = TOP
+        name, values = variable
+        if name is not None:
+            state.variables[name] = values
+        if self.moves_pen(body):
+            state.pen = None
+        top = state.copy()
+        cost = Cost(iterations=ONE, steps=ONE) + self.block(body.statements, state)
+        if exits(body):
+            state.merge(top)  # the last iteration may stop partway through
+        if exits(body, (Break,)):
+            count = Interval(0.0, count.hi)  # ተው or መልስ may end it early
+        if name is not None:
+            state.variables[name] = TOP
+        if count.lo == 0:
+            state.merge(before)  # the body may not run at all
+        return cost.scaled(count)
+
+    def while_count(self, node: WhileLoop, state: State) -> Interval:
+        """Bounds on how many times a ድገም loop runs its body."""
+        condition = node.condition
+        if truth(self.expression(condition, state)[1]) == NONE:
+            return NONE
+        comparisons = (TokenType.LESS, TokenType.LESS_EQUALS, TokenType.GREATER, TokenType.GREATER_EQUALS)
+        if not (isinstance(condition, BinaryOperation) and condition.operator in comparisons
+                and isinstance(condition.left, Identifier)):
+            return UNBOUNDED
+        name = condition.left.name
+        changed = assigned(node.body)
+        # The bound must stay put, and the counter change by the same amount every iteration
+        if any(isinstance(child, (Call, Input)) or isinstance(child, Identifier) and child.name in changed
+               for child in walk(condition.right)):
+            return UNBOUNDED
+        updates = [s for s in node.body.statements if isinstance(s, Assignment) and s.name == name]
+        writes = [child for child in walk(node.body)
+                  if isinstance(child, (VariableDeclaration, Assignment)) and child.name == name]
+        if len(updates) != 1 or len(writes) != 1 or any(isinstance(c, Continue) for c in walk(node.body)):
+            return UNBOUNDED
+        update = updates[0].value
+        if not (isinstance(update, BinaryOperation) and update.operator in (TokenType.PLUS, TokenType.MINUS)
+                and isinstance(update.left, Identifier) and update.left.name == name
+                and isinstance(update.right, Number) and update.right.value > 0):
+            return UNBOUNDED
+        step = update.right.value
+        counter = state.variables.get(name, TOP)
+        bound = self.expression(condition.right, state)[1]
+        rising = condition.operator in (TokenType.LESS, TokenType.LESS_EQUALS)
+        if rising != (update.operator == TokenType.PLUS):
+            return UNBOUNDED  # moves away from the bound
+        strict = condition.operator in (TokenType.LESS, TokenType.GREATER)
+
+        def count(distance: float) -> float:
+            if not math.isfinite(distance):
+                return max(0.0, distance)
+            return max(0.0, math.ceil(distance / step) if strict else math.floor(distance / step) + 1)
+
+        if rising:
+            return Interval(count(bound.lo - counter.hi), count(bound.hi - counter.lo))
+        return Interval(count(counter.lo - bound.hi), count(counter.hi - bound.lo))
+
+    def expression(self, node: Expression, state: State) -> Tuple[Cost, Interval]:
+        """The cost of evaluating node, and the numbers it can come to."""
+        if isinstance(node, Number):
+            return FREE, Interval(float(node.value), float(node.value))
+        if isinstance(node, Identifier):
+            return FREE, state.variables.get(node.name, TOP)
+        if isinstance(node, (String, Input)):
+            return FREE, TOP
+        if isinstance(node, Call):
+            return self.call(node, state)
+        if isinstance(node, UnaryOperation):
+            cost, value = self.expression(node.operand, state)
+            if node.operator == TokenType.MINUS:
+                return cost, Interval(-value.hi, -value.lo)
+            return cost, Interval(1.0 - truth(value).hi, 1.0 - truth(value).lo)
+        if isinstance(node, BinaryOperation):
+            left_cost, left = self.expression(node.left, state)
+            right_cost, right = self.expression(node.right, state)
+            return left_cost + right_cost, self.operation(node.operator, left, right)
+        # Lists and indexing
+        cost = FREE
+        for child in (node.elements if isinstance(node, ListLiteral) else [node.target, node.index]):
+            cost = cost + self.expression(child, state)[0]
+        return cost, TOP
+
+    def operation(self, operator: TokenType, left: Interval, right: Interval) -> Interval:
+        if operator == TokenType.PLUS:
+            return plus(left, right)
+        if operator == TokenType.MINUS:
+            return plus(left, Interval(-right.hi, -right.lo))
+        if operator == TokenType.TIMES:
+            return times(left, right)
+        if operator == TokenType.DIVIDE_OP and (right.lo > 0 or right.hi < 0):
+            return times(left, Interval(1 / right.hi, 1 / right.lo))
+        if operator == TokenType.MODULO_OP and right.lo == right.hi and right.lo > 0:
+            return Interval(0.0, right.lo)
+        if operator in (TokenType.LESS, TokenType.LESS_EQUALS, TokenType.GREATER, TokenType.GREATER_EQUALS):
+            strict = operator in (TokenType.LESS, TokenType.GREATER)
+            if operator in (TokenType.GREATER, TokenType.GREATER_EQUALS):
+                left, right = right, left  # left < right or left <= right
+            if left.hi < right.lo or not strict and left.hi <= right.lo:
+                return ONE
+            if left.lo > right.hi or strict and left.lo >= right.hi:
+                return NONE
+            return TRUTH
+        if operator in (TokenType.EQUALS, TokenType.NOT_EQUALS):
+            if left.lo == left.hi == right.lo == right.hi:
+                equal = ONE
+            elif left.hi < right.lo or right.hi < left.lo:
+                equal = NONE
+            else:
+                return TRUTH
+            return equal if operator == TokenType.EQUALS else Interval(1.0 - equal.hi, 1.0 - equal.lo)
+        return TOP  # ** and anything that may divide by zero
+
+    def call(self, node: Call, state: State) -> Tuple[Cost, Interval]:
+        cost = FREE
+        arguments = []
+        for argument in node.arguments:
+            argument_cost, value = self.expression(argument, state)
+            cost = cost + argument_cost
+            arguments.append(value)
+        procedure = self.procedures.get(node.name)
+        if procedure is None:
+            # A list builtin costs about a statement; an imported procedure could do anything
+            return cost + (STATEMENT if node.name in BUILTINS else ANYTHING), TOP
+        if node.name in self.active:
+            if 'pen' in self.effects[node.name]:
+                state.pen = None
+            return cost + self.unknown(node.name), TOP  # recursion
+        key = (node.name, tuple(arguments), state.pen)
+        if key not in self.calls:
+            inner = State(dict(zip(procedure.parameters, arguments)), state.pen)
+            self.active.add(node.name)
+            try:
+                body = STEP + self.block(procedure.body.statements, inner)
+            finally:
+                self.active.discard(node.name)
+            pen = state.pen
+            if 'pen' in self.effects[node.name]:
+                pen = None if exits(procedure.body) else inner.pen
+            self.calls[key] = (body, pen)
+        body, state.pen = self.calls[key]
+        return cost + body, TOP
+
+def estimate(program: Program) -> Cost:
+    """Bounds on what running program does."""
+    return Estimator(program).program(program)
+
+def estimate_file(path: str) -> Cost:
+    with open(path, encoding='utf-8') as f:
+        return estimate(Parser(Lexer(f.read()).tokenize()).parse())
+
+def triage(cost: Cost, max_seconds: float = DEFAULT_MAX_SECONDS) -> str:
+    """Where to run a program: 'reject' if it certainly takes more than
+    max_seconds, 'record' (then raster.py) if it may draw more than Tk
+    handles, else 'tk', or 'headless' for programs that don't draw."""
+    if cost.seconds.lo > max_seconds:
+        return 'reject'
+    if cost.segments.hi > HEAVY_SEGMENTS:
+        return 'record'
+    return 'tk' if cost.segments.hi > 0 else 'headless'
+
+def main() -> int:
+    import argparse
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('programs', nargs='+', help='.mesel programs')
+    arg_parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS,
+                            help='reject programs that certainly run longer')
+    args = arg_parser.parse_args()
+
+    status = 0
+    for path in args.programs:
+        try:
+            cost = estimate_file(path)
+        except Exception as e:
+            print(f"{path}: error: {e}")
+            status = 1
+            continue
+        print(f"{path}: {triage(cost, args.max_seconds)}")
+        for field in Cost._fields:
+            print(f"    {field:<11} {getattr(cost, field)}")
+        print(f"    {'seconds':<11} {'~' * cost.seconds.bounded}{cost.seconds}")
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Recognize submissions that are the same program, and reuse their results.
+
+    digest = file_digest('student.mesel')
+    with ResultStore('results.sqlite') as store:
+        result = store.cached(digest, 'run', lambda: run_submission('student.mesel'))
+
+normalize() rewrites a parser.py AST into a canonical form:
+
+- variables and parameters are renamed v0, v1, ... and the procedures the
+  program defines p0, p1, ... in the order they first appear; builtins and
+  imported procedures keep their names
+- numbers are plain floats (so 4, 4.0 and 04 are the same) and every
+  position is 0, so whitespace and comments don't count
+- no-op statements are dropped: empty ጀምር blocks (and the grouping of
+  non-empty ones), ዙር 0, counted loops that never run or do nothing,
+  ከሆነ with nothing in either branch and a condition that can't raise (on
+  numbers, and variables earlier statements in its block set to numbers), statements after መልስ, ተው or ቀጥል in the same block, and a
+  bare መልስ that ends a procedure; code that never runs is only dropped if
+  it compiles wherever it is, so dropping it can't hide a compile error
+
+structural_hash() is the SHA-256 of the canonical AST in ast_binary's
+format, and file_digest() adds the digests of the files a program imports.
+Two submissions with the same digest print and draw the same thing (the
+code generator keeps Mesel names apart from Python's, so renaming can't
+change what compiles), so a grader only has to run one of them; only an
+error message may name a different variable. Strings are left alone:
+they are what the program prints.
+
+ResultStore keeps results, as JSON, in SQLite under (digest, kind), where
+kind names what was computed ('run', 'png:400x300', ...). Stored results
+are dropped when the compiler or runtime changes, since they could come
+out differently.
+
+Usage: python dedup.py submissions/*.mesel [--store results.sqlite] [--timeout 2]
+"""
+import hashlib
+import json
+import sqlite3
+from dataclasses import fields, replace
+from typing import Callable, Dict, List, Optional, Set
+import ast_binary
+from build import COMPILER_FILES, compiler_hash, imports_of, resolve
+from lexer import Lexer, TokenType
+from parser import *
+
+# Results depend on the runtime as well as on the generated code
+RESULT_FILES = COMPILER_FILES + ('mesel_runtime.py', 'mesel_lists.py')
+
+# Operators that can't raise on two numbers
+SAFE_OPERATORS = frozenset({
+    TokenType.PLUS, TokenType.MINUS, TokenType.TIMES,
+    TokenType.EQUALS, TokenType.NOT_EQUALS, TokenType.GREATER, TokenType.LESS,
+    TokenType.GREATER_EQUALS, TokenType.LESS_EQUALS,
+})
+
+def cannot_fail(node: Expression, numbers: Set[str] = frozenset()) -> bool:
+    """Whether node is arithmetic on numbers, and on variables in numbers
+    (which certainly hold one), that evaluates without an error."""
+    if isinstance(node, Number):
+        return True
+    if isinstance(node, Identifier):
+        return node.name in numbers
+    if isinstance(node, UnaryOperation):
+        return cannot_fail(node.operand, numbers)
+    if isinstance(node, BinaryOperation):
+        return (node.operator in SAFE_OPERATORS and cannot_fail(node.left, numbers)
+                and cannot_fail(node.right, numbers))
+    return False
+
+def compiles_anywhere(node: Node) -> bool:
+    """Whether code_generator compiles node wherever it is: it calls, returns,
+    defines and imports nothing, and counts only between numbers."""
+    return not any(isinstance(child, (Call, Return, Procedure, Import))
+                   or isinstance(child, ForLoop) and not (isinstance(child.start, Number)
+                                                          and isinstance(child.end, Number))
+                   for child in walk(node))
+
+class Normalizer:
+    def __init__(self, program: Program):
+        procedures = [s.name for s in program.statements if isinstance(s, Procedure)]
+        self.procedures = {name: f"p{i}" for i, name in enumerate(dict.fromkeys(procedures))}
+        self.variables: Dict[str, str] = {}
+
+    def variable(self, name: Optional[str]) -> Optional[str]:
+        if name is None:
+            return None
+        renamed = self.variables.get(name)
+        if renamed is None:
+            renamed = self.variables[name] = f"v{len(self.variables)}"
+        return renamed
+
+    def statements(self, statements: List[Statement]) -> List[Statement]:
+        result = []
+        exited = False
+        numbers = set()  # variables the statements so far certainly set to a number
+        for statement in statements:
+            if exited and compiles_anywhere(statement):
+                continue  # the rest of the block never runs
+            statement = self.node(statement)
+            if self.does_nothing(statement, numbers):
+                continue
+            number = (isinstance(statement, (VariableDeclaration, Assignment)) and statement.value is not None
+                      and cannot_fail(statement.value, numbers))
+            for child in walk(statement):
+                if isinstance(child, (VariableDeclaration, Assignment)):
+                    numbers.discard(child.name)
+                elif isinstance(child, ForLoop):
+                    numbers.discard(child.variable)
+            if number:
+                numbers.add(statement.name)
+            if isinstance(statement, Block):
+                result.extend(statement.statements)  # ጀምር ... ጨርስ only groups
+            else:
+                result.append(statement)
+            exited = exited or bool(result) and isinstance(result[-1], (Return, Break, Continue))
+        return result
+
+    def node(self, node: Node) -> Node:
+        """The canonical copy of node."""
+        # Names first, so they are numbered in the order they are written
+        changes = {'line': 0, 'column': 0}
+        if isinstance(node, (VariableDeclaration, Assignment)):
+            changes['name'] = self.variable(node.name)
+        elif isinstance(node, Identifier):
+            changes['name'] = self.variable(node.name)
+        elif isinstance(node, ForLoop):
+            changes['variable'] = self.variable(node.variable)
+        elif isinstance(node, Procedure):
+            changes['name'] = self.procedures[node.name]
+            changes['parameters'] = [self.variable(parameter) for parameter in node.parameters]
+        elif isinstance(node, Call):
+            changes['name'] = self.procedures.get(node.name, node.name)
+        elif isinstance(node, Number):
+            changes['value'] = float(node.value) + 0.0  # and -0.0 is 0.0
+        for field in fields(node):
+            value = getattr(node, field.name)
+            if isinstance(value, Node):
+                changes[field.name] = self.node(value)
+            elif isinstance(value, list) and field.name == 'statements':
+                changes[field.name] = self.statements(value)
+            elif isinstance(value, list) and field.name not in changes:
+                changes[field.name] = [self.node(item) if isinstance(item, Node) else item for item in value]
+        if isinstance(node, Procedure):
+            body = changes['body']
+            if body.statements and isinstance(body.statements[-1], Return) and body.statements[-1].value is None:
+                changes['body'] = replace(body, statements=body.statements[:-1])
+        return replace(node, **changes)
+
+    def does_nothing(self, node: Node, numbers: Set[str] = frozenset()) -> bool:
+        if isinstance(node, Block):
+            return not node.statements
+        if isinstance(node, TurtleCommand):
+            return (node.command == TokenType.TURN and isinstance(node.argument, Number)
+                    and node.argument.value == 0)
+        if isinstance(node, ForLoop):
+            if isinstance(node.start, Number) and isinstance(node.end, Number):
+                never = int(node.end.value) <= int(node.start.value)
+                return (never and compiles_anywhere(node.body)
+                        or node.variable is None and not node.body.statements)
+        if isinstance(node, IfStatement):
+            return (not node.body.statements and not (node.else_body and node.else_body.statements)
+                    and cannot_fail(node.condition, numbers))
+        return False
+
+def normalize(program: Program) -> Program:
+    """A canonical copy of program; program itself is left as it is."""
+    normalizer = Normalizer(program)
+    # Body blocks stay even when empty; only statement lists lose no-ops
+    return replace(program, line=0, column=0, statements=normalizer.statements(program.statements))
+
+def structural_hash(program: Program) -> str:
+    """SHA-256 of the canonical form of program."""
+    return hashlib.sha256(ast_binary.dump(normalize(program))).hexdigest()
+
+def file_digest(path: str, _seen: frozenset = frozenset()) -> str:
+    """structural_hash of a .mesel file, combined with those of the files it imports."""
+    with open(path, encoding='utf-8') as f:
+        program = Parser(Lexer(f.read()).tokenize()).parse()
+    digest = hashlib.sha256(structural_hash(program).encode('ascii'))
+    seen = _seen | {path}
+    for node in imports_of(program):
+        imported = resolve(path, node.path)
+        if imported not in seen:
+            digest.update(f"\n{node.path}:{file_digest(imported, seen)}".encode('utf-8'))
+    return digest.hexdigest()
+
+class ResultStore:
+    """Results by digest and kind, kept in a SQLite file."""
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS results (
+                digest TEXT, kind TEXT, value TEXT, PRIMARY KEY (digest, kind));
+        """)
+        version = compiler_hash(RESULT_FILES)
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            with self.connection:
+                self.connection.execute("DELETE FROM results")
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str, kind: str):
+        """The stored result, or None."""
+        row = self.connection.execute("SELECT value FROM results WHERE digest = ? AND kind = ?",
+                                      (digest, kind)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, digest: str, kind: str, value):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                    (digest, kind, json.dumps(value, ensure_ascii=False)))
+
+    def cached(self, digest: str, kind: str, compute: Callable):
+        """The stored result, or compute() stored for next time."""
+        value = self.get(digest, kind)
+        if value is None:
+            self.misses += 1
+            value = compute()
+            self.put(digest, kind, value)
+        else:
+            self.hits += 1
+        return value
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run_submission(path: str, timeout: float = None) -> dict:
+    """What the program at path prints and draws, as ResultStore keeps it."""
+    from cases import DEFAULT_TIMEOUT, compile_program, run_case, Watchdog
+    from fingerprint import fingerprint
+    try:
+        program = compile_program(path)
+    except Exception as e:
+        return {'output': [], 'error': str(e), 'drawing': None}
+    watchdog = Watchdog()
+    try:
+        result = run_case(program, [], watchdog, timeout or DEFAULT_TIMEOUT)
+    finally:
+        watchdog.close()
+    return {'output': result.output, 'error': result.error,
+            'drawing': fingerprint(result.segments).digest if program.drawing else None}
+
+def main():
+    import argparse
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('submissions', nargs='+', help='.mesel programs')
+    arg_parser.add_argument('--store', default='mesel_results.sqlite', help='SQLite file of results')
+    arg_parser.add_argument('--timeout', type=float, default=None, help='seconds per program')
+    args = arg_parser.parse_args()
+
+    with ResultStore(args.store) as store:
+        for path in args.submissions:
+            try:
+                digest = file_digest(path)
+            except Exception as e:
+                print(f"{'-' * 16}  error   {path}: {e}")
+                continue
+            misses = store.misses
+            result = store.cached(digest, 'run', lambda: run_submission(path, args.timeout))
+            status = 'ran' if store.misses > misses else 'cached'
+            outcome = result['error'] or (result['drawing'] or '')[:16] or f"{len(result['output'])} lines"
+            print(f"{digest[:16]}  {status:6}  {path}  {outcome}")
+        print(f"{store.misses} ran, {store.hits} reused")
+
+if __name__ == '__main__':
+    main()
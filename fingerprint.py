@@ -0,0 +1,175 @@
+"""Canonical fingerprints of turtle drawings, for grading without pixels.
+
+    reference = fingerprint(load_segments('square.mesel'))
+    submission = fingerprint(t.segments)
+    submission.digest == reference.digest    # the same picture
+    similarity(submission, reference)        # 0.0 .. 1.0
+
+A fingerprint describes what was drawn, not how: the drawing is moved to
+the origin and scaled so its larger side is GRID units, segments that lie
+on the same line (to within a small tolerance) and overlap or touch are
+merged, and the ends of the merged lines are rounded to whole units. So a
+square drawn from any corner, in either direction, at any size or position,
+as four lines or forty, gives the same segments and the same digest.
+Colors count unless colors=False; pen width never does.
+
+similarity() is the Jaccard index of the CELLS x CELLS grid cells the
+merged segments pass through: 1.0 for drawings that cover the same cells,
+dropping as they differ. Both only need the display list, so grading a
+class or clustering thousands of submissions takes no rendering.
+
+Usage: python fingerprint.py reference.mesel|json submission.mesel|json ... [--no-colors]
+"""
+import hashlib
+import math
+from collections import defaultdict
+from operator import itemgetter
+from typing import Callable, FrozenSet, Iterator, Optional, Sequence, Tuple
+from mesel_runtime import Segment
+
+GRID = 1024  # units along the larger side of a normalized drawing
+CELLS = 32   # cells along the larger side, for similarity()
+
+# How far apart, in radians and in grid units, directions and lines or
+# line ends can be and still be merged: enough for the rounding error a
+# turtle builds up over thousands of steps
+ANGLE_TOLERANCE = 1e-6
+DISTANCE_TOLERANCE = 1e-3
+
+class Fingerprint:
+    __slots__ = ('digest', 'segments', 'covered')
+
+    def __init__(self, digest: str, segments: Tuple[tuple, ...]):
+        self.digest = digest
+        self.segments = segments  # (color, x0, y0, x1, y1), sorted
+        self.covered = None
+
+    @property
+    def cells(self) -> FrozenSet[tuple]:
+        """(color, column, row) cells the drawing passes through."""
+        # Only needed when digests differ, so worked out on first use
+        if self.covered is None:
+            self.covered = covered_cells(self.segments)
+        return self.covered
+
+    def __eq__(self, other):
+        if not isinstance(other, Fingerprint):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+def runs(items: list, key: Callable, tolerance: float) -> Iterator[list]:
+    """Split sorted items wherever key jumps by more than tolerance."""
+    run = [items[0]]
+    for previous, item in zip(items, items[1:]):
+        if key(item) - key(previous) > tolerance:
+            yield run
+            run = []
+        run.append(item)
+    yield run
+
+def canonical_segments(segments: Sequence[Segment], colors: bool = True) -> Tuple[tuple, ...]:
+    """Normalized, merged and quantized (color, x0, y0, x1, y1) segments."""
+    if not segments:
+        return ()
+    xs = [s[0] for s in segments] + [s[2] for s in segments]
+    ys = [s[1] for s in segments] + [s[3] for s in segments]
+    left, bottom = min(xs), min(ys)
+    extent = max(max(xs) - left, max(ys) - bottom)
+    scale = GRID / extent if extent > 0 else 0.0
+
+    # Lines are found before rounding: the rounded ends of the short steps
+    # of a slanted line no longer all point the same way
+    by_color = defaultdict(list)
+    for x0, y0, x1, y1, color, _ in segments:
+        ax, ay = (x0 - left) * scale, (y0 - bottom) * scale
+        bx, by = (x1 - left) * scale, (y1 - bottom) * scale
+        if math.hypot(bx - ax, by - ay) <= DISTANCE_TOLERANCE:
+            continue
+        angle = math.atan2(by - ay, bx - ax) % math.pi
+        if angle > math.pi - ANGLE_TOLERANCE:
+            angle -= math.pi  # next to 0, where the same direction sorts
+        by_color[color if colors else ''].append((angle, ax, ay, bx, by))
+
+    merged = set()
+    for color, directed in by_color.items():
+        directed.sort()
+        for same_direction in runs(directed, itemgetter(0), ANGLE_TOLERANCE):
+            # Along the direction, t orders points and offset tells lines apart
+            ux, uy = math.cos(same_direction[0][0]), math.sin(same_direction[0][0])
+            lines = []
+            for _, ax, ay, bx, by in same_direction:
+                a, b = (ax, ay), (bx, by)
+                t0, t1 = ax * ux + ay * uy, bx * ux + by * uy
+                if t1 < t0:
+                    t0, t1, a, b = t1, t0, b, a
+                lines.append(((ay + by) * ux / 2 - (ax + bx) * uy / 2, t0, t1, a, b))
+            lines.sort()
+            for line in runs(lines, itemgetter(0), DISTANCE_TOLERANCE):
+                line.sort(key=itemgetter(1))
+                _, _, end_t, start, end = line[0]
+                for _, t0, t1, a, b in line[1:]:
+                    if t0 <= end_t + DISTANCE_TOLERANCE:
+                        if t1 > end_t:
+                            end_t, end = t1, b
+                    else:
+                        merged.add(quantize(color, start, end))
+                        end_t, start, end = t1, a, b
+                merged.add(quantize(color, start, end))
+    merged.discard(None)
+    return tuple(sorted(merged))
+
+def quantize(color: str, a: tuple, b: tuple) -> Optional[tuple]:
+    a = (round(a[0]), round(a[1]))
+    b = (round(b[0]), round(b[1]))
+    if b < a:
+        a, b = b, a
+    return (color, *a, *b) if a != b else None
+
+def covered_cells(segments: Sequence[tuple]) -> FrozenSet[tuple]:
+    # v * CELLS // span is the cell of coordinate v, and CELLS - 1 at v = GRID
+    span = GRID + 1
+    half = span // (2 * CELLS)
+    cells = set()
+    add = cells.add
+    for color, x0, y0, x1, y1 in segments:
+        dx, dy = x1 - x0, y1 - y0
+        # Sample every half cell along the longer axis, so no row or column
+        # the segment crosses is skipped (a corner it only clips may be)
+        steps = max(abs(dx), abs(dy)) // half + 1
+        for i in range(steps + 1):
+            add((color, (x0 + dx * i // steps) * CELLS // span, (y0 + dy * i // steps) * CELLS // span))
+    return frozenset(cells)
+
+def fingerprint(segments: Sequence[Segment], colors: bool = True) -> Fingerprint:
+    """Fingerprint of a display list from the record backend."""
+    canonical = canonical_segments(segments, colors)
+    text = '\n'.join(' '.join(map(str, segment)) for segment in canonical)
+    return Fingerprint(hashlib.sha256(text.encode('utf-8')).hexdigest(), canonical)
+
+def similarity(a: Fingerprint, b: Fingerprint) -> float:
+    """Jaccard index of the cells two drawings cover, 1.0 when they are the same."""
+    if a.digest == b.digest:
+        return 1.0
+    union = len(a.cells | b.cells)
+    return len(a.cells & b.cells) / union if union else 1.0
+
+def main():
+    import argparse
+    from raster import load_segments
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('reference', help='.mesel program or MESEL_RECORD file to compare with')
+    arg_parser.add_argument('submissions', nargs='+')
+    arg_parser.add_argument('--no-colors', action='store_true', help='ignore pen colors')
+    args = arg_parser.parse_args()
+
+    reference = fingerprint(load_segments(args.reference), not args.no_colors)
+    print(f"{reference.digest[:16]}  reference  {args.reference}")
+    for path in args.submissions:
+        submission = fingerprint(load_segments(path), not args.no_colors)
+        print(f"{submission.digest[:16]}  {similarity(submission, reference):9.3f}  {path}")
+
+if __name__ == '__main__':
+    main()
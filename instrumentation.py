@@ -0,0 +1,122 @@
+"""Per-phase timers and counters for the Mesel compiler.
+
+    metrics = Metrics(trace_memory=True)
+    with metrics.phase('lex'):
+        tokens = Lexer(source).tokenize()
+    metrics.count('tokens', len(tokens))
+    print(metrics.report())
+    print(metrics.to_prometheus({'file': 'square.mesel'}))
+
+Each phase records wall-clock and CPU time and, when trace_memory is set,
+the peak memory allocated while it ran (measured with tracemalloc, which
+slows the phase down noticeably).
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+@dataclass
+class PhaseMetrics:
+    name: str
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+    peak_memory: Optional[int] = None
+
+@dataclass
+class Metrics:
+    trace_memory: bool = False
+    phases: Dict[str, PhaseMetrics] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the body of the with statement as phase `name`."""
+        stats = self.phases.setdefault(name, PhaseMetrics(name))
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.wall += time.perf_counter() - wall
+            stats.cpu += time.process_time() - cpu
+            stats.calls += 1
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                stats.peak_memory = max(stats.peak_memory or 0, peak)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def total_wall(self) -> float:
+        return sum(stats.wall for stats in self.phases.values())
+
+    def as_dict(self) -> dict:
+        return {
+            'phases': {name: {'wall_seconds': stats.wall, 'cpu_seconds': stats.cpu,
+                              'calls': stats.calls, 'peak_memory_bytes': stats.peak_memory}
+                       for name, stats in self.phases.items()},
+            'counters': dict(self.counters),
+        }
+
+    def report(self) -> str:
+        """Return a human readable table of the phases and counters."""
+        lines = [f"{'phase':<10} {'wall ms':>10} {'cpu ms':>10} {'share':>7} {'peak KB':>10}"]
+        total = self.total_wall or 1.0
+        for stats in self.phases.values():
+            peak = f"{stats.peak_memory / 1024:10.1f}" if stats.peak_memory is not None else '         -'
+            lines.append(f"{stats.name:<10} {stats.wall * 1000:10.2f} {stats.cpu * 1000:10.2f}"
+                         f" {stats.wall / total:7.1%} {peak}")
+        lines.append(f"{'total':<10} {self.total_wall * 1000:10.2f}")
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+    def to_prometheus(self, labels: Dict[str, str] = None) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        labels = labels or {}
+        lines = []
+
+        def sample(metric: str, value, extra: Dict[str, str] = None):
+            merged = {**labels, **(extra or {})}
+            label_text = ','.join(f'{key}="{escape_label(str(val))}"' for key, val in merged.items())
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+
+        families = [
+            ('mesel_phase_wall_seconds', 'Wall-clock time spent in each compiler phase.',
+             lambda stats: stats.wall),
+            ('mesel_phase_cpu_seconds', 'CPU time spent in each compiler phase.',
+             lambda stats: stats.cpu),
+            ('mesel_phase_peak_memory_bytes', 'Peak memory allocated during each compiler phase.',
+             lambda stats: stats.peak_memory),
+        ]
+        for metric, help_text, value_of in families:
+            values = [(stats.name, value_of(stats)) for stats in self.phases.values()
+                      if value_of(stats) is not None]
+            if not values:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for name, value in values:
+                sample(metric, value, {'phase': name})
+        for name, value in self.counters.items():
+            metric = f"mesel_{name}"
+            lines.append(f"# HELP {metric} Number of {name.replace('_', ' ')} in the last compile.")
+            lines.append(f"# TYPE {metric} gauge")
+            sample(metric, value)
+        return "\n".join(lines) + "\n"
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,254 @@
+"""JavaScript target: Mesel programs that run in the browser.
+
+    generator = generator_class('js')()
+    javascript = generator.generate(ast)
+
+The output starts with mesel_runtime.js, so it needs nothing else: load it
+in a page with <script src="program.js"></script> and it draws on an
+800x600 canvas, or run it with Node to print without drawing. The turtle
+keeps every segment it draws in mesel.segments, the same draw list the
+record backend keeps in Python.
+
+The program itself mirrors what CodeGenerator writes for Python, statement
+for statement. Where JavaScript differs, the runtime does it the Python
+way: % and / go through mesel.mod and mesel.div, and programs that use
+lists do all their arithmetic through mesel.add, mesel.eq and so on, since
+JavaScript has no operator overloading. js_replay.py checks that the two
+targets draw the same thing without a JavaScript engine.
+
+Not supported yet, and rejected: imports (programs built from several
+files) and -O.
+"""
+import json
+import os
+from types import MappingProxyType
+from typing import List
+from ast_nodes import *
+from parser import *
+from code_generator import CodeGenerator, BUILTINS
+from mesel_constants import COLORS
+
+RUNTIME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mesel_runtime.js')
+
+# Names a program can't use as JavaScript identifiers, or that the generated
+# code uses itself; they get a trailing _
+RESERVED = frozenset('''
+    arguments await break case catch class const continue debugger default delete do else enum
+    eval export extends false finally for function if implements import in instanceof interface
+    let new null package private protected public return static super switch this throw true try
+    typeof var void while with yield mesel t main
+'''.split())
+
+# Mesel operators that are the same in JavaScript when no lists are involved
+INFIX = MappingProxyType({
+    TokenType.PLUS: '+', TokenType.MINUS: '-', TokenType.TIMES: '*', TokenType.POWER_OP: '**',
+    TokenType.EQUALS: '===', TokenType.NOT_EQUALS: '!==',
+    TokenType.GREATER: '>', TokenType.LESS: '<',
+    TokenType.GREATER_EQUALS: '>=', TokenType.LESS_EQUALS: '<=',
+})
+
+# Runtime functions for operators that behave differently in JavaScript,
+# and for those that take lists
+HELPERS = MappingProxyType({TokenType.DIVIDE_OP: 'div', TokenType.MODULO_OP: 'mod'})
+LIST_HELPERS = MappingProxyType({
+    TokenType.PLUS: 'add', TokenType.MINUS: 'sub', TokenType.TIMES: 'mul', TokenType.POWER_OP: 'pow',
+    TokenType.EQUALS: 'eq', TokenType.NOT_EQUALS: 'ne',
+})
+
+_runtime = None
+
+def runtime_source() -> str:
+    """mesel_runtime.js, read once."""
+    global _runtime
+    if _runtime is None:
+        with open(RUNTIME_FILE, encoding='utf-8') as f:
+            _runtime = f.read()
+    return _runtime
+
+class JavaScriptGenerator(CodeGenerator):
+    """Generates standalone JavaScript that draws on an HTML canvas (the 'js' target)."""
+    target = 'js'
+    extension = '.js'
+
+    def __init__(self, modules=None, optimize: bool = False):
+        if optimize:
+            raise ValueError("the js target can't memoize procedures (-O) yet")
+        super().__init__(modules, optimize)
+        self.loop_depth = 0
+
+    def name(self, name: str) -> str:
+        return name + '_' if name in RESERVED else name
+
+    def generate_node(self, node: Node) -> str:
+        if isinstance(node, CallStatement):
+            return self.generate_call(node.call) + ';'
+        return super().generate_node(node)
+
+    def module_ref(self, node: Import):
+        raise Exception(f"Error at line {node.line}, column {node.column}: "
+                        f"the js target can't compile imports yet")
+
+    def generate_program(self, node: Program) -> str:
+        self.features = self.analyze(node)
+        drawing = 'turtle' in self.features
+        procedures = [statement for statement in node.statements if isinstance(statement, Procedure)]
+        self.top_level_procedures = {id(procedure) for procedure in procedures}
+        code = runtime_source().rstrip('\n').split('\n') + [""]
+        for procedure in procedures:
+            code.extend(self.generate(procedure).split('\n'))
+            code.append("")
+        code.append("function main(t) {" if drawing else "function main() {")
+        statements = [statement for statement in node.statements if not isinstance(statement, Procedure)]
+        code.extend(self.declarations(statements, []))
+        for statement in statements:
+            stmt_code = self.generate(statement)
+            if stmt_code:
+                code.extend('    ' + line for line in stmt_code.split('\n'))
+        code.extend(["}", "", "mesel.run(main);" if drawing else "mesel.run(main, false);"])
+        return self.extract_source_map("\n".join(code))
+
+    def declarations(self, statements: List[Statement], parameters: List[str]) -> List[str]:
+        """A `let` for the variables a function assigns, which Python makes local."""
+        names = {}
+        for statement in statements:
+            for child in walk(statement):
+                if isinstance(child, (VariableDeclaration, Assignment)):
+                    names[child.name] = None
+                elif isinstance(child, ForLoop) and child.variable is not None:
+                    names[child.variable] = None
+        names = [self.name(name) for name in names if name not in parameters]
+        return [f"    let {', '.join(names)};"] if names else []
+
+    def generate_body(self, node: Block) -> str:
+        body_code = self.generate(node)
+        return '\n'.join("    " + line for line in body_code.split('\n')) if body_code else ""
+
+    def lines(self, code: List[str]) -> str:
+        # Empty bodies leave nothing between the braces
+        return "\n".join(line for line in code if line)
+
+    def generate_variable_declaration(self, node: VariableDeclaration) -> str:
+        return f"{self.name(node.name)} = {self.generate_expression(node.value)};"
+
+    def generate_assignment(self, node: Assignment) -> str:
+        return f"{self.name(node.name)} = {self.generate_expression(node.value)};"
+
+    def helper(self, node: Expression) -> str:
+        """The runtime function node compiles to, if it isn't an operator."""
+        if isinstance(node, BinaryOperation):
+            if node.operator in HELPERS:
+                return HELPERS[node.operator]
+            if self.list_names:
+                return LIST_HELPERS.get(node.operator)
+        elif isinstance(node, UnaryOperation) and self.list_names and node.operator == TokenType.MINUS:
+            return 'neg'
+        return None
+
+    def operand(self, node: BinaryOperation, child: Expression, code: str) -> str:
+        if self.helper(child):
+            return code
+        return super().operand(node, child, code)
+
+    def generate_binary_operation(self, node: BinaryOperation) -> str:
+        left = self.generate_expression(node.left)
+        right = self.generate_expression(node.right)
+        helper = self.helper(node)
+        if helper:
+            return f"mesel.{helper}({left}, {right})"
+        return f"{self.operand(node, node.left, left)} {INFIX[node.operator]} {self.operand(node, node.right, right)}"
+
+    def generate_unary_operation(self, node: UnaryOperation) -> str:
+        expr = self.generate_expression(node.operand)
+        if self.helper(node):
+            return f"mesel.neg({expr})"
+        if isinstance(node.operand, (BinaryOperation, UnaryOperation)) and not self.helper(node.operand):
+            expr = f"({expr})"
+        return f"{'-' if node.operator == TokenType.MINUS else '!'}{expr}"
+
+    def generate_string(self, node: String) -> str:
+        return json.dumps(node.value, ensure_ascii=False)
+
+    def generate_identifier(self, node: Identifier) -> str:
+        return self.name(node.name)
+
+    def generate_print(self, node: Print) -> str:
+        return f"mesel.show({self.generate(node.expression)});"
+
+    def generate_for_loop(self, node: ForLoop) -> str:
+        start = int(float(self.generate(node.start)))
+        end = int(float(self.generate(node.end)))
+        # A counter of its own, so that assigning to the loop variable in the
+        # body doesn't change the iterations, as in Python's for ... in range()
+        self.loop_depth += 1
+        try:
+            counter = f"_i{self.loop_depth}"
+            code = [f"for (let {counter} = {start}; {counter} < {end}; {counter}++) {{"]
+            if node.variable is not None:
+                code.append(f"    {self.name(node.variable)} = {counter};")
+            code.append(self.generate_body(node.body))
+        finally:
+            self.loop_depth -= 1
+        code.append("}")
+        return self.lines(code)
+
+    def generate_while_loop(self, node: WhileLoop) -> str:
+        return self.lines([f"while ({self.generate(node.condition)}) {{", self.generate_body(node.body), "}"])
+
+    def generate_if_statement(self, node: IfStatement) -> str:
+        code = [f"if ({self.generate(node.condition)}) {{", self.generate_body(node.body)]
+        if node.else_body:
+            code.extend(["} else {", self.generate_body(node.else_body)])
+        code.append("}")
+        return self.lines(code)
+
+    def generate_break(self, node: Break) -> str:
+        return "break;"
+
+    def generate_continue(self, node: Continue) -> str:
+        return "continue;"
+
+    def generate_turtle_command(self, node: TurtleCommand) -> str:
+        return super().generate_turtle_command(node) + ';'
+
+    def generate_color_command(self, node: ColorCommand) -> str:
+        return f"t.color({json.dumps(COLORS[node.color.value])});"
+
+    def generate_width_command(self, node: WidthCommand) -> str:
+        return f"t.width({self.generate(node.width)});"
+
+    def generate_procedure(self, node: Procedure) -> str:
+        if id(node) not in self.top_level_procedures:
+            raise Exception(f"Error at line {node.line}, column {node.column}: "
+                            f"procedures must be defined at the top level of a file")
+        signature = self.procedures[node.name]
+        parameters = ['t'] * signature.draws + [self.name(parameter) for parameter in node.parameters]
+        code = [f"function {self.name(node.name)}({', '.join(parameters)}) {{"]
+        code.extend(self.declarations(node.body.statements, node.parameters))
+        self.current_procedure = node
+        try:
+            code.append(self.generate_body(node.body))
+        finally:
+            self.current_procedure = None
+        code.append("}")
+        return self.lines(code)
+
+    def generate_return(self, node: Return) -> str:
+        return super().generate_return(node) + ';'
+
+    def generate_call(self, node: Call) -> str:
+        signature = self.signature(node)
+        arguments = [self.generate(argument) for argument in node.arguments]
+        if node.name not in self.procedures:
+            return f"mesel.{BUILTINS[node.name][0]}({', '.join(arguments)})"
+        arguments = ['t'] * signature.draws + arguments
+        return f"{self.name(node.name)}({', '.join(arguments)})"
+
+    def generate_list(self, node: ListLiteral) -> str:
+        return f"mesel.vector([{', '.join(self.generate(element) for element in node.elements)}])"
+
+    def generate_index(self, node: Index) -> str:
+        return f"mesel.at({self.generate(node.target)}, {self.generate(node.index)})"
+
+    def generate_input(self, node: Input) -> str:
+        prompt = json.dumps(node.prompt, ensure_ascii=False) if node.prompt is not None else ""
+        return f"mesel.ask({prompt})"
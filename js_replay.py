@@ -0,0 +1,153 @@
+"""Check the JavaScript target against the Python one, without JavaScript.
+
+    python js_replay.py examples/*.mesel
+
+Each program is compiled by both targets. The Python program runs on the
+record backend; the JavaScript program is read back into Python, line by
+line, and runs against a stand-in for the `mesel` runtime object built from
+mesel_runtime and mesel_lists. The two draw lists must be identical.
+
+This works because JavaScriptGenerator only ever writes a small, regular
+subset of JavaScript: one statement per line, blocks opened at the end of
+a line and closed on a line of their own, `let` declarations, counted
+`for` loops, and expressions whose operators Python spells the same way
+apart from === !== and !. to_python() refuses anything else. What it
+checks is the generated program; mesel_runtime.js itself mirrors the
+Python runtime by hand.
+"""
+import re
+import sys
+import types
+from typing import List, Sequence, Tuple
+import mesel_lists
+import mesel_runtime
+from mesel_runtime import RecordingTurtle, Segment
+from js_generator import JavaScriptGenerator, runtime_source
+
+TOKEN = re.compile(r'\s*(?:("(?:[^"\\]|\\.)*")|(\d+\.?\d*(?:e[-+]?\d+)?)|([^\W\d]\w*)'
+                   r'|(===|!==|\*\*|\+\+|<=|>=|[-+*/%<>=!(){}\[\],;.]))')
+SPELLING = {'===': '==', '!==': '!=', '!': 'not', 'true': 'True', 'false': 'False'}
+
+FOR = re.compile(r'for \(let (\w+) = (-?\d+); \1 < (-?\d+); \1\+\+\) \{$')
+FUNCTION = re.compile(r'function (\w+)\(([\w, ]*)\) \{$')
+
+def expression(text: str) -> str:
+    """A JavaScript expression from the generator, in Python."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"can't read JavaScript at: {text[position:]}")
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return ' '.join(SPELLING.get(token, token) for token in tokens)
+
+def to_python(program: str) -> str:
+    """Python for the program part of the js target's output."""
+    code = []
+    depth = 0
+    empty = False  # the block just opened has no statements yet
+
+    def emit(line: str, opens: bool = False):
+        nonlocal depth, empty
+        code.append('    ' * depth + line)
+        empty = opens
+        if opens:
+            depth += 1
+
+    def close():
+        nonlocal depth, empty
+        if empty:
+            code.append('    ' * depth + 'pass')
+            empty = False
+        depth -= 1
+
+    for number, line in enumerate(program.split('\n'), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line == '}':
+            close()
+        elif line == '} else {':
+            close()
+            emit('else:', True)
+        elif line.startswith('let '):
+            continue  # Python makes assigned names local by itself
+        elif FUNCTION.match(line):
+            name, parameters = FUNCTION.match(line).groups()
+            emit(f"def {name}({parameters}):", True)
+        elif FOR.match(line):
+            counter, start, end = FOR.match(line).groups()
+            emit(f"for {counter} in range({start}, {end}):", True)
+        elif line.startswith(('if (', 'while (')) and line.endswith(') {'):
+            keyword, _, condition = line[:-3].partition(' (')
+            emit(f"{keyword} {expression(condition)}:", True)
+        elif line.endswith(';'):
+            emit(expression(line[:-1]))
+        else:
+            raise ValueError(f"line {number}: not something the js target writes: {line}")
+    if depth:
+        raise ValueError("unbalanced braces")
+    return '\n'.join(code)
+
+def stand_in(turtle: RecordingTurtle, printed: List[str], inputs: Sequence = ()) -> types.SimpleNamespace:
+    """The `mesel` runtime object, in Python, answering ጠይቅ from inputs."""
+    channel = mesel_runtime.ListInput(inputs)
+    def run(main, drawing=True):
+        if drawing:
+            main(turtle)
+        else:
+            main()
+    return types.SimpleNamespace(
+        run=run, show=lambda value: printed.append(str(value)),
+        ask=lambda prompt=None: mesel_runtime.input_value(channel.read(prompt)),
+        mod=lambda a, b: a % b, div=lambda a, b: a / b,
+        add=lambda a, b: a + b, sub=lambda a, b: a - b, mul=lambda a, b: a * b,
+        pow=lambda a, b: a ** b, neg=lambda a: -a,
+        eq=lambda a, b: a == b, ne=lambda a, b: a != b,
+        at=lambda values, index: values[index],
+        vector=mesel_lists.vector, length=mesel_lists.length, total=mesel_lists.total,
+        smallest=mesel_lists.smallest, largest=mesel_lists.largest, span=mesel_lists.span)
+
+def replay(javascript: str, inputs: Sequence = ()) -> Tuple[List[Segment], List[str]]:
+    """Run the js target's output and return what it drew and printed."""
+    runtime = runtime_source().rstrip('\n')
+    if not javascript.startswith(runtime):
+        raise ValueError("not the output of the js target, or built with another mesel_runtime.js")
+    turtle = RecordingTurtle()
+    printed = []
+    code = to_python(javascript[len(runtime):])
+    exec(compile(code, '<js>', 'exec'), {'mesel': stand_in(turtle, printed, inputs)})
+    return turtle.segments, printed
+
+def compare(path: str) -> Tuple[List[Segment], List[Segment]]:
+    """What the program at path draws when compiled to Python and to JavaScript."""
+    from raster import record_program
+    from instrumentation import Metrics
+    from translator import parse_source
+    with open(path, encoding='utf-8') as f:
+        ast = parse_source(f.read(), Metrics())
+    segments, _ = replay(JavaScriptGenerator().generate(ast))
+    return record_program(path), segments
+
+def main() -> int:
+    import argparse
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('programs', nargs='+', help='.mesel programs')
+    args = arg_parser.parse_args()
+    failed = 0
+    for path in args.programs:
+        python, javascript = compare(path)
+        if python == javascript:
+            print(f"same       {len(python):7d} segments  {path}")
+        else:
+            failed += 1
+            first = next((i for i, pair in enumerate(zip(python, javascript)) if pair[0] != pair[1]),
+                         min(len(python), len(javascript)))
+            print(f"DIFFERENT  {len(python):7d} / {len(javascript)} segments, first at {first}  {path}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
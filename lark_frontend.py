@@ -0,0 +1,233 @@
+"""Alternative Mesel front end built on a Lark LALR parser.
+
+The grammar lives in mesel.lark and is parsed with Lark's LALR(1) parser
+and contextual lexer. MeselTransformer runs inline while parsing (no parse
+tree is built) and produces the same parser.py nodes, with the same
+positions, as Lexer + Parser:
+
+    ast = parse_source(text)
+
+If a standalone parser generated with write_standalone() is importable as
+mesel_standalone, it is used instead and lark itself is not needed at run
+time. Otherwise the lark package (lark-parser in requirements.txt) is.
+"""
+import os
+import subprocess
+import sys
+import threading
+from typing import List, Optional
+from ast_nodes import NodeType
+from lexer import KEYWORDS, TokenType
+from parser import (Program, Block, VariableDeclaration, Assignment, BinaryOperation,
+                    UnaryOperation, Number, String, Identifier, Print, ForLoop, WhileLoop,
+                    IfStatement, Break, Continue, TurtleCommand, ColorCommand, WidthCommand,
+                    Import, Procedure, Return, Call, CallStatement, ListLiteral, Index, Input,
+                    Expression)
+
+GRAMMAR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mesel.lark')
+STANDALONE_MODULE = 'mesel_standalone'
+
+class MeselTransformer:
+    """Builds parser.py nodes from Lark rule matches.
+
+    This is a plain class rather than a lark.Transformer so that it also
+    works with the standalone parser, which ships its own Transformer.
+    """
+
+    def start(self, children) -> Program:
+        return Program(NodeType.PROGRAM, 1, 1, list(children))
+
+    def assignment(self, children) -> Assignment:
+        keyword, name, value = children
+        return Assignment(NodeType.ASSIGNMENT, keyword.line, keyword.column, str(name), value)
+
+    def declaration(self, children) -> VariableDeclaration:
+        keyword, name, value = children
+        return VariableDeclaration(NodeType.VARIABLE_DECLARATION, keyword.line, keyword.column,
+                                   str(name), TokenType.NUMBER_TYPE, value)
+
+    def block(self, children) -> Block:
+        keyword, body = children
+        return Block(NodeType.BLOCK, keyword.line, keyword.column, body.statements)
+
+    def body(self, children) -> Block:
+        # Like Parser.block, a body takes the position of its closing ጨርስ
+        end = children[-1]
+        return Block(NodeType.BLOCK, end.line, end.column, list(children[:-1]))
+
+    def counted_loop(self, children) -> ForLoop:
+        keyword, count, body = children
+        return ForLoop(NodeType.FOR_LOOP, keyword.line, keyword.column, None,
+                       Number(NodeType.NUMBER, count.line, count.column, 0),
+                       Number(NodeType.NUMBER, count.line, count.column, float(count)),
+                       body)
+
+    def range_loop(self, children) -> ForLoop:
+        keyword, variable, start, end, body = children
+        return ForLoop(NodeType.FOR_LOOP, keyword.line, keyword.column, str(variable), start, end, body)
+
+    def while_loop(self, children) -> WhileLoop:
+        keyword, condition, body = children
+        return WhileLoop(NodeType.WHILE_LOOP, keyword.line, keyword.column, condition, body)
+
+    def if_statement(self, children) -> IfStatement:
+        keyword, condition, body = children[:3]
+        # [ELSE body] is absent or two None placeholders, depending on lark's options
+        else_body = children[4] if len(children) > 4 else None
+        return IfStatement(NodeType.IF_STATEMENT, keyword.line, keyword.column, condition, body, else_body)
+
+    def break_statement(self, children) -> Break:
+        return Break(NodeType.BREAK, children[0].line, children[0].column)
+
+    def continue_statement(self, children) -> Continue:
+        return Continue(NodeType.CONTINUE, children[0].line, children[0].column)
+
+    def print_statement(self, children) -> Print:
+        keyword, value = children
+        return Print(NodeType.PRINT, keyword.line, keyword.column, value)
+
+    def turtle_command(self, children) -> TurtleCommand:
+        keyword = children[0]
+        argument = children[1] if len(children) > 1 else None
+        return TurtleCommand(NodeType.TURTLE_COMMAND, keyword.line, keyword.column,
+                             TokenType(str(keyword)), argument)
+
+    def color_command(self, children) -> ColorCommand:
+        keyword, color = children
+        return ColorCommand(NodeType.COLOR_COMMAND, keyword.line, keyword.column, TokenType(str(color)))
+
+    def width_command(self, children) -> WidthCommand:
+        keyword, width = children
+        return WidthCommand(NodeType.WIDTH_COMMAND, keyword.line, keyword.column, width)
+
+    def import_statement(self, children) -> Import:
+        keyword, path = children
+        return Import(NodeType.IMPORT, keyword.line, keyword.column, str(path)[1:-1])
+
+    def procedure(self, children) -> Procedure:
+        keyword, name = children[:2]
+        parameters = children[2] if len(children) > 3 else []
+        return Procedure(NodeType.PROCEDURE, keyword.line, keyword.column, str(name), parameters, children[-1])
+
+    def parameters(self, children) -> List[str]:
+        return [str(name) for name in children]
+
+    def return_statement(self, children) -> Return:
+        value = children[1] if len(children) > 1 else None
+        return Return(NodeType.RETURN, children[0].line, children[0].column, value)
+
+    def call_statement(self, children) -> CallStatement:
+        call = children[0]
+        return CallStatement(NodeType.CALL_STATEMENT, call.line, call.column, call)
+
+    def call(self, children) -> Call:
+        name = children[0]
+        arguments = children[1] if len(children) > 1 else []
+        return Call(NodeType.CALL, name.line, name.column, str(name), arguments)
+
+    def arguments(self, children) -> List[Expression]:
+        return list(children)
+
+    def binary_chain(self, children) -> Expression:
+        # [operand, op, operand, op, operand ...] folded to the left, as the
+        # loops in Parser.term/factor/... do
+        expr = children[0]
+        for i in range(1, len(children), 2):
+            right = children[i + 1]
+            expr = BinaryOperation(NodeType.BINARY_OPERATION, expr.line, expr.column,
+                                   expr, TokenType(str(children[i])), right)
+        return expr
+
+    equality = comparison = term = factor = power = binary_chain
+
+    def unary(self, children) -> UnaryOperation:
+        operator, operand = children
+        return UnaryOperation(NodeType.UNARY_OPERATION, operator.line, operator.column,
+                              TokenType(str(operator)), operand)
+
+    def list_literal(self, children) -> ListLiteral:
+        start = children[0]
+        elements = children[1] if len(children) > 1 else []
+        return ListLiteral(NodeType.LIST, start.line, start.column, elements)
+
+    def index(self, children) -> Index:
+        target, index = children
+        return Index(NodeType.INDEX, target.line, target.column, target, index)
+
+    def input(self, children) -> Input:
+        keyword = children[0]
+        prompt = str(children[1])[1:-1] if len(children) > 1 else None
+        return Input(NodeType.INPUT, keyword.line, keyword.column, prompt)
+
+    def number(self, children) -> Number:
+        token = children[0]
+        return Number(NodeType.NUMBER, token.line, token.column, float(token))
+
+    def string(self, children) -> String:
+        token = children[0]
+        return String(NodeType.STRING, token.line, token.column, str(token)[1:-1])
+
+    def identifier(self, children) -> Identifier:
+        token = children[0]
+        return Identifier(NodeType.IDENTIFIER, token.line, token.column, str(token))
+
+def reject_keyword(token):
+    # The contextual lexer only looks for the terminals the parser can accept
+    # next, so a keyword in the wrong place would otherwise become a name.
+    if str(token) in KEYWORDS:
+        raise Exception(f'Error at line {token.line}, column {token.column}: '
+                        f'unexpected keyword {token}')
+    return token
+
+_parser = None
+_parser_lock = threading.Lock()
+
+def get_parser():
+    """Build the LALR parser once, preferring a generated standalone module.
+
+    The parser keeps no state between parses, so threads share it.
+    """
+    global _parser
+    if _parser is not None:
+        return _parser
+    with _parser_lock:
+        if _parser is None:
+            _parser = build_parser()
+    return _parser
+
+def build_parser():
+    transformer = MeselTransformer()
+    try:
+        standalone = __import__(STANDALONE_MODULE)
+    except ImportError:
+        standalone = None
+    if standalone is not None:
+        return standalone.Lark_StandAlone(transformer=transformer,
+                                          lexer_callbacks={'IDENTIFIER': reject_keyword})
+    from lark import Lark
+    with open(GRAMMAR_FILE, encoding='utf-8') as f:
+        grammar = f.read()
+    return Lark(grammar, parser='lalr', lexer='contextual', transformer=transformer,
+                maybe_placeholders=False, lexer_callbacks={'IDENTIFIER': reject_keyword})
+
+def parse_source(text: str) -> Program:
+    """Parse Mesel source into a parser.Program using the Lark grammar."""
+    parser = get_parser()
+    try:
+        return parser.parse(text)
+    except Exception as e:
+        line = getattr(e, 'line', None)
+        if line is None:
+            raise
+        raise Exception(f'Error at line {line}, column {e.column}: {str(e).splitlines()[0]}') from None
+
+def write_standalone(path: Optional[str] = None):
+    """Generate mesel_standalone.py, a parser that doesn't need lark installed."""
+    if path is None:
+        path = os.path.join(os.path.dirname(GRAMMAR_FILE), STANDALONE_MODULE + '.py')
+    subprocess.run([sys.executable, '-m', 'lark.tools.standalone', '--lexer', 'contextual',
+                    '--out', path, GRAMMAR_FILE], check=True)
+    return path
+
+if __name__ == '__main__':
+    print(f"Wrote {write_standalone(sys.argv[1] if len(sys.argv) > 1 else None)}")
@@ -1,5 +1,9 @@
 from enum import Enum
+import os
 import re
+from array import array
+from itertools import repeat
+from types import MappingProxyType
 from typing import List, NamedTuple
 
 class TokenType(Enum):
@@ -37,6 +41,10 @@ class TokenType(Enum):
     # Variables and Operations
     ASSIGN = 'አስቀምጥ'    # askemT
     PRINT = 'ያሳይ'       # yasay
+    IMPORT = 'አስገባ'     # asgeba
+    PROCEDURE = 'ተግባር'  # tegbar
+    RETURN = 'መልስ'      # mels
+    INPUT = 'ጠይቅ'       # teyq
     ADD = 'ደምር'        # demr
     SUBTRACT = 'ቀንስ'    # kens
     MULTIPLY = 'አባዛ'    # abaza
@@ -74,6 +82,8 @@ class TokenType(Enum):
     RPAREN = ')'
     LBRACE = '{'
     RBRACE = '}'
+    LBRACKET = '['
+    RBRACKET = ']'
     COMMA = ','
     NEWLINE = 'NEWLINE'
     EOF = 'EOF'
@@ -84,53 +94,61 @@ class Token(NamedTuple):
     line: int
     column: int
 
+# Keyword spellings, shared by every Lexer and read-only so lexers can run
+# in many threads at once
+KEYWORDS = MappingProxyType({
+    'ጀምር': TokenType.BEGIN,
+    'ጨርስ': TokenType.END,
+    'እድግ': TokenType.FOR,
+    'ከሆነ': TokenType.IF,
+    'ካልሆነ': TokenType.ELSE,
+    'ድገም': TokenType.WHILE,
+    'ተው': TokenType.BREAK,
+    'ቀጥል': TokenType.CONTINUE,
+    'ቁጥር': TokenType.NUMBER_TYPE,
+    'ፊደል': TokenType.STRING_TYPE,
+    'እውነት': TokenType.BOOL_TYPE,
+    'ሂድ': TokenType.FORWARD,
+    'ዙር': TokenType.TURN,
+    'ስዕል_ጀምር': TokenType.PEN_DOWN,
+    'ስዕል_አቁም': TokenType.PEN_UP,
+    'ቀለም': TokenType.COLOR,
+    'ስፋት': TokenType.WIDTH,
+    'ቀይ': TokenType.RED,
+    'አረንጓዴ': TokenType.GREEN,
+    'ሰማያዊ': TokenType.BLUE,
+    'ቢጫ': TokenType.YELLOW,
+    'ጥቁር': TokenType.BLACK,
+    'ነጭ': TokenType.WHITE,
+    'አስቀምጥ': TokenType.ASSIGN,
+    'ያሳይ': TokenType.PRINT,
+    'አስገባ': TokenType.IMPORT,
+    'ተግባር': TokenType.PROCEDURE,
+    'መልስ': TokenType.RETURN,
+    'ጠይቅ': TokenType.INPUT,
+    'ደምር': TokenType.ADD,
+    'ቀንስ': TokenType.SUBTRACT,
+    'አባዛ': TokenType.MULTIPLY,
+    'ክፈል': TokenType.DIVIDE,
+    'ቀሪ': TokenType.MODULO,
+    'ደረጃ': TokenType.POWER,
+    'ጨምር': TokenType.INCREMENT,
+    'ቀንስ': TokenType.DECREMENT,
+    'እና': TokenType.AND,
+    'ወይም': TokenType.OR,
+    'አይደለም': TokenType.NOT
+})
+
 class Lexer:
-    def __init__(self, text: str):
+    keywords = KEYWORDS
+
+    def __init__(self, text: str, line: int = 1):
+        # line: the line text starts on, when it is a piece of a larger file
         self.text = text
         self.pos = 0
         self.current_char = self.text[0] if text else None
-        self.line = 1
+        self.line = line
         self.column = 1
-        
-        # Create keywords dictionary
-        self.keywords = {
-            'ጀምር': TokenType.BEGIN,
-            'ጨርስ': TokenType.END,
-            'እድግ': TokenType.FOR,
-            'ከሆነ': TokenType.IF,
-            'ካልሆነ': TokenType.ELSE,
-            'ድገም': TokenType.WHILE,
-            'ተው': TokenType.BREAK,
-            'ቀጥል': TokenType.CONTINUE,
-            'ቁጥር': TokenType.NUMBER_TYPE,
-            'ፊደል': TokenType.STRING_TYPE,
-            'እውነት': TokenType.BOOL_TYPE,
-            'ሂድ': TokenType.FORWARD,
-            'ዙር': TokenType.TURN,
-            'ስዕል_ጀምር': TokenType.PEN_DOWN,
-            'ስዕል_አቁም': TokenType.PEN_UP,
-            'ቀለም': TokenType.COLOR,
-            'ስፋት': TokenType.WIDTH,
-            'ቀይ': TokenType.RED,
-            'አረንጓዴ': TokenType.GREEN,
-            'ሰማያዊ': TokenType.BLUE,
-            'ቢጫ': TokenType.YELLOW,
-            'ጥቁር': TokenType.BLACK,
-            'ነጭ': TokenType.WHITE,
-            'አስቀምጥ': TokenType.ASSIGN,
-            'ያሳይ': TokenType.PRINT,
-            'ደምር': TokenType.ADD,
-            'ቀንስ': TokenType.SUBTRACT,
-            'አባዛ': TokenType.MULTIPLY,
-            'ክፈል': TokenType.DIVIDE,
-            'ቀሪ': TokenType.MODULO,
-            'ደረጃ': TokenType.POWER,
-            'ጨምር': TokenType.INCREMENT,
-            'ቀንስ': TokenType.DECREMENT,
-            'እና': TokenType.AND,
-            'ወይም': TokenType.OR,
-            'አይደለም': TokenType.NOT
-        }
     
     def error(self):
         raise Exception(f'Invalid character {self.current_char} at line {self.line}, column {self.column}')
@@ -163,6 +181,7 @@ class Lexer:
     
     def string(self) -> Token:
         result = ''
+        token_line = self.line
         token_column = self.column
         self.advance()  # Skip opening quote
         
@@ -175,7 +194,7 @@ class Lexer:
         else:
             raise Exception(f'Unterminated string at line {self.line}, column {token_column}')
         
-        return Token(TokenType.STRING, result, self.line, token_column)
+        return Token(TokenType.STRING, result, token_line, token_column)
     
     def identifier(self) -> Token:
         result = ''
@@ -208,143 +227,106 @@ class Lexer:
             
             # Numbers
             if self.current_char.isdigit():
-                token = self.number()
-                print(f"Found number token: {token}")
-                return token
+                return self.number()
             
             # Strings
             if self.current_char == '"':
-                token = self.string()
-                print(f"Found string token: {token}")
-                return token
+                return self.string()
             
             # Identifiers and keywords
             if self.current_char.isalpha() or self.is_amharic(self.current_char):
-                token = self.identifier()
-                print(f"Found identifier token: {token}")
-                return token
+                return self.identifier()
             
             # Two-character operators
             if self.current_char == '=' and self.peek() == '=':
                 self.advance()
                 self.advance()
-                token = Token(TokenType.EQUALS, '==', self.line, self.column - 2)
-                print(f"Found equals token: {token}")
-                return token
+                return Token(TokenType.EQUALS, '==', self.line, self.column - 2)
             
             if self.current_char == '!' and self.peek() == '=':
                 self.advance()
                 self.advance()
-                token = Token(TokenType.NOT_EQUALS, '!=', self.line, self.column - 2)
-                print(f"Found not equals token: {token}")
-                return token
+                return Token(TokenType.NOT_EQUALS, '!=', self.line, self.column - 2)
             
             if self.current_char == '>' and self.peek() == '=':
                 self.advance()
                 self.advance()
-                token = Token(TokenType.GREATER_EQUALS, '>=', self.line, self.column - 2)
-                print(f"Found greater equals token: {token}")
-                return token
+                return Token(TokenType.GREATER_EQUALS, '>=', self.line, self.column - 2)
             
             if self.current_char == '<' and self.peek() == '=':
                 self.advance()
                 self.advance()
-                token = Token(TokenType.LESS_EQUALS, '<=', self.line, self.column - 2)
-                print(f"Found less equals token: {token}")
-                return token
+                return Token(TokenType.LESS_EQUALS, '<=', self.line, self.column - 2)
             
             # Single-character operators
             if self.current_char == '=':
                 self.advance()
-                token = Token(TokenType.ASSIGN_OP, '=', self.line, self.column - 1)
-                print(f"Found assign token: {token}")
-                return token
+                return Token(TokenType.ASSIGN_OP, '=', self.line, self.column - 1)
             
             if self.current_char == '+':
                 self.advance()
-                token = Token(TokenType.PLUS, '+', self.line, self.column - 1)
-                print(f"Found plus token: {token}")
-                return token
+                return Token(TokenType.PLUS, '+', self.line, self.column - 1)
             
             if self.current_char == '-':
                 self.advance()
-                token = Token(TokenType.MINUS, '-', self.line, self.column - 1)
-                print(f"Found minus token: {token}")
-                return token
+                return Token(TokenType.MINUS, '-', self.line, self.column - 1)
             
             if self.current_char == '*':
                 if self.peek() == '*':
                     self.advance()
                     self.advance()
-                    token = Token(TokenType.POWER_OP, '**', self.line, self.column - 2)
-                    print(f"Found power token: {token}")
-                    return token
+                    return Token(TokenType.POWER_OP, '**', self.line, self.column - 2)
                 self.advance()
-                token = Token(TokenType.TIMES, '*', self.line, self.column - 1)
-                print(f"Found times token: {token}")
-                return token
+                return Token(TokenType.TIMES, '*', self.line, self.column - 1)
             
             if self.current_char == '/':
                 self.advance()
-                token = Token(TokenType.DIVIDE_OP, '/', self.line, self.column - 1)
-                print(f"Found divide token: {token}")
-                return token
+                return Token(TokenType.DIVIDE_OP, '/', self.line, self.column - 1)
             
             if self.current_char == '%':
                 self.advance()
-                token = Token(TokenType.MODULO_OP, '%', self.line, self.column - 1)
-                print(f"Found modulo token: {token}")
-                return token
+                return Token(TokenType.MODULO_OP, '%', self.line, self.column - 1)
             
             if self.current_char == '(':
                 self.advance()
-                token = Token(TokenType.LPAREN, '(', self.line, self.column - 1)
-                print(f"Found lparen token: {token}")
-                return token
+                return Token(TokenType.LPAREN, '(', self.line, self.column - 1)
             
             if self.current_char == ')':
                 self.advance()
-                token = Token(TokenType.RPAREN, ')', self.line, self.column - 1)
-                print(f"Found rparen token: {token}")
-                return token
+                return Token(TokenType.RPAREN, ')', self.line, self.column - 1)
             
             if self.current_char == '{':
                 self.advance()
-                token = Token(TokenType.LBRACE, '{', self.line, self.column - 1)
-                print(f"Found lbrace token: {token}")
-                return token
+                return Token(TokenType.LBRACE, '{', self.line, self.column - 1)
             
             if self.current_char == '}':
                 self.advance()
-                token = Token(TokenType.RBRACE, '}', self.line, self.column - 1)
-                print(f"Found rbrace token: {token}")
-                return token
+                return Token(TokenType.RBRACE, '}', self.line, self.column - 1)
+            
+            if self.current_char == '[':
+                self.advance()
+                return Token(TokenType.LBRACKET, '[', self.line, self.column - 1)
+            
+            if self.current_char == ']':
+                self.advance()
+                return Token(TokenType.RBRACKET, ']', self.line, self.column - 1)
             
             if self.current_char == ',':
                 self.advance()
-                token = Token(TokenType.COMMA, ',', self.line, self.column - 1)
-                print(f"Found comma token: {token}")
-                return token
+                return Token(TokenType.COMMA, ',', self.line, self.column - 1)
             
             if self.current_char == '>':
                 self.advance()
-                token = Token(TokenType.GREATER, '>', self.line, self.column - 1)
-                print(f"Found greater token: {token}")
-                return token
+                return Token(TokenType.GREATER, '>', self.line, self.column - 1)
             
             if self.current_char == '<':
                 self.advance()
-                token = Token(TokenType.LESS, '<', self.line, self.column - 1)
-                print(f"Found less token: {token}")
-                return token
+                return Token(TokenType.LESS, '<', self.line, self.column - 1)
             
             if self.current_char == '\n':
                 self.advance()
-                token = Token(TokenType.NEWLINE, '\n', self.line, self.column - 1)
-                print(f"Found newline token: {token}")
-                return token
+                return Token(TokenType.NEWLINE, '\n', self.line, self.column - 1)
             
-            print(f"Invalid character: {self.current_char} at line {self.line}, column {self.column}")
             self.error()
         
         return Token(TokenType.EOF, '', self.line, self.column)
@@ -364,6 +346,74 @@ class Lexer:
                 break
         return tokens
 
+# Sources shorter than this are lexed in one piece by tokenize_parallel
+MIN_CHUNK = 1 << 20  # characters
+
+TOKEN_TYPES = tuple(TokenType)
+TYPE_INDEX = {token_type: i for i, token_type in enumerate(TOKEN_TYPES)}
+
+# Everything in which a newline doesn't end a token: strings (unterminated
+# ones run to the end) and comments, which are the only places a quote
+# doesn't start a string
+STRING_OR_COMMENT = re.compile(r'"[^"]*"?|#[^\n]*')
+
+def chunk_starts(text: str, chunks: int) -> List[int]:
+    """Offsets that cut text into about `chunks` pieces, each starting a line
+    outside any string literal."""
+    starts = [0]
+    scanned = 0  # text before this has been checked for strings and comments
+    for i in range(1, chunks):
+        newline = text.find('\n', max(len(text) * i // chunks, scanned, starts[-1]))
+        while newline != -1:
+            match = STRING_OR_COMMENT.search(text, scanned)
+            if match is None or match.start() > newline:
+                break
+            scanned = match.end()
+            if scanned > newline:
+                # Inside a string: take the first newline after it instead
+                newline = text.find('\n', scanned)
+        if newline == -1 or newline + 1 >= len(text):
+            break
+        starts.append(newline + 1)
+    return starts
+
+def lex_chunk(text: str, line: int):
+    """Tokens of one chunk, as compact columns that are quick to pickle."""
+    tokens = Lexer(text, line).tokenize()
+    return (bytes(TYPE_INDEX[token.type] for token in tokens), [token.value for token in tokens],
+            array('i', (token.line for token in tokens)), array('i', (token.column for token in tokens)))
+
+def tokenize_parallel(text: str, workers: int = None) -> List[Token]:
+    """Lexer(text).tokenize(), with the work split over `workers` processes.
+
+    The source is cut at newlines outside string literals, so every chunk
+    starts a line at column 1; each chunk's lexer starts counting at the
+    line the chunk starts on, and the token lists are joined in order,
+    dropping every EOF but the last. Tokens, positions and the first error
+    raised are the same as lexing serially.
+    """
+    workers = workers or os.cpu_count() or 1
+    starts = chunk_starts(text, min(workers, len(text) // MIN_CHUNK))
+    if len(starts) == 1:
+        return Lexer(text).tokenize()
+    from concurrent.futures import ProcessPoolExecutor
+    ends = starts[1:] + [len(text)]
+    lines = [1]
+    for start, end in zip(starts, ends[:-1]):
+        lines.append(lines[-1] + text.count('\n', start, end))
+    tokens = []
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(lex_chunk, text[start:end], line)
+                   for start, end, line in zip(starts, ends, lines)]
+        for future in futures:
+            types, values, token_lines, columns = future.result()
+            if tokens:
+                tokens.pop()  # the previous chunk's EOF
+            # tuple.__new__ builds the Tokens in C, without Token.__new__
+            tokens.extend(map(tuple.__new__, repeat(Token),
+                              zip(map(TOKEN_TYPES.__getitem__, types), values, token_lines, columns)))
+    return tokens
+
 # Example usage
 if __name__ == "__main__":
     # Test the lexer
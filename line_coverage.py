@@ -0,0 +1,175 @@
+"""Mesel line and branch coverage built on sys.monitoring (Python 3.12+).
+
+Only the code objects of the generated program are instrumented. A LINE
+event returns sys.monitoring.DISABLE the first time it fires, so a line
+costs one callback however often it runs. A branch at a ከሆነ stays enabled
+until both of its directions have been seen and is disabled after that.
+
+    generator = CodeGenerator()
+    code = generator.generate(ast)
+    coverage = run_with_coverage(code, generator)
+    coverage.missed_lines()        # Mesel lines that never ran
+    coverage.missed_branches()     # [(line, 'then' | 'else'), ...]
+    coverage.to_bytes()            # compact bitmap for storing per submission
+"""
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from code_generator import CodeGenerator
+
+TOOL_NAME = 'mesel-coverage'
+
+@dataclass
+class Coverage:
+    lines: List[int]                   # Mesel lines that can be covered, in order
+    line_bits: bytearray               # bit i is set once lines[i] has run
+    branches: List[Tuple[int, str]]    # (line of the ከሆነ, 'then' or 'else')
+    branch_bits: bytearray
+
+    @staticmethod
+    def empty(lines: List[int], branches: List[Tuple[int, str]]) -> 'Coverage':
+        return Coverage(lines, bytearray((len(lines) + 7) // 8),
+                        branches, bytearray((len(branches) + 7) // 8))
+
+    @staticmethod
+    def is_set(bits: bytearray, index: int) -> bool:
+        return bool(bits[index >> 3] & (1 << (index & 7)))
+
+    def covered_lines(self) -> List[int]:
+        return [line for i, line in enumerate(self.lines) if self.is_set(self.line_bits, i)]
+
+    def missed_lines(self) -> List[int]:
+        return [line for i, line in enumerate(self.lines) if not self.is_set(self.line_bits, i)]
+
+    def covered_branches(self) -> List[Tuple[int, str]]:
+        return [branch for i, branch in enumerate(self.branches) if self.is_set(self.branch_bits, i)]
+
+    def missed_branches(self) -> List[Tuple[int, str]]:
+        return [branch for i, branch in enumerate(self.branches) if not self.is_set(self.branch_bits, i)]
+
+    def to_bytes(self) -> bytes:
+        """Line count, branch count (two bytes each) and both bitmaps."""
+        return (len(self.lines).to_bytes(2, 'big') + len(self.branches).to_bytes(2, 'big')
+                + bytes(self.line_bits) + bytes(self.branch_bits))
+
+    def report(self) -> str:
+        covered = len(self.covered_lines())
+        taken = len(self.covered_branches())
+        text = [f"lines {covered}/{len(self.lines)}, branches {taken}/{len(self.branches)}"]
+        if self.missed_lines():
+            text.append("missed lines: " + ", ".join(map(str, self.missed_lines())))
+        if self.missed_branches():
+            text.append("missed branches: " + ", ".join(f"{line} {side}" for line, side in self.missed_branches()))
+        return "\n".join(text)
+
+def branch_bodies(code: str, generator: CodeGenerator) -> Dict[int, Tuple[range, range]]:
+    """Map each generated `if` line to the line ranges of its then and else bodies."""
+    lines = code.split('\n')
+
+    def indent_of(number: int) -> int:
+        line = lines[number - 1]
+        return len(line) - len(line.lstrip())
+
+    def body_end(start: int, indent: int) -> int:
+        end = start
+        while end < len(lines) and (not lines[end].strip() or indent_of(end + 1) > indent):
+            end += 1
+        return end
+
+    bodies = {}
+    for number, location in generator.source_map.items():
+        if location.kind != 'IF_STATEMENT':
+            continue
+        indent = indent_of(number)
+        then_end = body_end(number, indent)
+        else_body = range(0)
+        if then_end < len(lines) and lines[then_end].strip() == 'else:':
+            else_body = range(then_end + 2, body_end(then_end + 1, indent) + 1)
+        bodies[number] = (range(number + 1, then_end + 1), else_body)
+    return bodies
+
+def code_objects(code):
+    yield code
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            yield from code_objects(const)
+
+def run_with_coverage(code: str, generator: CodeGenerator, filename: str = '<mesel>') -> Coverage:
+    """Run generated code once and return which Mesel lines and branches it reached."""
+    if sys.version_info < (3, 12):
+        raise RuntimeError("Mesel coverage needs Python 3.12 or newer (sys.monitoring)")
+    monitoring = sys.monitoring
+    events = monitoring.events
+
+    # A ተግባር header runs as the module body defines the function, before
+    # monitoring starts, so only the statements in procedures are counted
+    source_map = {generated: location for generated, location in generator.source_map.items()
+                  if location.kind != 'PROCEDURE'}
+    lines = sorted({location.line for location in source_map.values()})
+    line_index = {generated: lines.index(location.line) for generated, location in source_map.items()}
+    bodies = branch_bodies(code, generator)
+    branches = []
+    for header in sorted(bodies):
+        branches.append((source_map[header].line, 'then'))
+        branches.append((source_map[header].line, 'else'))
+    coverage = Coverage.empty(lines, branches)
+    branch_index = {header: 2 * i for i, header in enumerate(sorted(bodies))}
+
+    def on_line(code_object, line_number):
+        index = line_index.get(line_number)
+        if index is not None:
+            coverage.line_bits[index >> 3] |= 1 << (index & 7)
+        return monitoring.DISABLE
+
+    line_of = {}
+
+    def on_branch(code_object, instruction_offset, destination_offset):
+        offsets = line_of.get(code_object)
+        if offsets is None:
+            offsets = line_of[code_object] = {start: line for start, end, line in code_object.co_lines()
+                                              for start in range(start, end, 2)}
+        header = offsets.get(instruction_offset)
+        if header not in bodies:
+            return monitoring.DISABLE  # a loop condition, not a ከሆነ
+        then_body, else_body = bodies[header]
+        index = branch_index[header] + (0 if offsets.get(destination_offset) in then_body else 1)
+        coverage.branch_bits[index >> 3] |= 1 << (index & 7)
+        other = index ^ 1
+        if coverage.is_set(coverage.branch_bits, other):
+            return monitoring.DISABLE
+        return None
+
+    # Python 3.14 splits BRANCH into BRANCH_LEFT and BRANCH_RIGHT
+    branch_events = [getattr(events, name) for name in ('BRANCH_LEFT', 'BRANCH_RIGHT')
+                     if hasattr(events, name)] or [events.BRANCH]
+    wanted = events.LINE
+    for event in branch_events:
+        wanted |= event
+
+    module = compile(code, filename, 'exec')
+    namespace = {'__name__': '__mesel__', '__file__': filename}
+    exec(module, namespace)
+
+    tool = monitoring.COVERAGE_ID
+    monitoring.use_tool_id(tool, TOOL_NAME)
+    try:
+        monitoring.register_callback(tool, events.LINE, on_line)
+        for event in branch_events:
+            monitoring.register_callback(tool, event, on_branch)
+        for code_object in code_objects(module):
+            if code_object is not module:
+                monitoring.set_local_events(tool, code_object, wanted)
+        if generator.features:
+            import mesel_runtime
+            mesel_runtime.run(namespace['main'], 'turtle' in generator.features)
+        else:
+            namespace['main']()
+    finally:
+        for code_object in code_objects(module):
+            if code_object is not module:
+                monitoring.set_local_events(tool, code_object, 0)
+        monitoring.register_callback(tool, events.LINE, None)
+        for event in branch_events:
+            monitoring.register_callback(tool, event, None)
+        monitoring.free_tool_id(tool)
+    return coverage
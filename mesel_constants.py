@@ -0,0 +1,18 @@
+"""Names the compiler and mesel_runtime share.
+
+Importing mesel_runtime picks a backend, so the compiler takes these from
+here instead and translating doesn't depend on MESEL_BACKEND.
+"""
+
+# Mesel color keywords and the Tk color names they draw with
+COLORS = {
+    'ቀይ': 'red',
+    'አረንጓዴ': 'green',
+    'ሰማያዊ': 'blue',
+    'ቢጫ': 'yellow',
+    'ጥቁር': 'black',
+    'ነጭ': 'white',
+}
+
+# Compiled imported modules, next to the program that imports them
+CACHE_DIR = '__mesel_cache__'
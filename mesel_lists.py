@@ -0,0 +1,159 @@
+"""Numeric lists for generated Mesel programs.
+
+A list literal compiles to vector([...]) and the list builtins compile to
+the functions below:
+
+    ብዛት(ሀ)      length(ሀ)
+    ድምር(ሀ)      total(ሀ)
+    ትንሹ(ሀ)      smallest(ሀ)
+    ትልቁ(ሀ)      largest(ሀ)
+    ክልል(a, b)   span(a, b)    the numbers a, a + 1, ... below b (a is 0 if left out)
+
+A Vector holds float64 numbers in a NumPy array when NumPy is installed
+and in an array.array('d') otherwise. `+ - * / % **` work element-wise
+between two lists of the same length or a list and a number, so whole-list
+arithmetic runs in NumPy (or a single C-level loop) rather than once per
+element in Mesel. Lists are immutable, which also makes them hashable, so
+memoized procedures can take them. Set MESEL_NUMPY=0 to use array.array
+even when NumPy is available.
+"""
+import math
+import operator
+import os
+from array import array
+from itertools import repeat
+
+numpy = None
+if os.environ.get('MESEL_NUMPY', '1') != '0':
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+class Vector:
+    __slots__ = ('data', 'hash')
+
+    def __init__(self, data):
+        self.data = data
+        self.hash = None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return (float(x) for x in self.data)
+
+    def __getitem__(self, index) -> float:
+        position = int(index)
+        if position != index or not 0 <= position < len(self.data):
+            raise IndexError(f"list index {index} is out of range for a list of {len(self.data)}")
+        return float(self.data[position])
+
+    def combine(self, other, op, reflected=False):
+        if isinstance(other, Vector):
+            if len(other.data) != len(self.data):
+                raise ValueError(f"lists of different lengths ({len(self.data)} and {len(other.data)})")
+            other = other.data
+        elif not isinstance(other, (int, float)):
+            return NotImplemented
+        left, right = (other, self.data) if reflected else (self.data, other)
+        if numpy is not None:
+            with numpy.errstate(divide='raise', invalid='raise'):
+                try:
+                    return Vector(op(left, right).astype(numpy.float64, copy=False))
+                except FloatingPointError as e:
+                    # Fail like plain numbers do instead of producing inf or nan
+                    raise ArithmeticError(f"list arithmetic: {e}") from None
+        # array.array has no element-wise arithmetic: one map() in C instead
+        left = left if isinstance(left, array) else repeat(left)
+        right = right if isinstance(right, array) else repeat(right)
+        return Vector(array('d', map(op, left, right)))
+
+    def __add__(self, other):
+        return self.combine(other, operator.add)
+
+    def __radd__(self, other):
+        return self.combine(other, operator.add, True)
+
+    def __sub__(self, other):
+        return self.combine(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self.combine(other, operator.sub, True)
+
+    def __mul__(self, other):
+        return self.combine(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self.combine(other, operator.mul, True)
+
+    def __truediv__(self, other):
+        return self.combine(other, operator.truediv)
+
+    def __rtruediv__(self, other):
+        return self.combine(other, operator.truediv, True)
+
+    def __mod__(self, other):
+        return self.combine(other, operator.mod)
+
+    def __rmod__(self, other):
+        return self.combine(other, operator.mod, True)
+
+    def __pow__(self, other):
+        return self.combine(other, operator.pow)
+
+    def __rpow__(self, other):
+        return self.combine(other, operator.pow, True)
+
+    def __neg__(self):
+        return self.combine(-1.0, operator.mul)
+
+    def __eq__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        if numpy is not None:
+            return bool(numpy.array_equal(self.data, other.data))
+        return self.data == other.data
+
+    def __hash__(self):
+        if self.hash is None:
+            self.hash = hash(self.data.tobytes())
+        return self.hash
+
+    def __str__(self) -> str:
+        return '[' + ', '.join(str(float(x)) for x in self.data) + ']'
+
+    __repr__ = __str__
+
+def vector(values: list) -> Vector:
+    """Build a list from the values of a list literal."""
+    for value in values:
+        if not isinstance(value, (int, float)):
+            raise TypeError(f"lists hold numbers, not {value}")
+    if numpy is not None:
+        return Vector(numpy.array(values, dtype=numpy.float64))
+    return Vector(array('d', values))
+
+def length(values: Vector) -> float:
+    return float(len(values))
+
+def total(values: Vector) -> float:
+    return float(values.data.sum()) if numpy is not None else float(sum(values.data))
+
+def smallest(values: Vector) -> float:
+    if not len(values):
+        raise ValueError("ትንሹ of an empty list")
+    return float(values.data.min()) if numpy is not None else min(values.data)
+
+def largest(values: Vector) -> float:
+    if not len(values):
+        raise ValueError("ትልቁ of an empty list")
+    return float(values.data.max()) if numpy is not None else max(values.data)
+
+def span(start: float, stop: float = None) -> Vector:
+    if stop is None:
+        start, stop = 0, start
+    if numpy is not None:
+        return Vector(numpy.arange(start, stop, dtype=numpy.float64))
+    count = max(0, math.ceil(stop - start))
+    return Vector(array('d', (start + i for i in range(count))))
@@ -0,0 +1,335 @@
+// Runtime for Mesel programs compiled to JavaScript (translator.py --target js).
+//
+// js_generator.py copies this file to the top of every program it writes,
+// so the program runs in a page on its own. It mirrors mesel_runtime.py and
+// mesel_lists.py: the turtle moves exactly as HeadlessTurtle does and keeps
+// every segment it draws in mesel.segments, numbers print as Python prints
+// them, and % and / fail or round as they do in Python.
+//
+// In a page the program draws on <canvas id="mesel-canvas"> and prints to
+// <pre id="mesel-output">, adding them to the page if they aren't there.
+// Without a page (e.g. under Node) it draws nothing and prints to the console.
+// ጠይቅ asks with prompt() in a page and reads lines of stdin under Node.
+const mesel = (() => {
+    'use strict';
+
+    const SCREEN_WIDTH = 800;
+    const SCREEN_HEIGHT = 600;
+    const BACKGROUND = 'white';
+    const PEN_COLOR = 'blue';
+    const PEN_WIDTH = 2;
+    const RADIANS = Math.PI / 180;  // math.radians multiplies by this too
+
+    const hasPage = typeof document !== 'undefined';
+
+    function element(tag, id) {
+        let node = document.getElementById(id);
+        if (node === null) {
+            node = document.createElement(tag);
+            node.id = id;
+            document.body.appendChild(node);
+        }
+        return node;
+    }
+
+    // Python's float %: the result takes the sign of the divisor
+    function mod(a, b) {
+        if (a instanceof Vector || b instanceof Vector) {
+            return combine(a, b, mod);
+        }
+        if (b === 0) {
+            throw new RangeError('float modulo');
+        }
+        let m = a % b;
+        if (m) {
+            if ((b < 0) !== (m < 0)) {
+                m += b;
+            }
+        } else {
+            m = b < 0 ? -0 : 0;
+        }
+        return m;
+    }
+
+    function div(a, b) {
+        if (a instanceof Vector || b instanceof Vector) {
+            return combine(a, b, div);
+        }
+        if (b === 0) {
+            throw new RangeError('float division by zero');
+        }
+        return a / b;
+    }
+
+    class Turtle {
+        constructor(context) {
+            this.context = context;
+            this.x = 0;
+            this.y = 0;
+            this.heading = 0;
+            this.drawing = true;
+            this.penColor = PEN_COLOR;
+            this.penWidth = PEN_WIDTH;
+            this.segments = [];
+            this.open = false;  // a path on the canvas that the next segment can extend
+        }
+
+        forward(distance) {
+            const angle = this.heading * RADIANS;
+            const x = this.x + distance * Math.cos(angle);
+            const y = this.y + distance * Math.sin(angle);
+            if (this.drawing) {
+                this.draw(this.x, this.y, x, y);
+            }
+            this.x = x;
+            this.y = y;
+        }
+
+        right(angle) {
+            this.heading = mod(this.heading - angle, 360);
+        }
+
+        left(angle) {
+            this.heading = mod(this.heading + angle, 360);
+        }
+
+        pendown() {
+            this.drawing = true;
+        }
+
+        penup() {
+            this.drawing = false;
+            this.flush();
+        }
+
+        color(name) {
+            this.penColor = name;
+            this.flush();
+        }
+
+        width(width) {
+            this.penWidth = width;
+            this.flush();
+        }
+
+        draw(x0, y0, x1, y1) {
+            this.segments.push([x0, y0, x1, y1, this.penColor, this.penWidth]);
+            const context = this.context;
+            if (context === null) {
+                return;
+            }
+            // One path for each run of the pen, stroked when the run ends.
+            // Canvas y grows downwards.
+            if (!this.open) {
+                context.beginPath();
+                context.strokeStyle = this.penColor;
+                context.lineWidth = this.penWidth;
+                context.moveTo(x0, -y0);
+                this.open = true;
+            }
+            context.lineTo(x1, -y1);
+        }
+
+        flush() {
+            if (this.open) {
+                this.context.stroke();
+                this.open = false;
+            }
+        }
+    }
+
+    function pythonNumber(x) {
+        if (!Number.isFinite(x)) {
+            return Number.isNaN(x) ? 'nan' : x > 0 ? 'inf' : '-inf';
+        }
+        if (Object.is(x, -0)) {
+            return '-0.0';
+        }
+        // Shortest digits that read back as x, then Python's layout for them
+        const [mantissa, power] = x.toExponential().split('e');
+        const exponent = Number(power);
+        const sign = mantissa.startsWith('-') ? '-' : '';
+        const digits = mantissa.replace('-', '').replace('.', '');
+        if (exponent < -4 || exponent >= 16) {
+            const tail = digits.length > 1 ? '.' + digits.slice(1) : '';
+            const magnitude = String(Math.abs(exponent)).padStart(2, '0');
+            return `${sign}${digits[0]}${tail}e${exponent < 0 ? '-' : '+'}${magnitude}`;
+        }
+        if (exponent < 0) {
+            return `${sign}0.${'0'.repeat(-exponent - 1)}${digits}`;
+        }
+        const whole = digits.slice(0, exponent + 1).padEnd(exponent + 1, '0');
+        return `${sign}${whole}.${digits.slice(exponent + 1) || '0'}`;
+    }
+
+    function format(value) {
+        if (typeof value === 'number') {
+            return pythonNumber(value);
+        }
+        if (typeof value === 'boolean') {
+            return value ? 'True' : 'False';
+        }
+        return String(value);
+    }
+
+    let output = null;
+
+    function show(value) {
+        const line = format(value);
+        if (output === null) {
+            console.log(line);
+        } else {
+            output.textContent += line + '\n';
+        }
+    }
+
+    // Answers that read as numbers, as NUMBER_TEXT in mesel_runtime.py
+    const NUMBER_TEXT = /^\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*$/;
+    let answers = null;  // the lines of stdin not read yet, under Node
+
+    function read(prompt) {
+        if (hasPage) {
+            const answer = window.prompt(prompt === undefined ? '' : prompt);
+            if (answer === null) {
+                throw new Error('ጠይቅ: no answer was given');
+            }
+            return answer;
+        }
+        if (answers === null) {
+            const text = require('fs').readFileSync(0, 'utf8');
+            answers = text ? text.replace(/\r?\n$/, '').split(/\r?\n/) : [];
+        }
+        if (prompt !== undefined) {
+            process.stdout.write(prompt);
+        }
+        if (!answers.length) {
+            throw new Error('ጠይቅ: the program asked for more input than it was given');
+        }
+        return answers.shift();
+    }
+
+    function ask(prompt) {
+        const answer = read(prompt);
+        return NUMBER_TEXT.test(answer) ? Number(answer) : answer;
+    }
+
+    function run(main, drawing = true) {
+        if (hasPage) {
+            output = element('pre', 'mesel-output');
+        }
+        if (!drawing) {
+            main();
+            return null;
+        }
+        let context = null;
+        if (hasPage) {
+            const canvas = element('canvas', 'mesel-canvas');
+            canvas.width = SCREEN_WIDTH;
+            canvas.height = SCREEN_HEIGHT;
+            context = canvas.getContext('2d');
+            context.fillStyle = BACKGROUND;
+            context.fillRect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT);
+            context.translate(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2);
+            context.lineCap = 'round';
+            context.lineJoin = 'round';
+        }
+        const t = new Turtle(context);
+        try {
+            main(t);
+        } finally {
+            t.flush();
+            mesel.segments = t.segments;
+        }
+        return t;
+    }
+
+    // Lists, as in mesel_lists.py
+
+    class Vector {
+        constructor(data) {
+            this.data = data;
+        }
+
+        toString() {
+            return '[' + Array.from(this.data, pythonNumber).join(', ') + ']';
+        }
+    }
+
+    function combine(a, b, op) {
+        const left = a instanceof Vector ? a.data : null;
+        const right = b instanceof Vector ? b.data : null;
+        if (left !== null && right !== null && left.length !== right.length) {
+            throw new RangeError(`lists of different lengths (${left.length} and ${right.length})`);
+        }
+        const length = (left || right).length;
+        const result = new Float64Array(length);
+        for (let i = 0; i < length; i++) {
+            result[i] = op(left === null ? a : left[i], right === null ? b : right[i]);
+        }
+        return new Vector(result);
+    }
+
+    function arithmetic(op) {
+        return (a, b) => (a instanceof Vector || b instanceof Vector) ? combine(a, b, op) : op(a, b);
+    }
+
+    function equal(a, b) {
+        if (a instanceof Vector && b instanceof Vector) {
+            return a.data.length === b.data.length && a.data.every((x, i) => x === b.data[i]);
+        }
+        return a === b;
+    }
+
+    function vector(values) {
+        for (const value of values) {
+            if (typeof value !== 'number') {
+                throw new TypeError(`lists hold numbers, not ${format(value)}`);
+            }
+        }
+        return new Vector(Float64Array.from(values));
+    }
+
+    function at(values, index) {
+        const position = Math.trunc(index);
+        if (position !== index || position < 0 || position >= values.data.length) {
+            throw new RangeError(`list index ${format(index)} is out of range for a list of ${values.data.length}`);
+        }
+        return values.data[position];
+    }
+
+    function smallest(values) {
+        if (!values.data.length) {
+            throw new RangeError('ትንሹ of an empty list');
+        }
+        return values.data.reduce((a, b) => Math.min(a, b));
+    }
+
+    function largest(values) {
+        if (!values.data.length) {
+            throw new RangeError('ትልቁ of an empty list');
+        }
+        return values.data.reduce((a, b) => Math.max(a, b));
+    }
+
+    function span(start, stop) {
+        if (stop === undefined) {
+            [start, stop] = [0, start];
+        }
+        const count = Math.max(0, Math.ceil(stop - start));
+        return new Vector(Float64Array.from({length: count}, (_, i) => start + i));
+    }
+
+    return {
+        run, show, ask, mod, div, segments: [],
+        add: arithmetic((a, b) => a + b),
+        sub: arithmetic((a, b) => a - b),
+        mul: arithmetic((a, b) => a * b),
+        pow: arithmetic((a, b) => a ** b),
+        neg: (a) => a instanceof Vector ? combine(a, -1, (x, y) => x * y) : -a,
+        eq: equal,
+        ne: (a, b) => !equal(a, b),
+        vector, at, smallest, largest, span,
+        length: (values) => values.data.length,
+        total: (values) => values.data.reduce((sum, x) => sum + x, 0),
+    };
+})();
@@ -0,0 +1,458 @@
+"""Runtime support shared by the programs the Mesel translator generates.
+
+A generated drawing program only imports `run` and hands it its body:
+
+    from mesel_runtime import run
+
+    def main(t):
+        t.forward(100.0)
+
+    if __name__ == '__main__':
+        run(main)
+
+Programs built from several files load the modules they import with
+load_module(), from the __mesel_cache__ directory build.py writes them to.
+
+Programs that print import `show` as well and write every ያሳይ through the
+output channel, which run() flushes when the program ends. The default
+channel buffers lines and writes them to stdout in blocks; set_output()
+installs a CaptureOutput or CallbackOutput instead. Programs that read
+input import `ask`, which answers every ጠይቅ from the input channel: stdin
+by default, or a ListInput of prepared answers installed with set_input().
+
+The backend is chosen once, when this module is imported, from the
+MESEL_BACKEND environment variable:
+
+    tk        draw in a Tk window (the default when a display is available)
+    headless  move the turtle but draw nothing
+    record    like headless, but keep every segment that is drawn
+
+The Tk backend draws each run of the pen as one canvas line (CanvasTurtle)
+and shows progress by refreshing the window about MESEL_FPS times a second
+(30 by default, 0 for only once at the end) while the program runs. Set MESEL_WAIT=0 to close the Tk window
+as soon as the drawing is finished instead of waiting for a click, and MESEL_RECORD=<file> to have the record
+backend write its segments to a JSON file when the program ends.
+"""
+import importlib.util
+import json
+import math
+import os
+import re
+import sys
+import time
+from typing import Callable, List, NamedTuple
+
+from mesel_constants import CACHE_DIR, COLORS
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+SCREEN_TITLE = 'Mesel Turtle Graphics'
+BACKGROUND = 'white'
+PEN_COLOR = 'blue'
+PEN_WIDTH = 2
+
+OUTPUT_BATCH = 4096  # lines buffered before a write
+
+# Answers to ጠይቅ that read as numbers; anything else stays text. The
+# JavaScript runtime uses the same pattern.
+NUMBER_TEXT = re.compile(r'\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*')
+
+FRAME_RATE = 30       # Tk window refreshes per second while a program draws
+CHECKS_PER_FRAME = 8  # clock reads per frame the update scheduler aims for
+POLYLINE_POINTS = 4096  # points in one Tk canvas line before another is started
+
+class BufferedOutput:
+    """Collects printed lines and writes them to a stream in blocks."""
+
+    def __init__(self, stream=None, batch_size: int = OUTPUT_BATCH):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.lines: List[str] = []
+
+    def write(self, value):
+        lines = self.lines
+        lines.append(str(value))
+        if len(lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            stream = self.stream or sys.stdout
+            stream.write('\n'.join(self.lines) + '\n')
+            stream.flush()
+            self.lines = []
+
+class CaptureOutput:
+    """Keeps every printed line in memory, for graders and tests."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def write(self, value):
+        self.lines.append(str(value))
+
+    def flush(self):
+        pass
+
+    def getvalue(self) -> str:
+        return ''.join(line + '\n' for line in self.lines)
+
+class CallbackOutput(BufferedOutput):
+    """Hands printed lines to callback(lines) in batches instead of writing them."""
+
+    def __init__(self, callback: Callable[[List[str]], None], batch_size: int = OUTPUT_BATCH):
+        super().__init__(batch_size=batch_size)
+        self.callback = callback
+
+    def flush(self):
+        if self.lines:
+            lines, self.lines = self.lines, []
+            self.callback(lines)
+
+class ConsoleInput:
+    """Reads each answer as a line from stdin, after showing the prompt."""
+
+    def read(self, prompt):
+        output.flush()  # so what was printed before comes before the prompt
+        return input('' if prompt is None else prompt)
+
+class ListInput:
+    """Answers from a list prepared in advance, for graders and tests."""
+
+    def __init__(self, values):
+        self.values = iter(values)
+
+    def read(self, prompt):
+        try:
+            return next(self.values)
+        except StopIteration:
+            raise EOFError('ጠይቅ: the program asked for more input than it was given') from None
+
+def input_value(value):
+    """An answer as a Mesel value: a number if it reads as one, else text."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value)
+    return float(text) if NUMBER_TEXT.fullmatch(text) else text
+
+class Segment(NamedTuple):
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    color: str
+    width: float
+
+class HeadlessTurtle:
+    """Turtle that tracks position, heading and pen state without drawing."""
+
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.heading = 0.0
+        self.drawing = True
+        self.pen_color = PEN_COLOR
+        self.pen_width = PEN_WIDTH
+
+    def forward(self, distance: float):
+        angle = math.radians(self.heading)
+        x = self.x + distance * math.cos(angle)
+        y = self.y + distance * math.sin(angle)
+        if self.drawing:
+            self.draw(self.x, self.y, x, y)
+        self.x, self.y = x, y
+
+    def right(self, angle: float):
+        self.heading = (self.heading - angle) % 360
+
+    def left(self, angle: float):
+        self.heading = (self.heading + angle) % 360
+
+    def goto(self, x: float, y: float):
+        if self.drawing:
+            self.draw(self.x, self.y, x, y)
+        self.x, self.y = x, y
+
+    def pendown(self):
+        self.drawing = True
+
+    def penup(self):
+        self.drawing = False
+
+    def color(self, name: str):
+        self.pen_color = name
+
+    def width(self, width: float):
+        self.pen_width = width
+
+    pensize = width
+
+    def draw(self, x0: float, y0: float, x1: float, y1: float):
+        pass
+
+class RecordingTurtle(HeadlessTurtle):
+    """Headless turtle that keeps a display list of the segments it draws."""
+
+    def __init__(self):
+        super().__init__()
+        self.segments: List[Segment] = []
+
+    def draw(self, x0: float, y0: float, x1: float, y1: float):
+        self.segments.append(Segment(x0, y0, x1, y1, self.pen_color, self.pen_width))
+
+# The classic turtle arrow, as (forward, left) offsets from its tip
+CURSOR = ((0, 0), (-9, 5), (-7, 0), (-9, -5))
+
+class CanvasTurtle(HeadlessTurtle):
+    """Turtle that draws on a Tk canvas with one line item per run of the pen.
+
+    turtle.Turtle starts a canvas line every 43 points, and on every move
+    reads the current line's coordinates back from Tk and saves an undo
+    entry. Here consecutive segments with the same color and width extend
+    one line item, and its coordinates are only handed to Tk by flush(),
+    when the window is refreshed. A run ends when the pen is lifted or
+    changes, or after POLYLINE_POINTS points so that updating the current
+    line stays cheap. tick, if given, is called after each segment.
+    """
+
+    def __init__(self, canvas, tick: Callable = None):
+        super().__init__()
+        self.canvas = canvas
+        self.tick = tick
+        self.item = None
+        self.points: List[float] = []
+        self.pending = False  # points Tk hasn't been given yet
+        self.items = 0
+        self.cursor = canvas.create_polygon(0, 0, 0, 0, 0, 0, fill=self.pen_color, outline=self.pen_color)
+        self.show_cursor()
+
+    def draw(self, x0: float, y0: float, x1: float, y1: float):
+        points = self.points
+        # Canvas y grows downwards
+        if (self.item is None or len(points) >= 2 * POLYLINE_POINTS
+                or points[-2] != x0 or points[-1] != -y0):
+            self.end_line()
+            self.points = [x0, -y0, x1, -y1]
+            self.item = self.canvas.create_line(*self.points, fill=self.pen_color, width=self.pen_width,
+                                                capstyle='round', joinstyle='round')
+            self.items += 1
+        else:
+            points.append(x1)
+            points.append(-y1)
+            self.pending = True
+        if self.tick is not None:
+            self.tick()
+
+    def end_line(self):
+        self.flush()
+        self.item = None
+
+    def flush(self):
+        """Give Tk the points drawn since the last flush, and move the cursor."""
+        if self.pending:
+            self.canvas.coords(self.item, self.points)
+            self.pending = False
+        self.show_cursor()
+
+    def show_cursor(self):
+        angle = math.radians(self.heading)
+        cos, sin = math.cos(angle), math.sin(angle)
+        self.canvas.coords(self.cursor, [value for forward, left in CURSOR for value in (
+            self.x + forward * cos - left * sin, -(self.y + forward * sin + left * cos))])
+        self.canvas.itemconfigure(self.cursor, fill=self.pen_color, outline=self.pen_color)
+        self.canvas.tag_raise(self.cursor)
+
+    def penup(self):
+        super().penup()
+        self.end_line()
+
+    def color(self, name: str):
+        super().color(name)
+        self.end_line()
+
+    def width(self, width: float):
+        super().width(width)
+        self.end_line()
+
+    pensize = width
+
+class UpdateScheduler:
+    """Calls update() about `rate` times a second from a stream of tick()s.
+
+    Reading the clock on every drawing call would cost more than the call,
+    so the clock is read every `batch` ticks, with batch adjusted so that
+    happens about CHECKS_PER_FRAME times per frame whether the program
+    draws a hundred segments a second or a million. A slow update() pushes
+    the next frame back so refreshing never takes more than about a third
+    of the time.
+    """
+
+    def __init__(self, update: Callable, rate: float = FRAME_RATE, clock: Callable = time.perf_counter):
+        self.update = update
+        self.interval = 1 / rate
+        self.clock = clock
+        self.batch = 1
+        self.count = 0
+        self.frames = 0
+        self.last_check = clock()
+        self.next_frame = self.last_check + self.interval
+
+    def tick(self):
+        self.count += 1
+        if self.count < self.batch:
+            return
+        now = self.clock()
+        elapsed = now - self.last_check
+        # Aim the next clock read at a fraction of a frame, growing or
+        # shrinking batch at most 2x at a time
+        target = self.interval / CHECKS_PER_FRAME
+        if elapsed <= 0:
+            self.batch *= 2
+        else:
+            self.batch = max(1, self.batch // 2, min(self.batch * 2, int(self.batch * target / elapsed)))
+        self.count = 0
+        if now >= self.next_frame:
+            self.update()
+            self.frames += 1
+            done = self.clock()
+            # Keep the cadence, unless the update was slow or ticks stopped coming
+            self.next_frame = max(self.next_frame + self.interval, done + 2 * (done - now))
+            if self.next_frame <= done:
+                self.next_frame = done + self.interval
+            now = done
+        self.last_check = now
+
+class TkBackend:
+    name = 'tk'
+
+    def __init__(self):
+        self.wait = os.environ.get('MESEL_WAIT', '1') != '0'
+        self.frame_rate = float(os.environ.get('MESEL_FPS', FRAME_RATE))
+
+    def run(self, main: Callable):
+        import tkinter
+        import turtle
+        screen = turtle.Screen()
+        screen.setup(SCREEN_WIDTH, SCREEN_HEIGHT)
+        screen.title(SCREEN_TITLE)
+        screen.bgcolor(BACKGROUND)
+        screen.tracer(0)  # Draw everything at once instead of animating
+        t = CanvasTurtle(screen.getcanvas())
+        if self.frame_rate > 0:
+            def frame():
+                output.flush()
+                t.flush()
+                screen.update()
+            t.tick = UpdateScheduler(frame, self.frame_rate).tick
+        try:
+            main(t)
+            output.flush()  # Show what was printed before waiting for the window
+            t.flush()
+            screen.update()
+            if self.wait:
+                screen.exitonclick()
+            else:
+                screen.bye()
+        except (turtle.Terminator, tkinter.TclError):
+            pass  # The window was closed while drawing
+        finally:
+            if self.wait:
+                try:
+                    screen.mainloop()
+                except Exception:
+                    pass
+        return t
+
+class HeadlessBackend:
+    name = 'headless'
+    turtle_class = HeadlessTurtle
+
+    def run(self, main: Callable):
+        t = self.turtle_class()
+        main(t)
+        return t
+
+class RecordingBackend(HeadlessBackend):
+    name = 'record'
+    turtle_class = RecordingTurtle
+
+    def run(self, main: Callable):
+        t = super().run(main)
+        path = os.environ.get('MESEL_RECORD')
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump([list(segment) for segment in t.segments], f)
+        return t
+
+BACKENDS = {backend.name: backend for backend in (TkBackend, HeadlessBackend, RecordingBackend)}
+
+def has_display() -> bool:
+    if sys.platform in ('win32', 'darwin'):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+def select_backend(name: str = None):
+    if name is None:
+        name = os.environ.get('MESEL_BACKEND') or ('tk' if has_display() else 'headless')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown Mesel backend '{name}', expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+backend = select_backend()
+output = BufferedOutput()
+input_channel = ConsoleInput()
+
+def set_output(channel):
+    """Send ያሳይ output to channel from now on and return the previous one."""
+    global output
+    previous, output = output, channel
+    return previous
+
+def set_input(channel):
+    """Answer ጠይቅ from channel from now on and return the previous one."""
+    global input_channel
+    previous, input_channel = input_channel, channel
+    return previous
+
+def load_module(importer_file: str, name: str):
+    """Load compiled module name once, from next to importer_file or its cache directory."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    here = os.path.dirname(os.path.abspath(importer_file))
+    for directory in (here, os.path.join(here, CACHE_DIR)):
+        path = os.path.join(directory, name + '.py')
+        if os.path.exists(path):
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+            return module
+    raise ImportError(f"Compiled Mesel module {name} not found next to {importer_file}; "
+                      f"rebuild the program")
+
+def show(value):
+    output.write(value)
+
+def ask(prompt=None):
+    return input_value(input_channel.read(prompt))
+
+def complete(main: Callable) -> Callable:
+    """A main that runs every step of main, a generator from the 'steps' target."""
+    def run_steps(*turtle):
+        for _ in main(*turtle):
+            pass
+    return run_steps
+
+def run(main: Callable, drawing: bool = True):
+    """Run a generated program's main and flush its output.
+
+    Drawing programs get a turtle from the selected backend, which is
+    returned; programs that only print are called as main().
+    """
+    try:
+        if drawing:
+            return backend.run(main)
+        main()
+    finally:
+        output.flush()
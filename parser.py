@@ -1,6 +1,6 @@
 from enum import Enum
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import Iterator, List, Optional
+from dataclasses import dataclass, fields
 from lexer import Token, TokenType
 from ast_nodes import NodeType
 
@@ -103,6 +103,71 @@ class ColorCommand(Statement):
 class WidthCommand(Statement):
     width: Expression
 
+@dataclass
+class Import(Statement):
+    path: str  # as written, relative to the importing file
+
+@dataclass
+class Procedure(Statement):
+    name: str
+    parameters: List[str]
+    body: Block
+
+@dataclass
+class Return(Statement):
+    value: Optional[Expression]
+
+@dataclass
+class Call(Expression):
+    name: str
+    arguments: List[Expression]
+
+@dataclass
+class CallStatement(Statement):
+    call: Call
+
+@dataclass
+class ListLiteral(Expression):
+    elements: List[Expression]
+
+@dataclass
+class Index(Expression):
+    target: Expression
+    index: Expression
+
+@dataclass
+class Input(Expression):
+    prompt: Optional[str]  # shown before reading, if given
+
+# Tokens a statement can begin with; anything else between statements is skipped
+STATEMENT_STARTS = (
+    TokenType.ASSIGN, TokenType.NUMBER_TYPE, TokenType.BEGIN, TokenType.FOR, TokenType.WHILE,
+    TokenType.IF, TokenType.BREAK, TokenType.CONTINUE, TokenType.PRINT, TokenType.FORWARD,
+    TokenType.TURN, TokenType.PEN_DOWN, TokenType.PEN_UP, TokenType.COLOR, TokenType.WIDTH,
+    TokenType.IMPORT, TokenType.PROCEDURE, TokenType.RETURN,
+)
+
+# Node class -> names of its fields, as dataclasses.fields() is slow to call per node
+_FIELD_NAMES = {}
+
+def walk(node: Node) -> Iterator[Node]:
+    """Yield node and every node below it, depth first."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        names = _FIELD_NAMES.get(type(node))
+        if names is None:
+            names = _FIELD_NAMES[type(node)] = tuple(field.name for field in fields(node))
+        children = []
+        for name in names:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend(item for item in value if isinstance(item, Node))
+        stack.extend(reversed(children))
+
 class Parser:
     def __init__(self, tokens: List[Token]):
         self.tokens = tokens
@@ -156,28 +221,31 @@ class Parser:
                 self.advance()
                 continue
             # Only parse a statement if the next token is a valid statement starter
-            if self.check(TokenType.ASSIGN) or \
-               self.check(TokenType.NUMBER_TYPE) or \
-               self.check(TokenType.BEGIN) or \
-               self.check(TokenType.FOR) or \
-               self.check(TokenType.WHILE) or \
-               self.check(TokenType.IF) or \
-               self.check(TokenType.BREAK) or \
-               self.check(TokenType.CONTINUE) or \
-               self.check(TokenType.PRINT) or \
-               self.check(TokenType.FORWARD) or \
-               self.check(TokenType.TURN) or \
-               self.check(TokenType.PEN_DOWN) or \
-               self.check(TokenType.PEN_UP) or \
-               self.check(TokenType.COLOR) or \
-               self.check(TokenType.WIDTH):
+            if self.starts_statement():
                 statements.append(self.statement())
             else:
                 # Skip any unexpected tokens
                 self.advance()
         return Program(NodeType.PROGRAM, 1, 1, statements)
     
+    def starts_statement(self) -> bool:
+        # A procedure call is the only statement that starts with a name
+        if self.check(TokenType.IDENTIFIER):
+            return self.peek_next().type == TokenType.LPAREN
+        return self.peek().type in STATEMENT_STARTS
+    
+    def peek_next(self) -> Token:
+        return self.tokens[min(self.current + 1, len(self.tokens) - 1)]
+    
     def statement(self) -> Statement:
+        start = self.peek()
+        node = self.parse_statement()
+        # Report where the statement starts rather than where its last token is,
+        # so source maps and error messages point at the keyword
+        node.line, node.column = start.line, start.column
+        return node
+    
+    def parse_statement(self) -> Statement:
         if self.match(TokenType.ASSIGN):
             name = self.consume(TokenType.IDENTIFIER, "Expected variable name after 'አስቀምጥ'.").value
             self.consume(TokenType.ASSIGN_OP, "Expected '=' after variable name.")
@@ -196,12 +264,13 @@ class Parser:
         if self.match(TokenType.FOR):
             # For numeric range loops (እድግ 4)
             if self.check(TokenType.NUMBER):
-                end = float(self.consume(TokenType.NUMBER, "Expected number for loop range.").value)
+                count = self.consume(TokenType.NUMBER, "Expected number for loop range.")
+                end = float(count.value)
                 body = self.block()
                 return ForLoop(NodeType.FOR_LOOP, self.previous().line, self.previous().column,
                               None,  # No variable for numeric range
-                              Number(NodeType.NUMBER, self.previous().line, self.previous().column, 0),  # Start at 0
-                              Number(NodeType.NUMBER, self.previous().line, self.previous().column, end),  # End at specified number
+                              Number(NodeType.NUMBER, count.line, count.column, 0),  # Start at 0
+                              Number(NodeType.NUMBER, count.line, count.column, end),  # End at specified number
                               body)
             # For variable-based loops (እድግ i = 1, 10)
             variable = self.consume(TokenType.IDENTIFIER, "Expected variable name after 'እድግ'.").value
@@ -228,6 +297,15 @@ class Parser:
             return self.color_command()
         if self.match(TokenType.WIDTH):
             return self.width_command()
+        if self.match(TokenType.IMPORT):
+            return self.import_statement()
+        if self.match(TokenType.PROCEDURE):
+            return self.procedure()
+        if self.match(TokenType.RETURN):
+            return self.return_statement()
+        if self.check(TokenType.IDENTIFIER):
+            call = self.primary()
+            return CallStatement(NodeType.CALL_STATEMENT, call.line, call.column, call)
         
         # If we get here, we have an error
         token = self.peek()
@@ -241,21 +319,7 @@ class Parser:
                 self.advance()
                 continue
             # Only parse a statement if the next token is a valid statement starter
-            if self.check(TokenType.ASSIGN) or \
-               self.check(TokenType.NUMBER_TYPE) or \
-               self.check(TokenType.BEGIN) or \
-               self.check(TokenType.FOR) or \
-               self.check(TokenType.WHILE) or \
-               self.check(TokenType.IF) or \
-               self.check(TokenType.BREAK) or \
-               self.check(TokenType.CONTINUE) or \
-               self.check(TokenType.PRINT) or \
-               self.check(TokenType.FORWARD) or \
-               self.check(TokenType.TURN) or \
-               self.check(TokenType.PEN_DOWN) or \
-               self.check(TokenType.PEN_UP) or \
-               self.check(TokenType.COLOR) or \
-               self.check(TokenType.WIDTH):
+            if self.starts_statement():
                 statements.append(self.statement())
             else:
                 # Skip any unexpected tokens
@@ -296,7 +360,8 @@ class Parser:
     def turtle_command(self) -> TurtleCommand:
         command = self.previous().type
         argument = None
-        if not self.check(TokenType.NEWLINE) and not self.check(TokenType.END):
+        # Only ሂድ and ዙር take a distance/angle; the pen commands stand alone
+        if command in (TokenType.FORWARD, TokenType.TURN):
             argument = self.expression()
         return TurtleCommand(NodeType.TURTLE_COMMAND, self.previous().line, self.previous().column,
                            command, argument)
@@ -313,6 +378,42 @@ class Parser:
         width = self.expression()
         return WidthCommand(NodeType.WIDTH_COMMAND, self.previous().line, self.previous().column, width)
     
+    def import_statement(self) -> Import:
+        path = self.consume(TokenType.STRING, "Expected a file name in quotes after 'አስገባ'.")
+        return Import(NodeType.IMPORT, path.line, path.column, path.value)
+    
+    def procedure(self) -> Procedure:
+        name = self.consume(TokenType.IDENTIFIER, "Expected procedure name after 'ተግባር'.").value
+        self.consume(TokenType.LPAREN, "Expected '(' after procedure name.")
+        parameters = []
+        if not self.check(TokenType.RPAREN):
+            while True:
+                parameters.append(self.consume(TokenType.IDENTIFIER, "Expected parameter name.").value)
+                if not self.match(TokenType.COMMA):
+                    break
+        self.consume(TokenType.RPAREN, "Expected ')' after parameters.")
+        body = self.block()
+        return Procedure(NodeType.PROCEDURE, self.previous().line, self.previous().column,
+                         name, parameters, body)
+    
+    def return_statement(self) -> Return:
+        value = None
+        # A bare መልስ is followed by ጨርስ or a statement keyword; a name after
+        # it is always the start of the value, even if it is a call
+        if not (self.check(TokenType.END) or self.is_at_end() or self.peek().type in STATEMENT_STARTS):
+            value = self.expression()
+        return Return(NodeType.RETURN, self.previous().line, self.previous().column, value)
+    
+    def arguments(self, closing: TokenType = TokenType.RPAREN) -> List[Expression]:
+        arguments = []
+        if not self.check(closing):
+            while True:
+                arguments.append(self.expression())
+                if not self.match(TokenType.COMMA):
+                    break
+        self.consume(closing, f"Expected '{closing.value}' after arguments.")
+        return arguments
+    
     def expression_statement(self) -> Statement:
         expr = self.expression()
         if isinstance(expr, Identifier) and self.match(TokenType.ASSIGN_OP):
@@ -381,12 +482,20 @@ class Parser:
     
     def unary(self) -> Expression:
         if self.match(TokenType.MINUS, TokenType.NOT):
-            operator = self.previous().type
+            operator_token = self.previous()
             right = self.unary()
-            return UnaryOperation(NodeType.UNARY_OPERATION, self.previous().line, 
-                                self.previous().column, operator, right)
+            return UnaryOperation(NodeType.UNARY_OPERATION, operator_token.line,
+                                operator_token.column, operator_token.type, right)
         
-        return self.primary()
+        return self.postfix()
+    
+    def postfix(self) -> Expression:
+        expr = self.primary()
+        while self.match(TokenType.LBRACKET):
+            index = self.expression()
+            self.consume(TokenType.RBRACKET, "Expected ']' after index.")
+            expr = Index(NodeType.INDEX, expr.line, expr.column, expr, index)
+        return expr
     
     def primary(self) -> Expression:
         if self.match(TokenType.NUMBER):
@@ -398,14 +507,27 @@ class Parser:
                          self.previous().value)
         
         if self.match(TokenType.IDENTIFIER):
-            return Identifier(NodeType.IDENTIFIER, self.previous().line, self.previous().column,
-                            self.previous().value)
+            name = self.previous()
+            if self.match(TokenType.LPAREN):
+                return Call(NodeType.CALL, name.line, name.column, name.value, self.arguments())
+            return Identifier(NodeType.IDENTIFIER, name.line, name.column, name.value)
         
         if self.match(TokenType.LPAREN):
             expr = self.expression()
             self.consume(TokenType.RPAREN, "Expected ')' after expression.")
             return expr
         
+        if self.match(TokenType.LBRACKET):
+            start = self.previous()
+            return ListLiteral(NodeType.LIST, start.line, start.column, self.arguments(TokenType.RBRACKET))
+        
+        if self.match(TokenType.INPUT):
+            # ጠይቅ or ጠይቅ "prompt"; no statement starts with a string, so a
+            # string after it is always its prompt
+            keyword = self.previous()
+            prompt = self.advance().value if self.check(TokenType.STRING) else None
+            return Input(NodeType.INPUT, keyword.line, keyword.column, prompt)
+        
         # If we get here, we have an error
         token = self.peek()
         self.error(f"Expected expression, got {token.type} at line {token.line}, column {token.column}")
@@ -0,0 +1,144 @@
+"""Profile a generated program in terms of the Mesel source it came from.
+
+The program is run in this process under sys.settrace. Every line event in
+the generated code is charged to the Mesel statement that produced the
+line (via CodeGenerator.source_map), and the time until the next event is
+added to it. Loops are reported with their iteration count and the time
+spent anywhere in their body, so it is easy to see which እድግ dominates.
+
+    generator = CodeGenerator()
+    code = generator.generate(ast)
+    profile = profile_program(code, generator)
+    print(profile.report(source))
+"""
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from code_generator import CodeGenerator
+
+@dataclass
+class LineStats:
+    line: int
+    column: int
+    kind: str
+    hits: int = 0
+    time: float = 0.0
+
+@dataclass
+class LoopStats:
+    line: int
+    column: int
+    kind: str
+    iterations: int = 0
+    time: float = 0.0
+
+@dataclass
+class Profile:
+    lines: Dict[int, LineStats] = field(default_factory=dict)
+    loops: List[LoopStats] = field(default_factory=list)
+    total_time: float = 0.0
+
+    def report(self, source: Optional[str] = None, limit: int = 20) -> str:
+        """Return the hottest Mesel lines and every loop as a text table."""
+        source_lines = source.split('\n') if source is not None else []
+
+        def text_of(line: int) -> str:
+            if 0 < line <= len(source_lines):
+                return source_lines[line - 1].strip()
+            return ''
+
+        total = self.total_time or 1.0
+        out = [f"{'line':>5} {'hits':>10} {'time ms':>10} {'share':>7}  statement"]
+        hottest = sorted(self.lines.values(), key=lambda stats: stats.time, reverse=True)
+        for stats in hottest[:limit]:
+            out.append(f"{stats.line:>5} {stats.hits:>10} {stats.time * 1000:10.2f}"
+                       f" {stats.time / total:7.1%}  {text_of(stats.line)}")
+        if self.loops:
+            out.append("")
+            out.append(f"{'loop':>5} {'iterations':>10} {'time ms':>10} {'share':>7}  statement")
+            for loop in sorted(self.loops, key=lambda loop: loop.time, reverse=True):
+                out.append(f"{loop.line:>5} {loop.iterations:>10} {loop.time * 1000:10.2f}"
+                           f" {loop.time / total:7.1%}  {text_of(loop.line)}")
+        out.append(f"total {self.total_time * 1000:.2f} ms")
+        return "\n".join(out)
+
+def profile_program(code: str, generator: CodeGenerator, filename: str = '<mesel>') -> Profile:
+    """Run generated code under the line tracer and return its Mesel profile."""
+    source_map = generator.source_map
+    # Time spent on a generated line counts against the Mesel statement it
+    # belongs to: its own mark, or the closest marked line above it.
+    owner = {}
+    current = None
+    for number in range(1, code.count('\n') + 2):
+        current = number if number in source_map else current
+        if current is not None:
+            owner[number] = current
+    generated = {number: LineStats(*source_map[number]) for number in source_map}
+    loop_spans = generator.loop_spans
+    hits = {}
+    times = dict.fromkeys(source_map, 0.0)
+    iterations = dict.fromkeys(loop_spans, 0)
+    clock = time.perf_counter
+    last_line = None
+    last_time = clock()
+
+    def trace_frame():
+        previous = None
+
+        def trace_lines(frame, event, arg):
+            nonlocal last_line, last_time, previous
+            now = clock()
+            if last_line is not None:
+                times[last_line] += now - last_time
+            if event == 'line':
+                lineno = frame.f_lineno
+                last_line = owner.get(lineno)
+                hits[lineno] = hits.get(lineno, 0) + 1
+                # An iteration starts whenever a loop header hands over to its body
+                if previous in loop_spans and previous < lineno <= loop_spans[previous]:
+                    iterations[previous] += 1
+                previous = lineno
+            else:
+                last_line = None
+            last_time = clock()
+            return trace_lines
+
+        return trace_lines
+
+    def trace_calls(frame, event, arg):
+        if frame.f_code.co_filename == filename:
+            return trace_frame()
+        return None
+
+    namespace = {'__name__': '__mesel__', '__file__': filename}
+    exec(compile(code, filename, 'exec'), namespace)
+    main = namespace['main']
+    start = clock()
+    sys.settrace(trace_calls)
+    try:
+        if generator.features:
+            import mesel_runtime
+            mesel_runtime.run(main, 'turtle' in generator.features)
+        else:
+            main()
+    finally:
+        sys.settrace(None)
+    elapsed = clock() - start
+
+    profile = Profile(total_time=elapsed)
+    for number, stats in generated.items():
+        stats.hits = hits.get(number, 0)
+        stats.time = times[number]
+        merged = profile.lines.get(stats.line)
+        if merged is None:
+            profile.lines[stats.line] = stats
+        else:
+            merged.hits += stats.hits
+            merged.time += stats.time
+    for header, end in loop_spans.items():
+        loop = LoopStats(*source_map[header])
+        loop.iterations = iterations[header]
+        loop.time = sum(times[number] for number in source_map if header <= number <= end)
+        profile.loops.append(loop)
+    return profile
@@ -0,0 +1,322 @@
+"""Render recorded turtle drawings to PNG without a GUI.
+
+    t = mesel_runtime.select_backend('record').run(main)
+    png = render_png(t.segments, 400, 300)
+
+Segments are the display list of the record backend (x0, y0, x1, y1,
+color, width), in turtle coordinates: the origin in the middle, y up.
+By default the image shows what the Tk window would, scaled to the image
+size; with fit=True it zooms to the drawing instead, which suits
+thumbnails.
+
+Lines are anti-aliased by coverage: a pixel takes as much of the line's
+color as the distance from its center to the segment leaves inside the
+pen, so ends are round and joins close. With NumPy, short lines are
+drawn thousands at a time as array operations over their bounding boxes,
+and each run of lines of one color is blended into the image once.
+Without NumPy the same arithmetic runs per pixel in Python, which gives
+the same picture (to within rounding) but much more slowly. Set
+MESEL_NUMPY=0 to force that path.
+
+workers > 1 splits the image into horizontal bands and renders them in
+separate processes. A pixel only depends on its own center, so the bands
+join without seams and the PNG is the same as a single-process render.
+
+Usage: python raster.py drawing.json|program.mesel out.png [--size 400x300] [--fit] [--workers N]
+"""
+import itertools
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import List, Sequence, Tuple
+from mesel_runtime import SCREEN_WIDTH, SCREEN_HEIGHT, BACKGROUND, Segment
+
+numpy = None
+if os.environ.get('MESEL_NUMPY', '1') != '0':
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+# Tk's values for the color names generated programs use
+RGB = {
+    'red': (255, 0, 0),
+    'green': (0, 128, 0),
+    'blue': (0, 0, 255),
+    'yellow': (255, 255, 0),
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+}
+
+SMALL_BOX = 64          # lines whose pixel box fits in this many pixels are drawn in batches
+BATCH_PIXELS = 1 << 20  # pixels computed per batch
+BLEND_PIXELS = 1 << 22  # covered pixels collected before blending them
+OPAQUE = 1e-6      # transmittance of fully covered pixels, so its log stays finite
+
+MARGIN = 0.05  # of the image size, around a drawing scaled with fit=True
+COMPRESSION = 6
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def rgb(color) -> Tuple[int, int, int]:
+    if isinstance(color, str):
+        if color.startswith('#') and len(color) == 7:
+            return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+        if color not in RGB:
+            raise ValueError(f"Unknown color '{color}'")
+        return RGB[color]
+    return tuple(color)
+
+def transform(segments: Sequence[Segment], width: int, height: int, fit: bool) -> Tuple[float, float, float]:
+    """Scale and offsets that map turtle coordinates to pixels."""
+    if fit and segments:
+        xs = [x for s in segments for x in (s[0], s[2])]
+        ys = [y for s in segments for y in (s[1], s[3])]
+        pad = max(s[5] for s in segments)
+        left, right = min(xs) - pad, max(xs) + pad
+        bottom, top = min(ys) - pad, max(ys) + pad
+        scale = min(width * (1 - 2 * MARGIN) / max(right - left, 1e-9),
+                    height * (1 - 2 * MARGIN) / max(top - bottom, 1e-9))
+        return scale, width / 2 - scale * (left + right) / 2, height / 2 + scale * (bottom + top) / 2
+    scale = min(width / SCREEN_WIDTH, height / SCREEN_HEIGHT)
+    return scale, width / 2, height / 2
+
+def to_pixels(segments: Sequence[Segment], width: int, height: int, fit: bool = False) -> list:
+    """(x0, y0, x1, y1, rgb, radius) in pixels, y down."""
+    scale, dx, dy = transform(segments, width, height, fit)
+    # Lines stay at least a pixel wide however small the image
+    return [(dx + s[0] * scale, dy - s[1] * scale, dx + s[2] * scale, dy - s[3] * scale,
+             rgb(s[4]), max(s[5] * scale, 1.0) / 2) for s in segments]
+
+def bounds(line, top: int, bottom: int, width: int):
+    """Pixel box a line can touch within rows top..bottom, or None."""
+    x0, y0, x1, y1, _, radius = line
+    reach = radius + 1
+    row0 = max(top, int(math.floor(min(y0, y1) - reach)))
+    row1 = min(bottom, int(math.ceil(max(y0, y1) + reach)))
+    col0 = max(0, int(math.floor(min(x0, x1) - reach)))
+    col1 = min(width, int(math.ceil(max(x0, x1) + reach)))
+    if row0 >= row1 or col0 >= col1:
+        return None
+    return row0, row1, col0, col1
+
+def line_alpha(xs, ys, x0, y0, x1, y1, radius):
+    """Coverage of the pixels centered at xs, ys by a line (NumPy arrays)."""
+    dx, dy = x1 - x0, y1 - y0
+    length2 = dx * dx + dy * dy
+    safe = numpy.where(length2 > 0, length2, 1)
+    t = numpy.clip(((xs - x0) * dx + (ys - y0) * dy) / safe, 0, 1)
+    distance = numpy.hypot(xs - (x0 + t * dx), ys - (y0 + t * dy))
+    return numpy.clip(radius + 0.5 - distance, 0, 1)
+
+def blend(pixels, color, index, log_t):
+    """Blend color into the flattened pixels at index, log_t being the summed log(1 - alpha)."""
+    flat = pixels.reshape(-1, 3)
+    if len(index) * 8 >= len(flat):
+        # Dense: a pass over the band is cheaper than sorting the indexes
+        log_t = numpy.bincount(index, log_t, minlength=len(flat))
+        index = numpy.flatnonzero(log_t)
+        log_t = log_t[index]
+    else:
+        index, inverse = numpy.unique(index, return_inverse=True)
+        log_t = numpy.bincount(inverse, log_t)
+    target = numpy.asarray(color, dtype=numpy.float32)
+    flat[index] = target + (flat[index] - target) * numpy.exp(log_t)[:, None]
+
+def draw_numpy(pixels, lines: list, top: int):
+    # Blending alphas a1..an of one color turns a pixel p into
+    # color + (p - color) * (1 - a1) ... (1 - an), whatever the order and
+    # however the product is split up. So runs of same-colored lines are
+    # computed many at a time, their log(1 - alpha) summed per pixel, and each
+    # touched pixel blended once per batch of batches.
+    height, width = pixels.shape[:2]
+    for color, run in itertools.groupby(lines, key=lambda line: line[4]):
+        run = list(run)
+        x0, y0, x1, y1, radius = numpy.array([line[:4] + line[5:] for line in run],
+                                             dtype=numpy.float32).T
+        reach = radius + 1
+        row0 = numpy.floor(numpy.minimum(y0, y1) - reach).astype(numpy.int64)
+        row1 = numpy.ceil(numpy.maximum(y0, y1) + reach).astype(numpy.int64)
+        col0 = numpy.floor(numpy.minimum(x0, x1) - reach).astype(numpy.int64)
+        col1 = numpy.ceil(numpy.maximum(x0, x1) + reach).astype(numpy.int64)
+        size = numpy.maximum(row1 - row0, col1 - col0)
+        indexes, weights = [], []
+        pending = 0
+
+        def add(rows, cols, alpha):
+            nonlocal pending
+            inside = ((alpha > 0) & (rows >= top) & (rows < top + height)
+                      & (cols >= 0) & (cols < width))
+            indexes.append(((rows - top) * width + cols)[inside])
+            weights.append(numpy.log(numpy.maximum(1 - alpha[inside], OPAQUE)))
+            pending += len(indexes[-1])
+            if pending >= BLEND_PIXELS:
+                flush()
+
+        def flush():
+            nonlocal indexes, weights, pending
+            if pending:
+                blend(pixels, color, numpy.concatenate(indexes), numpy.concatenate(weights))
+            indexes, weights, pending = [], [], 0
+
+        for i in numpy.flatnonzero(size > SMALL_BOX):
+            box = bounds(run[i], top, top + height, width)
+            if box is None:
+                continue
+            r0, r1, c0, c1 = box
+            rows = numpy.arange(r0, r1)[:, None]
+            cols = numpy.arange(c0, c1)[None, :]
+            alpha = line_alpha(cols.astype(numpy.float32) + 0.5, rows.astype(numpy.float32) + 0.5,
+                               x0[i], y0[i], x1[i], y1[i], radius[i])
+            add(numpy.broadcast_to(rows, alpha.shape), numpy.broadcast_to(cols, alpha.shape), alpha)
+        small = numpy.flatnonzero(size <= SMALL_BOX)
+        small = small[numpy.argsort(size[small], kind='stable')]
+        start = 0
+        while start < len(small):
+            # Sorted by size, so each batch is about as big as its largest line needs
+            end = min(len(small), start + max(1, BATCH_PIXELS // int(size[small[start]]) ** 2))
+            box = int(size[small[end - 1]])
+            end = min(end, start + max(1, BATCH_PIXELS // box ** 2))
+            part = small[start:end]
+            start = end
+            offsets = numpy.arange(box)
+            rows = row0[part, None, None] + offsets[:, None]
+            cols = col0[part, None, None] + offsets[None, :]
+            centers = offsets.astype(numpy.float32) + 0.5
+            alpha = line_alpha(col0[part, None, None].astype(numpy.float32) + centers[None, :],
+                               row0[part, None, None].astype(numpy.float32) + centers[:, None],
+                               *(values[part, None, None] for values in (x0, y0, x1, y1, radius)))
+            add(rows, cols, alpha)
+        flush()
+
+def draw_python(pixels: List[list], lines: list, top: int):
+    height, width = len(pixels), len(pixels[0]) // 3
+    for line in lines:
+        box = bounds(line, top, top + height, width)
+        if box is None:
+            continue
+        row0, row1, col0, col1 = box
+        x0, y0, x1, y1, (r, g, b), radius = line
+        dx, dy = x1 - x0, y1 - y0
+        length2 = dx * dx + dy * dy
+        for row in range(row0, row1):
+            py = row + 0.5
+            values = pixels[row - top]
+            for col in range(col0, col1):
+                px = col + 0.5
+                t = ((px - x0) * dx + (py - y0) * dy) / length2 if length2 else 0.0
+                t = 0.0 if t < 0 else 1.0 if t > 1 else t
+                alpha = radius + 0.5 - math.hypot(px - (x0 + t * dx), py - (y0 + t * dy))
+                if alpha <= 0:
+                    continue
+                if alpha > 1:
+                    alpha = 1.0
+                i = col * 3
+                values[i] += (r - values[i]) * alpha
+                values[i + 1] += (g - values[i + 1]) * alpha
+                values[i + 2] += (b - values[i + 2]) * alpha
+
+def render_rows(lines: list, width: int, top: int, bottom: int, background) -> bytes:
+    """Filtered PNG scanlines for image rows top..bottom."""
+    height = bottom - top
+    if numpy is not None:
+        pixels = numpy.empty((height, width, 3), dtype=numpy.float32)
+        pixels[:] = background
+        draw_numpy(pixels, lines, top)
+        rows = numpy.zeros((height, width * 3 + 1), dtype=numpy.uint8)  # filter byte 0 (None)
+        rows[:, 1:] = numpy.rint(pixels).reshape(height, width * 3)
+        return rows.tobytes()
+    pixels = [[float(c) for c in background] * width for _ in range(height)]
+    draw_python(pixels, lines, top)
+    return b''.join(b'\x00' + bytes(int(v + 0.5) for v in values) for values in pixels)
+
+def render_band(arguments) -> bytes:
+    return render_rows(*arguments)
+
+def chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def encode_png(width: int, height: int, scanlines: bytes, level: int = COMPRESSION) -> bytes:
+    """8-bit RGB PNG from filtered scanlines."""
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (PNG_SIGNATURE + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(scanlines, level)) + chunk(b'IEND', b''))
+
+def render_png(segments: Sequence[Segment], width: int = 400, height: int = 300, fit: bool = False,
+               background=BACKGROUND, workers: int = 1) -> bytes:
+    """Draw segments on a width x height image and return it as PNG bytes."""
+    lines = to_pixels(segments, width, height, fit)
+    background = rgb(background)
+    if workers <= 1 or height < workers:
+        return encode_png(width, height, render_rows(lines, width, 0, height, background))
+    from concurrent.futures import ProcessPoolExecutor
+    step = -(-height // workers)
+    bands = []
+    for top in range(0, height, step):
+        bottom = min(height, top + step)
+        # Each worker only gets the lines that reach its band
+        band_lines = [line for line in lines if bounds(line, top, bottom, width) is not None]
+        bands.append((band_lines, width, top, bottom, background))
+    with ProcessPoolExecutor(workers) as pool:
+        return encode_png(width, height, b''.join(pool.map(render_band, bands)))
+
+def write_png(path: str, segments: Sequence[Segment], *args, **kwargs) -> int:
+    data = render_png(segments, *args, **kwargs)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+def record_program(path: str) -> List[Segment]:
+    """Run a Mesel program on the record backend and return what it drew."""
+    import mesel_runtime
+    from code_generator import CodeGenerator
+    from instrumentation import Metrics
+    from translator import parse_source, build_imports
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    metrics = Metrics()
+    ast = parse_source(source, metrics)
+    generator = CodeGenerator(build_imports(ast, path, path.rsplit('.', 1)[0] + '.py', metrics))
+    code = generator.generate(ast)
+    if 'turtle' not in generator.features:
+        return []
+    namespace = {'__name__': '__mesel__', '__file__': path}
+    exec(compile(code, path, 'exec'), namespace)
+    previous = mesel_runtime.set_output(mesel_runtime.CaptureOutput())
+    try:
+        return mesel_runtime.select_backend('record').run(namespace['main']).segments
+    finally:
+        mesel_runtime.set_output(previous)
+
+def load_segments(path: str) -> List[Segment]:
+    """Segments from a MESEL_RECORD file, or drawn by running a .mesel program."""
+    if path.endswith('.mesel'):
+        return record_program(path)
+    import json
+    with open(path, encoding='utf-8') as f:
+        return [Segment(*segment) for segment in json.load(f)]
+
+def main():
+    import argparse
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('input', help='segments written with MESEL_RECORD, or a .mesel program')
+    arg_parser.add_argument('output', help='PNG file to write')
+    arg_parser.add_argument('--size', default='400x300', help='image size, WIDTHxHEIGHT')
+    arg_parser.add_argument('--fit', action='store_true', help='zoom to the drawing')
+    arg_parser.add_argument('--workers', type=int, default=1, help='render in this many processes')
+    args = arg_parser.parse_args()
+
+    width, height = (int(n) for n in args.size.lower().split('x'))
+    segments = load_segments(args.input)
+    start = time.perf_counter()
+    size = write_png(args.output, segments, width, height, args.fit, workers=args.workers)
+    seconds = time.perf_counter() - start
+    print(f"Rendered {len(segments)} segments to {args.output} ({width}x{height}, {size} bytes) "
+          f"in {seconds * 1000:.1f} ms, {len(segments) / max(seconds, 1e-9):,.0f} segments/s",
+          file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
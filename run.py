@@ -1,49 +1,119 @@
 import sys
 import os
+import json
+import argparse
 import subprocess
-from lexer import Lexer
-from parser import Parser
+import mesel_runtime
 from code_generator import CodeGenerator
+from instrumentation import Metrics
+from profiler import profile_program
+from line_coverage import run_with_coverage
+from compiler import CompileOptions, compile_source
+from translator import add_profile_arguments, add_parser_argument, write_metrics, build_imports
 
-def run_mesel_file(filename: str):
+OUTPUT_MODES = ('buffered', 'capture', 'callback')
+
+def execute_program(code: str, generator: CodeGenerator, filename: str):
+    """Run generated code in this process, so it writes to the current output channel."""
+    namespace = {'__name__': '__mesel__', '__file__': filename}
+    exec(compile(code, filename, 'exec'), namespace)
+    if generator.features:
+        mesel_runtime.run(namespace['main'], 'turtle' in generator.features)
+    else:
+        namespace['main']()
+
+def run_mesel_file(filename: str, metrics: Metrics = None, profile: bool = False,
+                   coverage: bool = False, parser: str = 'hand', output=None,
+                   optimize: bool = False) -> Metrics:
+    """Translate and run a Mesel file.
+
+    With an output channel from mesel_runtime (CaptureOutput, CallbackOutput)
+    the program runs in this process and its ያሳይ output goes to that channel.
+    """
+    if metrics is None:
+        metrics = Metrics()
     try:
         # Read the Mesel source code
-        with open(filename, 'r', encoding='utf-8') as file:
-            source = file.read()
-        
-        # Lexical analysis
-        lexer = Lexer(source)
-        tokens = lexer.tokenize()
-        
-        # Parsing
-        parser = Parser(tokens)
-        ast = parser.parse()
-        
-        # Code generation
-        generator = CodeGenerator()
-        python_code = generator.generate(ast)
-        
-        # Write the generated Python code to a temporary file
+        with metrics.phase('read'):
+            with open(filename, 'r', encoding='utf-8') as file:
+                source = file.read()
+        metrics.count('source_bytes', len(source.encode('utf-8')))
+
+        # Lexing, parsing and code generation, after the modules the program imports
         temp_file = filename.replace('.mesel', '.py')
-        with open(temp_file, 'w', encoding='utf-8') as file:
-            file.write(python_code)
-        
-        # Execute the generated Python code using the current Python interpreter
-        python_exe = sys.executable
-        subprocess.run([python_exe, temp_file], check=True)
+        result = compile_source(source, CompileOptions(parser, optimize=optimize),
+                                lambda ast: build_imports(ast, filename, temp_file, metrics, optimize),
+                                metrics)
+        if not result.ok:
+            raise Exception(result.diagnostics[0].message)
+        generator, python_code = result.generator, result.code
+
+        # Write the generated Python code to a temporary file
+        with metrics.phase('write'):
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                file.write(python_code)
+
+        if profile:
+            # Run in this process under the tracer so time can be charged
+            # to Mesel lines and loops
+            with metrics.phase('execute'):
+                result = profile_program(python_code, generator, temp_file)
+            print(result.report(source), file=sys.stderr)
+        elif coverage:
+            with metrics.phase('execute'):
+                result = run_with_coverage(python_code, generator, temp_file)
+            print(result.report(), file=sys.stderr)
+        elif output is not None:
+            previous = mesel_runtime.set_output(output)
+            try:
+                with metrics.phase('execute'):
+                    execute_program(python_code, generator, temp_file)
+            finally:
+                mesel_runtime.set_output(previous)
+        else:
+            # Execute the generated Python code using the current Python interpreter,
+            # with mesel_runtime importable from wherever the program was written
+            python_exe = sys.executable
+            env = dict(os.environ)
+            runtime_dir = os.path.dirname(os.path.abspath(__file__))
+            env['PYTHONPATH'] = os.pathsep.join(filter(None, [runtime_dir, env.get('PYTHONPATH')]))
+            with metrics.phase('execute'):
+                subprocess.run([python_exe, temp_file], check=True, env=env)
         
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
 
+    return metrics
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python run.py <mesel_file>")
-        sys.exit(1)
-    
-    filename = sys.argv[1]
+    arg_parser = argparse.ArgumentParser(description='Translate and run a Mesel program.')
+    arg_parser.add_argument('mesel_file')
+    arg_parser.add_argument('--coverage', action='store_true',
+                            help='report which Mesel lines and branches ran (Python 3.12+)')
+    arg_parser.add_argument('--output', choices=OUTPUT_MODES, default='buffered',
+                            help='buffered: write to stdout in blocks; capture: print all output as '
+                                 'one JSON list at the end; callback: print it as a JSON list per batch')
+    arg_parser.add_argument('--batch-size', type=int, default=mesel_runtime.OUTPUT_BATCH,
+                            help='lines per batch for --output callback')
+    add_parser_argument(arg_parser)
+    add_profile_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    filename = args.mesel_file
     if not filename.endswith('.mesel'):
         print("Error: File must have .mesel extension")
         sys.exit(1)
-    
-    run_mesel_file(filename) 
\ No newline at end of file
+
+    channel = None
+    if args.output == 'capture':
+        channel = mesel_runtime.CaptureOutput()
+    elif args.output == 'callback':
+        channel = mesel_runtime.CallbackOutput(
+            lambda lines: print(json.dumps(lines, ensure_ascii=False), flush=True), args.batch_size)
+
+    metrics = run_mesel_file(filename, Metrics(trace_memory=args.profile_memory),
+                             args.profile, args.coverage, args.parser, channel, args.optimize)
+    if args.output == 'capture':
+        print(json.dumps(channel.lines, ensure_ascii=False))
+    write_metrics(metrics, args, filename)
@@ -0,0 +1,145 @@
+"""Run many Mesel programs at once in one thread, taking turns on an asyncio loop.
+
+    program = compile_program('student.mesel', target='steps')
+    runs = run_programs([ProgramRun(program, inputs) for inputs in cases], timeout=10)
+    for run in runs:
+        print(run.steps, run.output.lines, run.error)
+
+Programs are compiled with the 'steps' target (steps_generator.py), whose
+main is a generator that yields at every loop iteration, turtle command
+and procedure call. Each ProgramRun is an asyncio task that advances its
+program slice_steps steps at a time and then lets the others run, so
+every program gets the same share of the thread whatever it does, and a
+program stuck in a loop only slows the rest down. A waiting program costs
+its generator frames and namespace instead of a process.
+
+Every run keeps its own output (ያሳይ), answers (ጠይቅ, from its inputs) and
+RecordingTurtle, and counts the steps it has taken. A run stops with an
+error when it passes max_steps, and can be cancelled like any task:
+run.cancel(), or by the timeout of run_all(). Like the programs themselves,
+a single long step (a huge ** for example) can't be interrupted. With
+--max-steps, the command line doesn't start programs that cost.py shows
+need more steps than that.
+
+Usage: python scheduler.py program.mesel ... [--slice 1000] [--max-steps N] [--timeout 10]
+
+One JSON line is printed per program.
+"""
+import asyncio
+import sys
+from itertools import islice
+from typing import List, Optional, Sequence
+from cases import CompiledProgram, compile_program
+from mesel_runtime import CaptureOutput, ListInput, RecordingTurtle, input_value
+
+SLICE_STEPS = 1000  # steps a program takes before the next one gets a turn
+
+class StepLimit(Exception):
+    """Raised in a run that takes more than its max_steps."""
+
+class ProgramRun:
+    """One program on the event loop; its steps and output so far can be read at any time."""
+
+    def __init__(self, program: CompiledProgram, inputs: Sequence = (), max_steps: Optional[int] = None):
+        self.program = program
+        self.inputs = tuple(inputs)
+        self.max_steps = max_steps
+        self.steps = 0
+        self.output = CaptureOutput()
+        self.turtle = RecordingTurtle() if program.drawing else None
+        self.error: Optional[str] = None
+        self.cancelled = False
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Run the program's top level and return the generator its main makes."""
+        namespace = {'__name__': '__mesel__', '__file__': self.program.path}
+        exec(self.program.code, namespace)
+        # Generated functions look _show and _ask up in the namespace when
+        # they are called, so these replace the shared mesel_runtime channels
+        answers = ListInput(self.inputs)
+        namespace['_show'] = self.output.write
+        namespace['_ask'] = lambda prompt=None: input_value(answers.read(prompt))
+        main = namespace['main']
+        return main(self.turtle) if self.program.drawing else main()
+
+    async def run(self, slice_steps: int = SLICE_STEPS):
+        steps = None
+        try:
+            steps = self.start()
+            while True:
+                budget = slice_steps
+                if self.max_steps is not None:
+                    budget = min(budget, self.max_steps - self.steps + 1)
+                taken = sum(1 for _ in islice(steps, budget))
+                self.steps += taken
+                if taken < budget:
+                    break  # main returned
+                if self.max_steps is not None and self.steps > self.max_steps:
+                    raise StepLimit(f"ran more than {self.max_steps} steps")
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            self.error = f"Cancelled after {self.steps} steps"
+            raise
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            if steps is not None:
+                steps.close()
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+async def run_all(runs: Sequence[ProgramRun], slice_steps: int = SLICE_STEPS,
+                  timeout: Optional[float] = None) -> Sequence[ProgramRun]:
+    """Run every run to its end, taking turns; those still running after timeout seconds are cancelled."""
+    for run in runs:
+        run.task = asyncio.create_task(run.run(slice_steps))
+    tasks = [run.task for run in runs]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return runs
+
+def run_programs(runs: Sequence[ProgramRun], slice_steps: int = SLICE_STEPS,
+                 timeout: Optional[float] = None) -> Sequence[ProgramRun]:
+    """run_all() on a new event loop."""
+    return asyncio.run(run_all(runs, slice_steps, timeout))
+
+def main() -> int:
+    import argparse
+    import json
+    from cost import estimate_file
+    from fingerprint import fingerprint
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('programs', nargs='+', help='.mesel programs')
+    arg_parser.add_argument('--slice', type=int, default=SLICE_STEPS, help='steps per turn')
+    arg_parser.add_argument('--max-steps', type=int, default=None, help='steps a program may take')
+    arg_parser.add_argument('--timeout', type=float, default=None, help='seconds for all the programs')
+    args = arg_parser.parse_args()
+
+    runs: List[ProgramRun] = []
+    for path in args.programs:
+        try:
+            runs.append(ProgramRun(compile_program(path, target='steps'), max_steps=args.max_steps))
+            # Don't start what certainly runs out of steps
+            needed = estimate_file(path).steps.lo if args.max_steps is not None else 0
+        except Exception as e:
+            print(f"Error: {path}: {e}")
+            return 1
+        if args.max_steps is not None and needed > args.max_steps:
+            runs[-1].error = f"{StepLimit.__name__}: needs at least {needed:g} steps"
+    run_programs([run for run in runs if run.error is None], args.slice, args.timeout)
+    for path, run in zip(args.programs, runs):
+        record = {'program': path, 'steps': run.steps, 'output': run.output.lines, 'error': run.error}
+        if run.turtle is not None:
+            record['drawing'] = fingerprint(run.turtle.segments).digest
+        print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Steps target: Python whose main is a generator, so many programs can share a thread.
+
+    generator = generator_class('steps')()
+    code = generator.generate(ast)
+
+The code is what the 'python' target writes, except that main and every
+procedure are generators that yield once per step: at the top of each
+loop iteration, after each turtle command and on entering a procedure.
+Procedures are called with `yield from`, so their steps are the caller's
+steps. Nothing runs until the generator is advanced; scheduler.py advances
+many programs a slice of steps at a time on an asyncio loop, and the file
+run as a script goes through mesel_runtime.complete(), which takes every
+step at once.
+
+Not supported yet, and rejected: imports and -O.
+"""
+from parser import *
+from code_generator import CodeGenerator, private_import
+
+class SteppingGenerator(CodeGenerator):
+    """Generates Python with generator mains that yield at every step (the 'steps' target)."""
+    target = 'steps'
+
+    def __init__(self, modules=None, optimize: bool = False):
+        if optimize:
+            raise ValueError("the steps target can't memoize procedures (-O) yet")
+        super().__init__(modules, optimize)
+
+    def module_ref(self, node: Import):
+        raise Exception(f"Error at line {node.line}, column {node.column}: "
+                        f"the steps target can't compile imports yet")
+
+    def generate_program(self, node: Program) -> str:
+        self.features = self.analyze(node)
+        drawing = 'turtle' in self.features
+        printing = 'print' in self.features
+        asking = 'input' in self.features
+        procedures = [statement for statement in node.statements if isinstance(statement, Procedure)]
+        self.top_level_procedures = {id(procedure) for procedure in procedures}
+        code = []
+        if self.list_names:
+            code.append(private_import('mesel_lists', sorted(self.list_names)))
+        names = ['run', 'complete'] + ['show'] * printing + ['ask'] * asking
+        code.extend([private_import('mesel_runtime', names), ""])
+        for procedure in procedures:
+            code.extend(self.generate(procedure).split('\n'))
+            code.append("")
+        code.append("def main(t):" if drawing else "def main():")
+        code.append("    yield")  # main is a generator even if it never loops or draws
+        for statement in node.statements:
+            if isinstance(statement, Procedure):
+                continue
+            stmt_code = self.generate(statement)
+            if stmt_code:
+                code.extend('    ' + line for line in stmt_code.split('\n'))
+        code.extend([
+            "",
+            "if __name__ == '__main__':",
+            "    _run(_complete(main))" if drawing else "    _run(_complete(main), drawing=False)"
+        ])
+        return self.extract_source_map("\n".join(code))
+
+    def step(self, code: str) -> str:
+        """code for a compound statement with a yield at the top of its body."""
+        header, _, body = code.partition('\n')
+        return f"{header}\n    yield\n{body}"
+
+    def generate_for_loop(self, node: ForLoop) -> str:
+        return self.step(super().generate_for_loop(node))
+
+    def generate_while_loop(self, node: WhileLoop) -> str:
+        return self.step(super().generate_while_loop(node))
+
+    def generate_procedure(self, node: Procedure) -> str:
+        return self.step(super().generate_procedure(node))
+
+    def generate_turtle_command(self, node: TurtleCommand) -> str:
+        return f"{super().generate_turtle_command(node)}\nyield"
+
+    def generate_call(self, node: Call) -> str:
+        code = super().generate_call(node)
+        if node.name in self.procedures:
+            return f"(yield from {code})"
+        return code
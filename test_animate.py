@@ -0,0 +1,137 @@
+import math
+import random
+import struct
+import unittest
+import zlib
+from unittest import mock
+import animate
+import raster
+from mesel_runtime import Segment
+from test_raster import decode
+
+def spiral(count: int):
+    segments = []
+    x = y = 0.0
+    for i in range(count):
+        angle = math.radians(i * 7)
+        nx, ny = x + (2 + i * 0.02) * math.cos(angle), y + (2 + i * 0.02) * math.sin(angle)
+        segments.append(Segment(x, y, nx, ny, ('blue', 'red')[i * 2 // count], 2))
+        x, y = nx, ny
+    return segments
+
+def apng_image(data: bytes):
+    """acTL frame count, every fcTL, and the RGB rows of the last frame drawn over the others."""
+    # Frames are RGBA, opaque where they change the image and transparent elsewhere
+    assert data.startswith(raster.PNG_SIGNATURE)
+    width, height = struct.unpack('>II', data[16:24])
+    image = [bytearray(width * 3) for _ in range(height)]
+    controls, position, count = [], 8, None
+    while position < len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if kind == b'acTL':
+            count = struct.unpack('>I', body[:4])[0]
+        elif kind == b'fcTL':
+            controls.append(struct.unpack('>IIIIIHHBB', body))
+        elif kind in (b'IDAT', b'fdAT'):
+            _, w, h, x, y = controls[-1][:5]
+            rows = zlib.decompress(body if kind == b'IDAT' else body[4:])
+            for row in range(h):
+                pixels = rows[row * (w * 4 + 1) + 1:(row + 1) * (w * 4 + 1)]
+                for col in range(w):
+                    if pixels[col * 4 + 3]:
+                        image[y + row][(x + col) * 3:(x + col + 1) * 3] = pixels[col * 4:col * 4 + 3]
+    return count, controls, image
+
+def unlzw(data: bytes, minimum: int = 8) -> bytes:
+    """A GIF LZW decoder, written from the format rather than from animate.lzw."""
+    clear, end = 1 << minimum, (1 << minimum) + 1
+    bits = int.from_bytes(data, 'little')
+    position, size, table, previous, out = 0, minimum + 1, None, None, bytearray()
+    while True:
+        code = bits >> position & ((1 << size) - 1)
+        position += size
+        if code == clear:
+            table = [bytes([i]) for i in range(clear)] + [b'', b'']
+            size, previous = minimum + 1, None
+            continue
+        if code == end:
+            return bytes(out)
+        if code < len(table):
+            entry = table[code]
+            if previous is not None:
+                table.append(previous + entry[:1])
+        else:
+            entry = previous + previous[:1]
+            table.append(entry)
+        out += entry
+        previous = entry
+        if len(table) == 1 << size and size < 12:
+            size += 1
+
+class TestAnimate(unittest.TestCase):
+    def test_apng_frames(self):
+        segments = spiral(1000)
+        count, controls, image = apng_image(animate.render_animation(segments, 200, 150, frames=10, fps=20))
+
+        self.assertEqual((count, len(controls)), (10, 10))
+        self.assertEqual(controls[0][1:5], (200, 150, 0, 0))
+        # Later frames only carry the rectangle their segments changed
+        self.assertTrue(all(w * h < 200 * 150 and x + w <= 200 and y + h <= 150
+                            for _, w, h, x, y, *_ in controls[1:]))
+        self.assertEqual([c[0] for c in controls], [0] + list(range(1, 18, 2)))  # IDAT has none
+        self.assertEqual([c[5] for c in controls], [5] * 9 + [animate.HOLD_CENTISECONDS])
+        # Frame by frame, it ends up as the whole drawing rendered at once
+        _, _, expected = decode(raster.render_png(segments, 200, 150))
+        self.assertLessEqual(max(abs(a - b) for row, other in zip(image, expected) for a, b in zip(row, other)), 1)
+
+    def test_python_matches_numpy(self):
+        if raster.numpy is None:
+            self.skipTest('NumPy is not installed')
+        segments = spiral(200)
+        _, controls, expected = apng_image(animate.render_animation(segments, 80, 60, fit=True, frames=5))
+        with mock.patch.object(raster, 'numpy', None):
+            _, python_controls, image = apng_image(animate.render_animation(segments, 80, 60, fit=True, frames=5))
+        self.assertEqual(len(python_controls), len(controls))
+        self.assertLessEqual(max(abs(a - b) for row, other in zip(image, expected) for a, b in zip(row, other)), 1)
+
+    def test_lzw(self):
+        rng = random.Random(3)
+        for data in (bytes([7]), bytes(range(256)) * 3, bytes(rng.choice(b'\x00\x01\x02') for _ in range(50000)),
+                     bytes(rng.randrange(256) for _ in range(20000))):
+            self.assertEqual(unlzw(animate.lzw(data)), data)
+
+    def test_gif(self):
+        segments = [Segment(-100, 0, 100, 0, 'blue', 20), Segment(0, -100, 0, 100, 'red', 20)]
+        gif = animate.render_animation(segments, 200, 150, frames=2, format='gif')
+        self.assertTrue(gif.startswith(b'GIF89a') and gif.endswith(b'\x3b'))
+        palette = animate.gif_palette(segments)
+        self.assertEqual((palette[0], len(palette)), ((255, 255, 255), 255))
+        self.assertIn((0, 0, 255), palette)
+
+        # Two images: the whole first frame, then the red line's rectangle
+        images = []
+        position = gif.index(b'\x2c', 13 + 768)
+        while gif[position] == 0x2c:
+            left, top, width, height = struct.unpack('<HHHH', gif[position + 1:position + 9])
+            position += 11  # descriptor and LZW code size
+            data = bytearray()
+            while gif[position]:
+                data += gif[position + 1:position + 1 + gif[position]]
+                position += 1 + gif[position]
+            images.append((left, top, width, height, unlzw(bytes(data))))
+            position += 1
+            if gif[position] == 0x21:
+                position += 8  # the next frame's graphic control extension
+        self.assertEqual(len(images), 2)
+        self.assertEqual(images[0][:4], (0, 0, 200, 150))
+        left, top, width, height, indexes = images[1]
+        self.assertLess(width, 20)
+        self.assertEqual(palette[indexes[(75 - top) * width + 100 - left]], (255, 0, 0))
+        # Where the red line doesn't change the first frame, the first frame shows through
+        self.assertEqual(indexes[0], animate.TRANSPARENT)
+        self.assertNotIn(animate.TRANSPARENT, images[0][4])
+
+if __name__ == '__main__':
+    unittest.main()
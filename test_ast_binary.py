@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+import ast_binary
+from lexer import Lexer
+from parser import Parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from program_generator import generate_program
+
+class TestAstBinary(unittest.TestCase):
+    def parse(self, code: str):
+        return Parser(Lexer(code).tokenize()).parse()
+
+    def test_round_trip(self):
+        code = """
+        ተግባር ካሬ(መጠን, ቀለም_ቁጥር)
+            መልስ መጠን * መጠን
+        ጨርስ
+        ካሬ(2, 3)
+        ቁጥር ሀ = -(2 + 3) * 4.5
+        ቁጥር ለ = [1, ሀ, []][0]
+        ቁጥር ሐ = ጠይቅ + ጠይቅ "ስንት?"
+        እድግ 3
+            ከሆነ ሀ >= 1
+                ያሳይ "ሰላም"
+                ተው
+            ጨርስ
+            ካልሆነ
+                ቀለም ቀይ
+                ሂድ ሀ
+                ስዕል_አቁም
+            ጨርስ
+        ጨርስ
+        """
+        ast = self.parse(code)
+        data = ast_binary.dump(ast)
+
+        self.assertTrue(data.startswith(ast_binary.MAGIC))
+        self.assertEqual(ast_binary.load(data), ast)
+        self.assertEqual(ast_binary.load(memoryview(data)), ast)
+
+    def test_generated_programs(self):
+        for seed in range(10):
+            ast = self.parse(generate_program(3000, seed=seed, max_depth=seed % 5))
+            self.assertEqual(ast_binary.load(ast_binary.dump(ast)), ast)
+
+    def test_strings_are_interned(self):
+        once = ast_binary.dump(self.parse("ያሳይ ረጅም_ስም"))
+        many = ast_binary.dump(self.parse("ያሳይ ረጅም_ስም\n" * 10))
+
+        self.assertEqual(many.count("ረጅም_ስም".encode('utf-8')), 1)
+        self.assertLess(len(many), 10 * len(once))
+
+    def test_rejects_bad_data(self):
+        data = ast_binary.dump(self.parse("ሂድ 10"))
+        with self.assertRaises(ValueError):
+            ast_binary.load(b'XXXX' + data[4:])
+        with self.assertRaises(ValueError):
+            ast_binary.load(data[:4] + bytes([ast_binary.VERSION + 1]) + data[5:])
+        # Cut anywhere, even in the header or the string table
+        for end in range(len(data)):
+            with self.assertRaises(ValueError):
+                ast_binary.load(data[:end])
+        with self.assertRaises(ValueError):
+            ast_binary.load(data.replace('TURTLE_COMMAND'.encode(), b'TURTLE_C\xffMMAND'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+import mesel_runtime
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+from build import BuildCache
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.write('lib/square.mesel', 'እድግ 4\n    ሂድ 10\n    ዙር 90\nጨርስ\n')
+        self.write('lib/hello.mesel', 'ያሳይ "ሰላም"\n')
+        self.write('shapes.mesel', 'አስገባ "lib/square"\nአስገባ "lib/hello"\n')
+        self.write('main.mesel', 'አስገባ "shapes"\nአስገባ "lib/hello.mesel"\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, text: str):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def build(self, name: str = 'main.mesel'):
+        source_file = os.path.join(self.dir, name)
+        with open(source_file, encoding='utf-8') as f:
+            ast = Parser(Lexer(f.read()).tokenize()).parse()
+        cache = BuildCache.for_output(source_file)
+        generator = CodeGenerator(cache.compile_imports(source_file, ast))
+        code = generator.generate(ast)
+        return cache, generator, code
+
+    def rebuilt(self, cache: BuildCache):
+        return sorted(os.path.basename(path) for path in cache.compiled)
+
+    def test_modules_are_compiled_once_and_cached(self):
+        cache, _, _ = self.build()
+        self.assertEqual(self.rebuilt(cache), ['hello.mesel', 'shapes.mesel', 'square.mesel'])
+
+        cache, _, _ = self.build()
+        self.assertEqual(cache.compiled, [])
+        self.assertEqual(len(cache.cached), 3)
+
+    def test_edit_rebuilds_module_and_dependents(self):
+        self.build()
+        self.write('lib/hello.mesel', 'ያሳይ "ሰላም ዓለም"\n')
+
+        cache, _, _ = self.build()
+        self.assertEqual(self.rebuilt(cache), ['hello.mesel', 'shapes.mesel'])
+        self.assertEqual([os.path.basename(path) for path in cache.cached], ['square.mesel'])
+
+    def test_run_imported_modules(self):
+        _, generator, code = self.build()
+        self.assertEqual(generator.features, {'turtle', 'print', 'import'})
+
+        capture = mesel_runtime.CaptureOutput()
+        previous = mesel_runtime.set_output(capture)
+        try:
+            namespace = {'__name__': '__test__', '__file__': os.path.join(self.dir, 'main.py')}
+            exec(compile(code, 'main.py', 'exec'), namespace)
+            t = mesel_runtime.select_backend('record').run(namespace['main'])
+            mesel_runtime.output.flush()
+        finally:
+            mesel_runtime.set_output(previous)
+        self.assertEqual(len(t.segments), 4)
+        self.assertEqual(capture.lines, ['ሰላም', 'ሰላም'])
+
+    def test_imported_procedures(self):
+        self.write('lib/math.mesel', 'ተግባር ካሬ(x)\n    መልስ x * x\nጨርስ\n')
+        self.write('main.mesel', 'አስገባ "lib/math"\nያሳይ ካሬ(3)\n')
+        _, _, code = self.build()
+        self.assertIn("show(mesel_math_", code)
+        self.assertIn(".ካሬ(3.0))", code)
+
+        cache, generator, cached_code = self.build()
+        self.assertEqual(cache.compiled, [])
+        self.assertEqual(cached_code, code)
+
+    def test_import_cycle(self):
+        self.write('lib/hello.mesel', 'አስገባ "../shapes"\n')
+        with self.assertRaises(Exception) as context:
+            self.build()
+        self.assertIn('import cycle shapes.mesel -> hello.mesel -> shapes.mesel', str(context.exception))
+
+    def test_missing_module(self):
+        self.write('main.mesel', '\nአስገባ "missing"\n')
+        with self.assertRaises(Exception) as context:
+            self.build()
+        self.assertIn('line 2, column 1', str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+import mesel_runtime
+from bundle import Bundle, build_bundle
+
+class TestBundle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = os.path.join(self.tmp.name, 'lessons')
+        self.write('lib/hello.mesel', 'ያሳይ "ሰላም"\n')
+        self.write('greet.mesel', 'አስገባ "lib/hello"\nያሳይ ድምር([1, 2])\n')
+        self.write('square.mesel', 'እድግ 4\n    ሂድ 10\n    ዙር 90\nጨርስ\n')
+        self.archive = os.path.join(self.tmp.name, 'lessons.pyz')
+        self.index = build_bundle(self.dir, self.archive)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        for name in list(sys.modules):
+            if name.startswith('mesel_hello_'):
+                del sys.modules[name]
+
+    def write(self, name: str, text: str):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_index(self):
+        lessons = self.index['lessons']
+        self.assertEqual(sorted(lessons), ['greet', 'lib/hello', 'square'])
+        self.assertEqual(lessons['greet']['requires'], [lessons['lib/hello']['module']])
+        with zipfile.ZipFile(self.archive) as archive:
+            names = archive.namelist()
+        self.assertIn('__main__.py', names)
+        self.assertIn('mesel_runtime.pyc', names)
+        self.assertIn('mesel_lists.py', names)
+        # lib/hello is stored once although greet imports it
+        self.assertEqual(len([name for name in names if name.startswith('code/')]), 3)
+
+    def test_lessons_load_lazily(self):
+        capture = mesel_runtime.CaptureOutput()
+        previous = mesel_runtime.set_output(capture)
+        try:
+            with Bundle(self.archive) as bundle:
+                bundle.run('greet')
+                self.assertEqual(len(bundle.codes), 2)
+        finally:
+            mesel_runtime.set_output(previous)
+        self.assertEqual(capture.lines, ['ሰላም', '3.0'])
+
+    def test_run_archive_without_sources(self):
+        env = dict(os.environ, MESEL_BACKEND='record')
+        env.pop('PYTHONPATH', None)
+        run = lambda *args: subprocess.run([sys.executable, self.archive, *args], env=env,
+                                           cwd=self.tmp.name, capture_output=True, text=True,
+                                           encoding='utf-8')
+        self.assertEqual(run().stdout.split(), ['greet', 'lib/hello', 'square'])
+        self.assertEqual(run('greet').stdout, 'ሰላም\n3.0\n')
+        self.assertEqual(run('square').returncode, 0)
+        result = run('missing')
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("No lesson 'missing'", result.stderr)
+
+    def test_rejects_other_python(self):
+        path = os.path.join(self.tmp.name, 'old.pyz')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('index.json', '{"format": 1, "python": "00000000", "lessons": {}}')
+        with self.assertRaises(RuntimeError):
+            Bundle(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import mesel_runtime
+from cases import compile_program, run_cases
+from mesel_runtime import ListInput, input_value
+
+class TestCases(unittest.TestCase):
+    def compile(self, code: str):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'program.mesel')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        return compile_program(path)
+
+    def test_input_values(self):
+        self.assertEqual([input_value(value) for value in (3, ' -2.5 ', '1e3', '.5', 'ሰላም', '12a', '')],
+                         [3.0, -2.5, 1000.0, 0.5, 'ሰላም', '12a', ''])
+        channel = ListInput(['1'])
+        self.assertEqual(channel.read('?'), '1')
+        with self.assertRaises(EOFError):
+            channel.read(None)
+
+    def test_run_cases(self):
+        program = self.compile('ቁጥር ሀ = ጠይቅ "ስንት?"\nቁጥር ለ = ጠይቅ\nያሳይ ሀ + ለ\n')
+        output = mesel_runtime.output
+        results = run_cases(program, [[1, 2], ['3', '4.5'], ['ሰ', 'ላም'], [1]])
+
+        self.assertEqual([result.output for result in results], [['3.0'], ['7.5'], ['ሰላም'], []])
+        self.assertEqual([result.error for result in results[:3]], [None] * 3)
+        self.assertTrue(results[3].error.startswith('EOFError'))
+        self.assertEqual(results[1].inputs, ('3', '4.5'))
+        # The runtime's channels are put back after the run
+        self.assertIs(mesel_runtime.output, output)
+        self.assertIsInstance(mesel_runtime.input_channel, mesel_runtime.ConsoleInput)
+
+    def test_fresh_namespace_and_drawing(self):
+        program = self.compile('ተግባር ካሬ(መጠን)\n    እድግ 4\n        ሂድ መጠን\n        ዙር 90\n    ጨርስ\nጨርስ\n'
+                               'ካሬ(ጠይቅ)\nያሳይ "ተሳለ"\n')
+        small, large = run_cases(program, [[10], [50]])
+
+        self.assertTrue(program.drawing)
+        self.assertEqual((len(small.segments), len(large.segments)), (4, 4))
+        self.assertAlmostEqual(small.segments[0].x1, 10.0)
+        self.assertAlmostEqual(large.segments[0].x1, 50.0)
+        self.assertEqual(small.output, ['ተሳለ'])
+
+    def test_timeout(self):
+        program = self.compile('ቁጥር ሀ = ጠይቅ\nድገም ሀ > 0\n    አስቀምጥ ሀ = ሀ + 1\nጨርስ\nያሳይ ሀ\n')
+        results = run_cases(program, [[0], [1], [-5]], timeout=0.2)
+
+        self.assertEqual([result.timed_out for result in results], [False, True, False])
+        self.assertEqual(results[0].output, ['0.0'])
+        self.assertEqual(results[2].output, ['-5.0'])
+        self.assertLess(results[1].seconds, 2)
+
+    def test_tracing_after_a_run(self):
+        # The watchdog must leave the interpreter as it found it: a profile
+        # run afterwards in the same process used to hang on 3.11
+        script = """
+import os, tempfile
+from cases import compile_program, run_cases
+from code_generator import CodeGenerator
+from lexer import Lexer
+from parser import Parser
+from profiler import profile_program
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'program.mesel')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('ቁጥር ሀ = ጠይቅ\\nድገም ሀ > 0\\n    አስቀምጥ ሀ = ሀ + 1\\nጨርስ\\n')
+    results = run_cases(compile_program(path), [[0], [1], [0]], timeout=0.2)
+assert [result.timed_out for result in results] == [False, True, False], results
+generator = CodeGenerator()
+code = generator.generate(Parser(Lexer('እድግ 10\\n    ተው\\nጨርስ\\n').tokenize()).parse())
+print(profile_program(code, generator).loops[0].iterations)
+"""
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=60,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), '1', result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
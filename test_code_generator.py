@@ -0,0 +1,254 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+
+class TestCodeGenerator(unittest.TestCase):
+    def generate_code(self, code: str) -> str:
+        lexer = Lexer(code)
+        tokens = lexer.tokenize()
+        parser = Parser(tokens)
+        return CodeGenerator().generate(parser.parse())
+
+    def test_plain_program_has_no_turtle(self):
+        code = """
+        ጀምር
+            አስቀምጥ ሀ = 10
+            አስቀምጥ ለ = 5
+            ያሳይ ሀ + ለ
+        ጨርስ
+        """
+        python_code = self.generate_code(code)
+
+        self.assertNotIn('turtle', python_code)
+        self.assertNotIn('mainloop', python_code)
+        self.assertIn('show(ሀ + ለ)', python_code)
+        self.assertIn('run(main, drawing=False)', python_code)
+        compile(python_code, '<test>', 'exec')
+
+    def test_drawing_program_sets_up_turtle(self):
+        code = """
+        ጀምር
+            እድግ 4
+                ሂድ 100
+                ዙር 90
+            ጨርስ
+        ጨርስ
+        """
+        python_code = self.generate_code(code)
+
+        self.assertIn('from mesel_runtime import run', python_code)
+        self.assertIn('def main(t):', python_code)
+        self.assertIn('t.forward(100.0)', python_code)
+
+    def test_empty_program(self):
+        python_code = self.generate_code("ጀምር\nጨርስ\n")
+
+        self.assertNotIn('turtle', python_code)
+        compile(python_code, '<test>', 'exec')
+
+    def test_pen_commands_take_no_argument(self):
+        code = """
+        ስዕል_ጀምር
+        ሂድ 10
+        ስዕል_አቁም
+        ሂድ 10
+        """
+        python_code = self.generate_code(code)
+
+        self.assertIn('    t.pendown()\n    t.forward(10.0)\n    t.penup()', python_code)
+
+    def test_if_else_and_while(self):
+        code = """
+        ጀምር
+            አስቀምጥ ሀ = 0
+            ድገም ሀ < 3
+                አስቀምጥ ሀ = ሀ + 1
+            ጨርስ
+            ከሆነ ሀ > 2
+                ያሳይ "ትልቅ"
+            ጨርስ
+            ካልሆነ
+            ጨርስ
+        ጨርስ
+        """
+        python_code = self.generate_code(code)
+
+        self.assertIn('    while ሀ < 3.0:\n        ሀ = ሀ + 1.0', python_code)
+        self.assertIn('    else:\n        pass', python_code)
+        compile(python_code, '<test>', 'exec')
+
+    def test_source_map(self):
+        code = "ጀምር\n    እድግ 4\n        ሂድ 100\n        ዙር 90\n    ጨርስ\nጨርስ\n"
+        generator = CodeGenerator()
+        python_code = generator.generate(Parser(Lexer(code).tokenize()).parse())
+        lines = python_code.split('\n')
+
+        self.assertNotIn('\x00', python_code)
+        self.assertEqual(lines[3], '    for _ in range(0, 4):')
+        self.assertEqual(generator.source_map[4], (2, 5, 'FOR_LOOP'))
+        self.assertEqual(generator.source_map[5], (3, 9, 'TURTLE_COMMAND'))
+        self.assertEqual(generator.source_map[6], (4, 9, 'TURTLE_COMMAND'))
+        self.assertEqual(generator.loop_spans, {4: 6})
+
+    def test_analyze_features(self):
+        generator = CodeGenerator()
+        lexer = Lexer('ቀለም ቀይ\nያሳይ 1\n')
+        ast = Parser(lexer.tokenize()).parse()
+
+        self.assertEqual(generator.analyze(ast), {'turtle', 'print'})
+
+    def test_input(self):
+        lexer = Lexer('ተግባር ሀ()\n    መልስ ጠይቅ "ስንት?"\nጨርስ\nቁጥር ለ = ሀ() + ጠይቅ\n')
+        generator = CodeGenerator(optimize=True)
+        code = generator.generate(Parser(lexer.tokenize()).parse())
+
+        self.assertEqual(generator.features, {'input'})
+        self.assertFalse(generator.procedures['ሀ'].pure)
+        self.assertNotIn('lru_cache', code)
+        self.assertIn('from mesel_runtime import run as _run, ask as _ask\n', code)
+        self.assertIn('    return _ask("ስንት?")\n', code)
+        self.assertIn('    ለ = ሀ() + _ask()\n', code)
+        self.assertIn("    _run(main, drawing=False)", code)
+
+    def run_program(self, python_code: str):
+        import mesel_runtime
+        namespace = {'__name__': '__test__'}
+        exec(compile(python_code, '<test>', 'exec'), namespace)
+        capture = mesel_runtime.CaptureOutput()
+        previous = mesel_runtime.set_output(capture)
+        try:
+            t = None
+            if 'def main(t):' in python_code:
+                t = mesel_runtime.select_backend('record').run(namespace['main'])
+            else:
+                namespace['main']()
+            mesel_runtime.output.flush()
+        finally:
+            mesel_runtime.set_output(previous)
+        return namespace, t, capture.lines
+
+    def test_procedures(self):
+        code = """
+        ተግባር ጎን(መጠን)
+            ሂድ መጠን
+            ዙር 90
+        ጨርስ
+        ተግባር ካሬ(መጠን)
+            እድግ 4
+                ጎን(መጠን)
+            ጨርስ
+        ጨርስ
+        ተግባር ድምር(ሀ, ለ)
+            መልስ ሀ + ለ
+        ጨርስ
+        ካሬ(10)
+        ያሳይ ድምር(2, 3)
+        """
+        python_code = self.generate_code(code)
+
+        self.assertIn('def ጎን(t, መጠን):', python_code)
+        self.assertIn('def ድምር(ሀ, ለ):\n    return ሀ + ለ', python_code)
+        self.assertIn('        ጎን(t, መጠን)', python_code)
+        _, t, lines = self.run_program(python_code)
+        self.assertEqual(len(t.segments), 4)
+        self.assertEqual(lines, ['5.0'])
+
+    def test_optimize_memoizes_pure_procedures(self):
+        code = """
+        ተግባር ፊቦ(n)
+            ከሆነ n < 2
+                መልስ n
+            ጨርስ
+            መልስ ፊቦ(n - 1) + ፊቦ(n - 2)
+        ጨርስ
+        ተግባር ጻፍ(n)
+            ያሳይ ፊቦ(n)
+        ጨርስ
+        ጻፍ(80)
+        """
+        ast = Parser(Lexer(code).tokenize()).parse()
+        python_code = CodeGenerator(optimize=True).generate(ast)
+
+        self.assertIn('@lru_cache(maxsize=4096)\ndef ፊቦ(n):', python_code)
+        self.assertIn('\ndef ጻፍ(n):', python_code)
+        namespace, _, lines = self.run_program(python_code)
+        self.assertEqual(lines, ['2.3416728348467684e+16'])
+        self.assertEqual(namespace['ፊቦ'].cache_info().misses, 81)
+
+    def test_procedure_errors(self):
+        for code, message in [
+            ("ያሳይ የለም(1)", "unknown procedure 'የለም'"),
+            ("ተግባር ሀ(x)\nጨርስ\nሀ(1, 2)", "'ሀ' takes 1 arguments, got 2"),
+            ("መልስ 1", "'መልስ' outside a procedure"),
+            ("ጀምር\nተግባር ሀ()\nጨርስ\nጨርስ", "top level"),
+        ]:
+            with self.assertRaises(Exception) as context:
+                self.generate_code(code)
+            self.assertIn(message, str(context.exception))
+
+    def test_lists(self):
+        code = """
+        ቁጥር total = 5
+        ቁጥር vector = 0
+        ቁጥር ሀ = [1, 2, 3]
+        ተግባር ብዛት(x)
+            መልስ x
+        ጨርስ
+        ያሳይ ድምር(ሀ * ሀ)
+        ያሳይ (ሀ + 1)[0]
+        ያሳይ ትልቁ(ክልል(2, 5))
+        ያሳይ ብዛት(7)
+        ያሳይ total
+        """
+        python_code = self.generate_code(code)
+
+        # The list runtime is out of the way of variables with the same names
+        self.assertIn('from mesel_lists import largest as _largest, span as _span, total as _total, '
+                      'vector as _vector', python_code)
+        self.assertIn('ሀ = _vector([1.0, 2.0, 3.0])', python_code)
+        self.assertIn('show((ሀ + 1.0)[0.0])', python_code)
+        _, _, lines = self.run_program(python_code)
+        self.assertEqual(lines, ['14.0', '2.0', '4.0', '7.0', '5.0'])
+        with self.assertRaises(Exception) as context:
+            self.generate_code("ያሳይ ክልል(1, 2, 3)")
+        self.assertIn("'ክልል' takes 1 or 2 arguments, got 3", str(context.exception))
+
+    def test_parentheses(self):
+        code = """
+        ያሳይ (1 + 2) * 3
+        ያሳይ 10 - (4 - 1)
+        ያሳይ 10 - 4 - 1
+        ያሳይ -2 ** 2
+        ያሳይ 3 > 2 == 1 > 2
+        """
+        python_code = self.generate_code(code)
+
+        self.assertIn('show((1.0 + 2.0) * 3.0)', python_code)
+        self.assertIn('show(10.0 - 4.0 - 1.0)', python_code)
+        _, _, lines = self.run_program(python_code)
+        self.assertEqual(lines, ['9.0', '7.0', '5.0', '4.0', 'False'])
+
+    def test_names_the_generated_code_uses(self):
+        code = """
+        ተግባር ረ(t, main)
+            ሂድ t + main
+        ጨርስ
+        ቁጥር t = 3
+        ቁጥር main = 4
+        ረ(t, main)
+        ያሳይ t
+        """
+        python_code = self.generate_code(code)
+
+        self.assertIn('def ረ(t, _t, _main):\n    t.forward(_t + _main)', python_code)
+        _, t, lines = self.run_program(python_code)
+        self.assertEqual((len(t.segments), t.segments[0].x1, lines), (1, 7.0, ['3.0']))
+
+        self.assertIn('_class = 5.0', self.generate_code('ቁጥር class = 5\nያሳይ class\n'))
+        # Nor with the runtime functions the generated code calls
+        _, _, lines = self.run_program(self.generate_code('ቁጥር show = 5\nቁጥር run = 1\nያሳይ show + run\n'))
+        self.assertEqual(lines, ['6.0'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from compiler import CompileOptions, compile_source
+from lexer import Lexer, TokenType
+
+class TestCompiler(unittest.TestCase):
+    def test_compile_source(self):
+        result = compile_source("እድግ 4\n    ሂድ 100\n    ዙር 90\nጨርስ\n")
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.tokens, tuple(Lexer("እድግ 4\n    ሂድ 100\n    ዙር 90\nጨርስ\n").tokenize()))
+        self.assertEqual(result.tokens[-1].type, TokenType.EOF)
+        self.assertIn('    for _ in range(0, 4):\n        t.forward(100.0)', result.code)
+        self.assertEqual(result.generator.features, {'turtle'})
+        self.assertEqual(set(result.timings), {'lex', 'parse', 'codegen'})
+        with self.assertRaises(TypeError):
+            result.timings['lex'] = 0.0
+
+        javascript = compile_source("ሂድ 100", CompileOptions(target='js'))
+        self.assertIn('t.forward(100.0);', javascript.code)
+        lark = compile_source("ሂድ 100", CompileOptions(parser='lark'))
+        self.assertIsNone(lark.tokens)
+        self.assertEqual(lark.code, compile_source("ሂድ 100").code)
+
+    def test_diagnostics(self):
+        for source, phase, line, column in [
+            ("ሂድ 1\nያሳይ $", 'lex', 2, 5),
+            ("ሂድ 1\nያሳይ \"ሀ", 'lex', 2, 5),
+            ("ሂድ 1\nእድግ 4\n", 'parse', None, None),
+            ("ሂድ 1\n  መልስ 1", 'codegen', 2, 3),
+            ("አስገባ \"ሌላ.mesel\"", 'codegen', 1, 1),
+        ]:
+            with self.subTest(source=source):
+                result = compile_source(source)
+                self.assertFalse(result.ok)
+                self.assertIsNone(result.code)
+                diagnostic, = result.diagnostics
+                self.assertEqual(diagnostic.phase, phase)
+                if line is not None:
+                    self.assertEqual((diagnostic.line, diagnostic.column), (line, column))
+        with self.assertRaises(ValueError):
+            compile_source("ሂድ 1", CompileOptions(parser='yacc'))
+
+    def test_concurrent_calls(self):
+        sources = [f"ተግባር ሀ{i}(x)\n    መልስ x * {i}\nጨርስ\nእድግ {i % 7 + 1}\n    ሂድ ሀ{i}(2)\nጨርስ\n"
+                   f"ያሳይ \"{i}\"\n" + "ሂድ $\n" * (i % 5 == 0)
+                   for i in range(200)]
+        serial = [compile_source(source) for source in sources]
+        with ThreadPoolExecutor(8) as pool:
+            threaded = list(pool.map(compile_source, sources))
+        for one, other in zip(serial, threaded):
+            self.assertEqual((one.code, one.diagnostics, one.tokens), (other.code, other.diagnostics, other.tokens))
+        self.assertEqual(sum(result.ok for result in threaded), 160)
+
+    def test_compiling_doesnt_start_the_runtime(self):
+        # mesel_runtime picks a backend when imported; the compiler shouldn't need one
+        script = ("import sys\nimport build, translator\nfrom compiler import CompileOptions, compile_source\n"
+                  "print(all(compile_source('ቀይ\\nሂድ 1\\n', CompileOptions(target=target)).ok\n"
+                  "          for target in ('python', 'js', 'steps')), 'mesel_runtime' in sys.modules)\n")
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=60,
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env=dict(os.environ, MESEL_BACKEND='nonsense'))
+        self.assertEqual(result.stdout.split(), ['True', 'False'], result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import math
+import os
+import unittest
+from cost import Interval, estimate, estimate_file, triage
+from lexer import Lexer
+from parser import Parser
+from scheduler import ProgramRun, run_programs
+from cases import compile_program
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples')
+
+def cost_of(code: str):
+    return estimate(Parser(Lexer(code).tokenize()).parse())
+
+class TestCost(unittest.TestCase):
+    def test_flower_is_exact(self):
+        path = os.path.join(EXAMPLES, 'flower.mesel')
+        cost = estimate_file(path)
+
+        self.assertEqual(cost.iterations, Interval(36 + 36 * 360, 36 + 36 * 360))
+        self.assertEqual(cost.segments, Interval(36 * 360, 36 * 360))
+        self.assertEqual(cost.prints, Interval(0, 0))
+        # The same steps scheduler.py takes, and the same segments it records
+        run, = run_programs([ProgramRun(compile_program(path, target='steps'))])
+        self.assertEqual(cost.steps, Interval(run.steps, run.steps))
+        self.assertEqual(len(run.turtle.segments), cost.segments.hi)
+
+    def test_while_loops(self):
+        counted = cost_of('ቁጥር i = 0\nድገም i < 10\n    ሂድ 5\n    አስቀምጥ i = i + 2\nጨርስ\n')
+        self.assertEqual(counted.segments, Interval(5, 5))
+        down = cost_of('ቁጥር i = 10\nድገም i >= 1\n    ያሳይ i\n    አስቀምጥ i = i - 1\nጨርስ\n')
+        self.assertEqual(down.prints, Interval(10, 10))
+
+        # Bounds that depend on input, or counters the loop doesn't move steadily, aren't guessed
+        for code in ('ቁጥር n = ጠይቅ\nቁጥር i = 0\nድገም i < n\n    ሂድ 5\n    አስቀምጥ i = i + 1\nጨርስ\n',
+                     'ቁጥር i = 1\nድገም i < 10\n    ሂድ 5\n    አስቀምጥ i = i * 2\nጨርስ\n'):
+            cost = cost_of(code)
+            self.assertEqual(cost.segments, Interval(0, math.inf))
+            self.assertEqual(str(cost.segments), 'unbounded (at least 0)')
+
+    def test_loops_that_may_not_run(self):
+        # A loop that never runs leaves k alone, so the ድገም below draws k segments
+        never = cost_of('ቁጥር k = 300000\nቁጥር j = 0\nእድግ ሀ = 0, 0\n    አስቀምጥ k = 0\nጨርስ\n'
+                        'ድገም j < k\n    ሂድ 1\n    አስቀምጥ j = j + 1\nጨርስ\n')
+        self.assertEqual(never.segments, Interval(300000, 300000))
+        maybe = cost_of('ቁጥር k = 1000000\nቁጥር j = 0\nቁጥር n = ጠይቅ\nእድግ ሀ = 0, n\n    አስቀምጥ k = 0\nጨርስ\n'
+                        'ድገም j < k\n    ሂድ 1\n    አስቀምጥ j = j + 1\nጨርስ\n')
+        self.assertEqual(maybe.segments, Interval(0, 1000000))
+        pen = cost_of('ስዕል_አቁም\nቁጥር n = ጠይቅ\nእድግ ሀ = 0, n\n    ስዕል_ጀምር\nጨርስ\nሂድ 1\n')
+        self.assertEqual(pen.segments, Interval(0, 1))
+
+    def test_branches_pen_and_recursion(self):
+        branches = cost_of('ከሆነ ጠይቅ > 3\n    እድግ 4\n        ሂድ 10\n    ጨርስ\nጨርስ\nካልሆነ\n    ሂድ 1\nጨርስ\n')
+        self.assertEqual(branches.segments, Interval(1, 4))
+        self.assertEqual(cost_of('ስዕል_አቁም\nሂድ 10\nስዕል_ጀምር\nሂድ 10\n').segments, Interval(1, 1))
+        early = cost_of('እድግ i = 0, 10\n    ከሆነ i == ጠይቅ\n        ተው\n    ጨርስ\n    ሂድ 1\nጨርስ\nሂድ 1\n')
+        self.assertEqual(early.segments, Interval(1, 11))
+
+        # Recursion can't be bounded, but a procedure that doesn't draw still draws nothing
+        cost = cost_of('ተግባር ድ(ን)\n    ከሆነ ን < 2\n        መልስ ን\n    ጨርስ\n'
+                       '    መልስ ድ(ን - 1) + ድ(ን - 2)\nጨርስ\nያሳይ ድ(20)\nሂድ 5\n')
+        self.assertFalse(cost.steps.bounded)
+        self.assertEqual((cost.segments, cost.prints), (Interval(1, 1), Interval(1, 1)))
+
+    def test_triage(self):
+        self.assertEqual(triage(estimate_file(os.path.join(EXAMPLES, 'flower.mesel'))), 'tk')
+        self.assertEqual(triage(cost_of('ያሳይ 1\n')), 'headless')
+        heavy = cost_of('እድግ 1000\n    እድግ 1000\n        ሂድ 1\n        ዙር 1\n    ጨርስ\nጨርስ\n')
+        self.assertEqual(triage(heavy), 'record')
+        self.assertEqual(triage(heavy, max_seconds=0.01), 'reject')
+        # Unbounded isn't hopeless: only certain costs reject a program
+        self.assertEqual(triage(cost_of('ድገም 1 == 1\n    ሂድ 1\nጨርስ\n'), max_seconds=0.01), 'record')
+
+if __name__ == '__main__':
+    unittest.main()
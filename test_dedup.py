@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from dedup import ResultStore, file_digest, normalize, run_submission, structural_hash
+from lexer import Lexer
+from parser import Parser
+
+SQUARE = """
+ቁጥር ሀ = 4
+ተግባር ካሬ(መጠን)
+    እድግ 4
+        ሂድ መጠን
+        ዙር 90
+    ጨርስ
+ጨርስ
+ካሬ(ሀ * 10)
+ያሳይ "ተሳለ"
+"""
+
+class TestDedup(unittest.TestCase):
+    def parse(self, code: str):
+        return Parser(Lexer(code).tokenize()).parse()
+
+    def digest(self, code: str) -> str:
+        return structural_hash(self.parse(code))
+
+    def test_same_program(self):
+        reference = self.digest(SQUARE)
+        variants = [
+            # Other names, spacing, comments and number spellings
+            '# ካሬ\nቁጥር size = 4.0\nተግባር square(side)\n  እድግ 04\n    ሂድ side\n    ዙር 90.0\n'
+            '  ጨርስ\nጨርስ\nsquare(size * 10)\nያሳይ "ተሳለ"\n',
+            # No-op statements
+            'ቁጥር ሀ = 4\nተግባር ካሬ(መጠን)\n    ዙር 0\n    እድግ 4\n        ሂድ መጠን\n        ዙር 90\n    ጨርስ\n'
+            '    ጀምር\n    ጨርስ\n    መልስ\n    ሂድ 5\nጨርስ\nእድግ 0\n    ያሳይ 1\nጨርስ\nከሆነ ሀ > 2\nጨርስ\n'
+            'ጀምር\n    ካሬ(ሀ * 10)\nጨርስ\nያሳይ "ተሳለ"\n',
+        ]
+        for code in variants:
+            self.assertEqual(self.digest(code), reference)
+
+    def test_different_programs(self):
+        reference = self.digest(SQUARE)
+        for old, new in [('90', '91'), ('"ተሳለ"', '"ሰላም"'), ('ሀ * 10', '10 * ሀ'), ('እድግ 4', 'እድግ 3'),
+                         ('ሂድ መጠን', 'ሂድ ሀ')]:
+            with self.subTest(change=new):
+                self.assertNotEqual(self.digest(SQUARE.replace(old, new, 1)), reference)
+        # A condition that calls a procedure runs it, and one that may raise
+        # stops the program, so the ከሆነ stays
+        text = SQUARE.replace('ቁጥር ሀ = 4', 'ቁጥር ሀ = "4"')
+        for program, condition in ((SQUARE, 'ካሬ(1) > 2'), (SQUARE, 'ለ > 1'), (SQUARE, '1 / 0 > 1'),
+                                   (text, 'ሀ > 1')):
+            with self.subTest(condition=condition):
+                self.assertNotEqual(self.digest(program + f'ከሆነ {condition}\nጨርስ\n'), self.digest(program))
+        # Code after ተው never runs, but stays if it wouldn't compile
+        self.assertNotEqual(self.digest('እድግ 3\n    ተው\n    ያሳይ ፈ(1)\nጨርስ\n'),
+                            self.digest('እድግ 3\n    ተው\nጨርስ\n'))
+
+    def test_same_digest_same_result(self):
+        # Renaming can't turn a program Python rejects into one it runs
+        with tempfile.TemporaryDirectory() as directory:
+            results = []
+            for name in ('class', 'ሀ'):
+                path = os.path.join(directory, f'{name}.mesel')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(f'አስቀምጥ {name} = 5\nያሳይ {name}\n')
+                results.append((file_digest(path), run_submission(path)))
+        self.assertEqual(results[0][0], results[1][0])
+        self.assertEqual(results[0][1], results[1][1])
+        self.assertEqual(results[0][1]['output'], ['5.0'])
+
+    def test_normalize_copies(self):
+        program = self.parse(SQUARE)
+        before = repr(program)
+        normalized = normalize(program)
+
+        self.assertEqual(repr(program), before)
+        self.assertEqual(normalized.statements[0].name, 'v0')
+        self.assertEqual(normalized.statements[1].name, 'p0')
+        self.assertEqual(normalized.statements[1].parameters, ['v1'])
+        self.assertEqual(normalized.statements[0].line, 0)
+
+    def test_files_and_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            def write(name, code):
+                with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+                    f.write(code)
+            write('ቅርጽ.mesel', SQUARE)
+            write('a.mesel', 'አስገባ "ቅርጽ"\nያሳይ 1\n')
+            write('b.mesel', 'አስገባ "ቅርጽ"\n\nያሳይ 1.0\n')
+            a, b = (file_digest(os.path.join(directory, name)) for name in ('a.mesel', 'b.mesel'))
+            self.assertEqual(a, b)
+            write('ቅርጽ.mesel', SQUARE.replace('90', '60'))
+            self.assertNotEqual(file_digest(os.path.join(directory, 'a.mesel')), a)
+
+            path = os.path.join(directory, 'results.sqlite')
+            calls = []
+            with ResultStore(path) as store:
+                for _ in range(3):
+                    value = store.cached(a, 'run', lambda: calls.append(1) or {'output': ['1.0']})
+                self.assertEqual(value, {'output': ['1.0']})
+                self.assertEqual((len(calls), store.hits, store.misses), (1, 2, 1))
+            with ResultStore(path) as store:
+                self.assertEqual(store.get(a, 'run'), {'output': ['1.0']})
+                self.assertIsNone(store.get(a, 'png'))
+            # Results from another compiler version are dropped
+            with sqlite3.connect(path) as connection:
+                connection.execute("UPDATE meta SET value = 'old' WHERE key = 'version'")
+            connection.close()
+            with ResultStore(path) as store:
+                self.assertIsNone(store.get(a, 'run'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import random
+import unittest
+from mesel_runtime import RecordingTurtle
+from fingerprint import fingerprint, similarity
+
+def square(size: float = 100, steps: int = 1, start=(0, 0), heading: float = 0,
+           clockwise: bool = False, color: str = 'blue'):
+    t = RecordingTurtle()
+    t.x, t.y = start
+    t.heading = heading
+    t.color(color)
+    for _ in range(4):
+        for _ in range(steps):
+            t.forward(size / steps)
+        t.right(90) if clockwise else t.left(90)
+    return t.segments
+
+class TestFingerprint(unittest.TestCase):
+    def test_same_picture_same_digest(self):
+        reference = fingerprint(square())
+        variants = [
+            square(37.5),
+            square(steps=10),
+            square(start=(-80, 45)),
+            square(start=(100, 0), heading=90),
+            square(start=(0, 100), heading=270)[::-1],
+            square() + square(steps=3),
+        ]
+        for segments in variants:
+            self.assertEqual(fingerprint(segments).digest, reference.digest)
+        self.assertEqual(len(reference.segments), 4)
+        self.assertEqual(similarity(fingerprint(square(steps=7)), reference), 1.0)
+
+    def test_slanted_lines_in_steps(self):
+        def triangle(steps: int, start=(0, 0), size: float = 100):
+            t = RecordingTurtle()
+            t.x, t.y = start
+            t.heading = 17
+            for _ in range(3):
+                for _ in range(steps):
+                    t.forward(size / steps)
+                t.left(120)
+            return t.segments
+
+        reference = fingerprint(triangle(1))
+        self.assertEqual(len(reference.segments), 3)
+        for segments in (triangle(30), triangle(7, (-50, 20), 250), triangle(1000)):
+            self.assertEqual(fingerprint(segments).digest, reference.digest)
+
+    def test_different_pictures(self):
+        reference = fingerprint(square())
+        t = RecordingTurtle()
+        for _ in range(3):
+            t.forward(100)
+            t.left(120)
+        triangle = fingerprint(t.segments)
+        self.assertNotEqual(triangle.digest, reference.digest)
+        self.assertLess(similarity(triangle, reference), 0.5)
+        # Half a square is partly alike
+        half = fingerprint(square()[:2])
+        self.assertLess(similarity(half, reference), 1.0)
+        self.assertGreater(similarity(half, reference), similarity(triangle, reference))
+
+    def test_small_differences_score_high(self):
+        rng = random.Random(0)
+        reference = fingerprint(square())
+        jittered = [segment._replace(x1=segment.x1 + rng.uniform(-0.5, 0.5),
+                                     y1=segment.y1 + rng.uniform(-0.5, 0.5)) for segment in square()]
+        self.assertGreater(similarity(fingerprint(jittered), reference), 0.8)
+
+    def test_colors(self):
+        blue, red = square(), square(color='red')
+        self.assertNotEqual(fingerprint(blue).digest, fingerprint(red).digest)
+        self.assertEqual(similarity(fingerprint(blue), fingerprint(red)), 0.0)
+        self.assertEqual(fingerprint(blue, colors=False).digest, fingerprint(red, colors=False).digest)
+
+    def test_empty(self):
+        self.assertEqual(fingerprint([]).segments, ())
+        self.assertEqual(similarity(fingerprint([]), fingerprint([])), 1.0)
+        self.assertEqual(similarity(fingerprint([]), fingerprint(square())), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
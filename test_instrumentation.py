@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from instrumentation import Metrics
+from translator import translate_file
+
+class TestInstrumentation(unittest.TestCase):
+    def test_phase_and_counters(self):
+        metrics = Metrics(trace_memory=True)
+        with metrics.phase('lex'):
+            data = [0] * 10000
+        with metrics.phase('lex'):
+            pass
+        metrics.count('tokens', 5)
+        metrics.count('tokens', 2)
+
+        lex = metrics.phases['lex']
+        self.assertEqual(lex.calls, 2)
+        self.assertGreater(lex.wall, 0)
+        self.assertGreaterEqual(lex.peak_memory, 80000)
+        self.assertEqual(metrics.counters['tokens'], 7)
+        del data
+
+    def test_prometheus_format(self):
+        metrics = Metrics()
+        with metrics.phase('parse'):
+            pass
+        metrics.count('nodes', 3)
+        text = metrics.to_prometheus({'file': 'a"b.mesel'})
+
+        self.assertIn('# TYPE mesel_phase_wall_seconds gauge', text)
+        self.assertIn('mesel_phase_wall_seconds{file="a\\"b.mesel",phase="parse"} ', text)
+        self.assertIn('mesel_nodes{file="a\\"b.mesel"} 3', text)
+        self.assertNotIn('peak_memory', text)
+
+    def test_translate_file_returns_metrics(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'square.mesel')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write("እድግ 4\n    ሂድ 100\n    ዙር 90\nጨርስ\n")
+            with redirect_stdout(StringIO()):
+                metrics = translate_file(source)
+
+        self.assertEqual(list(metrics.phases), ['read', 'lex', 'parse', 'codegen', 'write'])
+        self.assertEqual(metrics.counters['tokens'], 8)
+        self.assertGreater(metrics.counters['output_bytes'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import glob
+import os
+import unittest
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator, generator_class
+from js_generator import JavaScriptGenerator, runtime_source
+from js_replay import compare, replay, to_python
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples')
+
+class TestJavaScriptGenerator(unittest.TestCase):
+    def generate_code(self, code: str, target: str = 'js') -> str:
+        return generator_class(target)().generate(Parser(Lexer(code).tokenize()).parse())
+
+    def test_program(self):
+        code = """
+        ተግባር ካሬ(መጠን)
+            እድግ 4
+                ሂድ መጠን
+                ዙር 90
+            ጨርስ
+        ጨርስ
+        አስቀምጥ new = 10
+        እድግ ሀ = 0, 3
+            ካሬ(new + ሀ)
+        ጨርስ
+        """
+        javascript = self.generate_code(code)
+
+        self.assertTrue(javascript.startswith(runtime_source().rstrip('\n')))
+        program = javascript[len(runtime_source()):]
+        self.assertIn('function ካሬ(t, መጠን) {\n    for (let _i1 = 0; _i1 < 4; _i1++) {', program)
+        self.assertIn('function main(t) {\n    let new_, ሀ;\n    new_ = 10.0;', program)
+        self.assertIn('        ሀ = _i1;\n        ካሬ(t, new_ + ሀ);', program)
+        self.assertTrue(program.endswith('mesel.run(main);'))
+        segments, _ = replay(javascript)
+        self.assertEqual(len(segments), 12)
+        # A parameter named like the turtle doesn't hide it
+        self.assertIn('function ረ(t, t_) {\n    t.forward(t_);', self.generate_code('ተግባር ረ(t)\n    ሂድ t\nጨርስ\n'))
+
+    def test_prints_like_python(self):
+        code = """
+        አስቀምጥ ሀ = [1, 2, 3.5]
+        ያሳይ ሀ * 2 + 1
+        ያሳይ ድምር(ሀ) / ብዛት(ሀ)
+        ያሳይ -7 % 3
+        ያሳይ (1 + 2) * 3 == 9
+        ከሆነ ሀ[0] > 2
+        ጨርስ
+        ካልሆነ
+            ያሳይ "ሰላም"
+        ጨርስ
+        """
+        javascript = self.generate_code(code)
+
+        self.assertIn('mesel.show(mesel.add(mesel.mul(ሀ, 2.0), 1.0));', javascript)
+        self.assertIn('if (mesel.at(ሀ, 0.0) > 2.0) {\n    } else {', javascript)
+        self.assertIn('    if mesel . at ( ሀ , 0.0 ) > 2.0:\n        pass\n    else:',
+                      to_python(javascript[len(runtime_source()):]))
+        _, printed = replay(javascript)
+        self.assertEqual(printed, ['[3.0, 5.0, 8.0]', '2.1666666666666665', '2.0', 'True', 'ሰላም'])
+
+    def test_examples_draw_the_same(self):
+        paths = sorted(glob.glob(os.path.join(EXAMPLES, '*.mesel')))
+        self.assertTrue(paths)
+        for path in paths:
+            with self.subTest(path=os.path.basename(path)):
+                python, javascript = compare(path)
+                self.assertTrue(python)
+                self.assertEqual(python, javascript)
+
+    def test_targets_and_errors(self):
+        self.assertIs(generator_class('python'), CodeGenerator)
+        self.assertIs(generator_class('js'), JavaScriptGenerator)
+        with self.assertRaises(ValueError):
+            generator_class('cobol')
+        with self.assertRaises(Exception) as context:
+            self.generate_code('አስገባ "ሌላ.mesel"')
+        self.assertIn("Error at line 1, column 1: the js target can't compile imports yet", str(context.exception))
+        with self.assertRaises(ValueError):
+            generator_class('js')(optimize=True)
+
+if __name__ == '__main__':
+    unittest.main()
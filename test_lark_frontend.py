@@ -0,0 +1,63 @@
+import glob
+import os
+import sys
+import unittest
+from lexer import Lexer
+from parser import Parser
+
+try:
+    import lark
+except ImportError:
+    lark = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from program_generator import generate_program
+
+@unittest.skipIf(lark is None, "lark is not installed")
+class TestLarkFrontend(unittest.TestCase):
+    def assertSameAst(self, code: str):
+        from lark_frontend import parse_source
+        self.assertEqual(parse_source(code), Parser(Lexer(code).tokenize()).parse())
+
+    def test_examples(self):
+        for path in glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples', '*.mesel')):
+            with open(path, encoding='utf-8') as f:
+                self.assertSameAst(f.read())
+
+    def test_generated_programs(self):
+        for seed in range(20):
+            self.assertSameAst(generate_program(2000, seed=seed, max_depth=seed % 5,
+                                                expression_density=(seed % 4) / 4))
+
+    def test_statements_and_positions(self):
+        code = """
+        ቁጥር ሀ = -(2 + 3) * 4 ** 2
+        ከሆነ ሀ >= 1 == 1
+            ስዕል_አቁም
+            ቀለም ቀይ
+        ጨርስ
+        ካልሆነ
+            ያሳይ "ሰላም"
+        ጨርስ
+        እድግ ለ = 1, 3
+            ተው
+        ጨርስ
+        ተግባር ድምር(ሀ, ለ)
+            መልስ
+            መልስ ድምር(ሀ, ለ - 1) + 1
+        ጨርስ
+        ያሳይ ድምር(1, 2)
+        ድምር(ሀ, 0)
+        ቁጥር ሐ = [1, ሀ * 2, [], -ሀ[0]][ሀ + 1][2]
+        ያሳይ ጠይቅ "ስም?" + ጠይቅ
+        """
+        self.assertSameAst(code)
+
+    def test_syntax_error(self):
+        from lark_frontend import parse_source
+        with self.assertRaises(Exception) as context:
+            parse_source("ሂድ ጨርስ")
+        self.assertIn("line 1, column 4", str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
-from lexer import Lexer, TokenType, Token
+from unittest import mock
+import lexer
+from lexer import Lexer, TokenType, Token, chunk_starts, tokenize_parallel
 
 class TestLexer(unittest.TestCase):
     def test_basic_tokens(self):
@@ -69,5 +71,19 @@ class TestLexer(unittest.TestCase):
         for token, expected_type in zip(tokens, expected_types):
             self.assertEqual(token.type, expected_type)
 
+    def test_chunks_start_outside_strings(self):
+        text = 'ያሳይ "ሀ\nለ"\n# "\nሂድ 1\nያሳይ "#\n"\n'
+        starts = chunk_starts(text, 8)
+        self.assertEqual(starts, [0, text.index('#'), text.index('ሂድ'), text.index('ያሳይ "#')])
+        self.assertEqual(chunk_starts('"\n\n\n', 3), [0])
+
+    def test_tokenize_parallel_matches_serial(self):
+        text = 'ያሳይ "ሀ\nለ # ሐ"  # "አስተያየት\n' * 50 + 'እድግ 4\n    ሂድ 10.5\n    ዙር 90\nጨርስ\n' * 50
+        with mock.patch.object(lexer, 'MIN_CHUNK', 100):
+            self.assertEqual(tokenize_parallel(text, 3), Lexer(text).tokenize())
+            with self.assertRaises(Exception) as context:
+                tokenize_parallel(text + 'ሂድ 1 $\n' + text, 3)
+        self.assertIn('Invalid character $ at line 301, column 6', str(context.exception))
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,66 @@
+import sys
+import unittest
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+from line_coverage import run_with_coverage
+
+@unittest.skipIf(sys.version_info < (3, 12), "sys.monitoring needs Python 3.12")
+class TestLineCoverage(unittest.TestCase):
+    def coverage(self, code: str):
+        generator = CodeGenerator()
+        python_code = generator.generate(Parser(Lexer(code).tokenize()).parse())
+        return run_with_coverage(python_code, generator)
+
+    def test_if_else_branches(self):
+        code = """
+        አስቀምጥ ሀ = 0
+        እድግ 5
+            አስቀምጥ ሀ = ሀ + 1
+            ከሆነ ሀ > 10
+                ያሳይ "ትልቅ"
+            ጨርስ
+            ካልሆነ
+                አስቀምጥ ለ = ሀ
+            ጨርስ
+        ጨርስ
+        """
+        coverage = self.coverage(code)
+
+        self.assertEqual(coverage.lines, [2, 3, 4, 5, 6, 9])
+        self.assertEqual(coverage.missed_lines(), [6])
+        self.assertEqual(coverage.covered_branches(), [(5, 'else')])
+        self.assertEqual(coverage.missed_branches(), [(5, 'then')])
+
+    def test_if_without_else(self):
+        code = """
+        እድግ ሀ = 0, 4
+            ከሆነ ሀ > 1
+                አስቀምጥ ለ = ሀ
+            ጨርስ
+        ጨርስ
+        """
+        coverage = self.coverage(code)
+
+        self.assertEqual(coverage.missed_lines(), [])
+        self.assertEqual(coverage.covered_branches(), [(3, 'then'), (3, 'else')])
+        self.assertEqual(coverage.to_bytes(), bytes([0, 3, 0, 2, 0b111, 0b11]))
+
+    def test_procedures(self):
+        code = """
+        ተግባር ድ(ሀ)
+            መልስ ሀ + 1
+        ጨርስ
+        ተግባር ያልተጠራ()
+            ያሳይ 1
+        ጨርስ
+        ቁጥር ለ = ድ(2)
+        """
+        coverage = self.coverage(code)
+
+        # Headers aren't lines to cover; a procedure that never ran misses its body
+        self.assertEqual(coverage.lines, [3, 6, 8])
+        self.assertEqual(coverage.missed_lines(), [6])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from array import array
+from unittest import mock
+import mesel_lists
+from mesel_lists import vector, length, total, smallest, largest, span
+
+class TestMeselLists(unittest.TestCase):
+    def check_operations(self):
+        a = vector([1, 2, 3, 4])
+        b = a * 2 + 1
+        self.assertEqual(str(b), '[3.0, 5.0, 7.0, 9.0]')
+        self.assertEqual(str(10 - a), '[9.0, 8.0, 7.0, 6.0]')
+        self.assertEqual(str(a / b * b), str(a))
+        self.assertEqual(str(-a), '[-1.0, -2.0, -3.0, -4.0]')
+        self.assertEqual(b[2], 7.0)
+        self.assertEqual(length(a), 4.0)
+        self.assertEqual(total(a + b), 34.0)
+        self.assertEqual(smallest(a - 5), -4.0)
+        self.assertEqual(largest(b), 9.0)
+        self.assertEqual(total(span(1000)), 499500.0)
+        self.assertEqual(str(span(2, 5)), '[2.0, 3.0, 4.0]')
+        self.assertEqual(a, vector([1.0, 2.0, 3.0, 4.0]))
+        self.assertEqual(hash(a), hash(vector([1, 2, 3, 4])))
+
+    def test_operations(self):
+        self.check_operations()
+
+    def test_array_fallback(self):
+        with mock.patch.object(mesel_lists, 'numpy', None):
+            self.check_operations()
+            self.assertIsInstance(span(3).data, array)
+
+    def test_errors(self):
+        a = vector([1, 2, 3])
+        for index in (3, -1, 0.5):
+            with self.assertRaises(IndexError):
+                a[index]
+        with self.assertRaises(ValueError):
+            a + vector([1, 2])
+        with self.assertRaises(ValueError):
+            smallest(vector([]))
+        with self.assertRaises(TypeError):
+            vector([1, "ሀ"])
+        with self.assertRaises(ArithmeticError):
+            a / 0
+
+if __name__ == '__main__':
+    unittest.main()
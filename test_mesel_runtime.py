@@ -0,0 +1,181 @@
+import io
+import unittest
+import mesel_runtime
+from mesel_runtime import (RecordingTurtle, Segment, select_backend, BufferedOutput,
+                           CaptureOutput, CallbackOutput, UpdateScheduler, CanvasTurtle)
+from unittest import mock
+
+class FakeCanvas:
+    """Keeps the items a Tk canvas would, and counts coordinate updates."""
+
+    def __init__(self):
+        self.items = {}
+        self.updates = 0
+
+    def create(self, kind, coords, options):
+        self.items[len(self.items) + 1] = (kind, list(coords), options)
+        return len(self.items)
+
+    def create_line(self, *coords, **options):
+        return self.create('line', coords, options)
+
+    def create_polygon(self, *coords, **options):
+        return self.create('polygon', coords, options)
+
+    def coords(self, item, coords):
+        self.items[item][1][:] = coords
+        self.updates += 1
+
+    def itemconfigure(self, item, **options):
+        self.items[item][2].update(options)
+
+    def tag_raise(self, item):
+        pass
+
+    def lines(self):
+        return [(coords, options) for kind, coords, options in self.items.values() if kind == 'line']
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return self.now
+
+class TestMeselRuntime(unittest.TestCase):
+    def test_recording_turtle_square(self):
+        t = RecordingTurtle()
+        for _ in range(4):
+            t.forward(100)
+            t.right(90)
+
+        self.assertEqual(len(t.segments), 4)
+        self.assertEqual(t.segments[0], Segment(0.0, 0.0, 100.0, 0.0, 'blue', 2))
+        self.assertAlmostEqual(t.segments[1].y1, -100.0)
+        self.assertAlmostEqual(t.x, 0.0)
+        self.assertAlmostEqual(t.y, 0.0)
+
+    def test_pen_up_does_not_record(self):
+        t = RecordingTurtle()
+        t.penup()
+        t.forward(50)
+        t.pendown()
+        t.color('red')
+        t.width(5)
+        t.forward(50)
+
+        self.assertEqual(t.segments, [Segment(50.0, 0.0, 100.0, 0.0, 'red', 5)])
+
+    def test_run_generated_program(self):
+        namespace = {}
+        exec("def main(t):\n    t.forward(10)\n", namespace)
+        backend = select_backend('record')
+
+        t = backend.run(namespace['main'])
+        self.assertEqual(len(t.segments), 1)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            select_backend('opengl')
+
+    def test_colors_cover_color_keywords(self):
+        self.assertEqual(mesel_runtime.COLORS['ቀይ'], 'red')
+
+    def test_buffered_output_writes_in_blocks(self):
+        stream = io.StringIO()
+        output = BufferedOutput(stream, batch_size=3)
+        for value in (1.0, 2.0):
+            output.write(value)
+        self.assertEqual(stream.getvalue(), '')
+        output.write("ሰላም")
+        self.assertEqual(stream.getvalue(), '1.0\n2.0\nሰላም\n')
+        output.write(4)
+        output.flush()
+        self.assertEqual(stream.getvalue(), '1.0\n2.0\nሰላም\n4\n')
+
+    def test_run_flushes_captured_and_callback_output(self):
+        namespace = {}
+        exec("from mesel_runtime import show\ndef main():\n    for i in range(5):\n        show(i)\n", namespace)
+        capture = CaptureOutput()
+        previous = mesel_runtime.set_output(capture)
+        try:
+            mesel_runtime.run(namespace['main'], drawing=False)
+            batches = []
+            mesel_runtime.set_output(CallbackOutput(batches.append, batch_size=2))
+            mesel_runtime.run(namespace['main'], drawing=False)
+        finally:
+            mesel_runtime.set_output(previous)
+
+        self.assertEqual(capture.getvalue(), '0\n1\n2\n3\n4\n')
+        self.assertEqual(batches, [['0', '1'], ['2', '3'], ['4']])
+
+    def test_update_scheduler_keeps_frame_rate(self):
+        for tick_seconds in (1e-6, 1e-4):
+            clock = FakeClock()
+            scheduler = UpdateScheduler(lambda: None, 30, clock)
+            while clock.now < 1.0:
+                clock.now += tick_seconds
+                scheduler.tick()
+            self.assertTrue(28 <= scheduler.frames <= 31, scheduler.frames)
+            # The clock is read a few times per frame, not once per tick
+            self.assertLess(clock.reads, 30 * 4 * mesel_runtime.CHECKS_PER_FRAME)
+
+    def test_update_scheduler_backs_off_slow_updates(self):
+        clock = FakeClock()
+        updating = []
+
+        def update():
+            clock.now += 0.05
+            updating.append(0.05)
+
+        scheduler = UpdateScheduler(update, 30, clock)
+        while clock.now < 3.0:
+            clock.now += 1e-5
+            scheduler.tick()
+        self.assertLess(sum(updating) / clock.now, 0.4)
+        self.assertGreater(scheduler.frames, 10)
+
+    def test_canvas_turtle_draws_a_line_per_pen_run(self):
+        canvas = FakeCanvas()
+        ticks = []
+        t = CanvasTurtle(canvas, lambda: ticks.append(1))
+        for _ in range(100):
+            t.forward(5)
+            t.left(3.6)
+        t.color('red')
+        t.forward(10)
+        t.forward(10)
+        red_end = [t.x, -t.y]
+        t.penup()
+        t.forward(10)
+        t.pendown()
+        t.forward(10)
+        lines = canvas.lines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(len(ticks), 103)
+        self.assertEqual(len(lines[0][0]), 2 * 101)
+        self.assertEqual(lines[1][1]['fill'], 'red')
+        self.assertEqual(lines[1][0][-2:], red_end)
+        # The last line is handed to Tk on flush()
+        t.left(90)
+        t.forward(10)
+        self.assertEqual(len(canvas.lines()[2][0]), 4)
+        t.flush()
+        self.assertEqual(len(canvas.lines()[2][0]), 6)
+
+    def test_canvas_turtle_splits_long_lines(self):
+        canvas = FakeCanvas()
+        with mock.patch.object(mesel_runtime, 'POLYLINE_POINTS', 10):
+            t = CanvasTurtle(canvas)
+            for _ in range(25):
+                t.forward(1)
+            t.flush()
+        lines = canvas.lines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0][0][-2:], lines[1][0][:2])
+        self.assertEqual(sum(len(coords) // 2 - 1 for coords, _ in lines), 25)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from lexer import Lexer
+from parser import Parser
+from code_generator import CodeGenerator
+from profiler import profile_program
+
+class TestProfiler(unittest.TestCase):
+    def profile(self, code: str):
+        generator = CodeGenerator()
+        python_code = generator.generate(Parser(Lexer(code).tokenize()).parse())
+        return profile_program(python_code, generator)
+
+    def test_hits_per_mesel_line(self):
+        code = """
+        አስቀምጥ ሀ = 0
+        እድግ 3
+            እድግ 5
+                አስቀምጥ ሀ = ሀ + 1
+            ጨርስ
+        ጨርስ
+        """
+        profile = self.profile(code)
+
+        self.assertEqual(profile.lines[2].hits, 1)
+        self.assertEqual(profile.lines[5].hits, 15)
+        loops = {loop.line: loop for loop in profile.loops}
+        self.assertEqual(loops[3].iterations, 3)
+        self.assertEqual(loops[4].iterations, 15)
+        self.assertGreaterEqual(loops[3].time, loops[4].time)
+
+    def test_break_counts_iteration(self):
+        code = """
+        እድግ 10
+            ተው
+        ጨርስ
+        """
+        profile = self.profile(code)
+
+        self.assertEqual(profile.loops[0].iterations, 1)
+        self.assertIn('loop', profile.report(code))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import struct
+import unittest
+import zlib
+from unittest import mock
+import raster
+from mesel_runtime import Segment
+
+SEGMENTS = [
+    Segment(-100, 0, 100, 0, 'blue', 4),
+    Segment(0, -100, 0, 100, 'red', 4),
+    Segment(-50, -50, 50, 50, 'red', 2),
+    Segment(20, 20, 20, 20, 'black', 6),
+]
+
+def decode(png: bytes):
+    """Width, height and RGB rows of a PNG written by raster."""
+    assert png.startswith(raster.PNG_SIGNATURE)
+    width, height = struct.unpack('>II', png[16:24])
+    start = png.index(b'IDAT')
+    length = struct.unpack('>I', png[start - 4:start])[0]
+    data = zlib.decompress(png[start + 4:start + 4 + length])
+    stride = width * 3 + 1
+    return width, height, [data[row * stride + 1:(row + 1) * stride] for row in range(height)]
+
+def pixel(rows, x, y):
+    return tuple(rows[y][x * 3:x * 3 + 3])
+
+class TestRaster(unittest.TestCase):
+    def test_png(self):
+        width, height, rows = decode(raster.render_png(SEGMENTS, 400, 300))
+        self.assertEqual((width, height), (400, 300))
+        self.assertEqual(pixel(rows, 2, 2), (255, 255, 255))
+        self.assertEqual(pixel(rows, 180, 150), (0, 0, 255))  # on the blue line
+        self.assertEqual(pixel(rows, 200, 150), (255, 0, 0))  # red, drawn over blue
+        # Anti-aliased: the edges of the diagonal line are blends
+        self.assertTrue(any(0 < pixel(rows, x, 130)[1] < 255 for x in range(210, 230)))
+
+    def test_python_matches_numpy(self):
+        if raster.numpy is None:
+            self.skipTest('NumPy is not installed')
+        _, _, expected = decode(raster.render_png(SEGMENTS, 120, 90, fit=True))
+        with mock.patch.object(raster, 'numpy', None):
+            _, _, rows = decode(raster.render_png(SEGMENTS, 120, 90, fit=True))
+        self.assertLessEqual(max(abs(a - b) for row, other in zip(rows, expected)
+                                 for a, b in zip(row, other)), 1)
+
+    def test_tiles_match(self):
+        segments = [Segment(i, -i, 2 * i, i, ('red', 'blue')[i % 2], 1 + i % 3) for i in range(-150, 150, 7)]
+        self.assertEqual(raster.render_png(segments, 200, 150, workers=3),
+                         raster.render_png(segments, 200, 150))
+
+    def test_fit(self):
+        segments = [Segment(0, 0, 10, 0, 'black', 1)]
+        _, _, rows = decode(raster.render_png(segments, 100, 100))
+        self.assertEqual(pixel(rows, 10, 50), (255, 255, 255))
+        _, _, rows = decode(raster.render_png(segments, 100, 100, fit=True))
+        self.assertEqual(pixel(rows, 10, 50), (0, 0, 0))
+        self.assertEqual(pixel(rows, 2, 50), (255, 255, 255))
+
+if __name__ == '__main__':
+    unittest.main()
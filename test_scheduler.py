@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from cases import compile_program, run_cases
+from compiler import CompileOptions, compile_source
+from scheduler import ProgramRun, run_programs
+
+SQUARE_AND_FIBONACCI = """
+ተግባር ካሬ(መጠን)
+    እድግ 4
+        ሂድ መጠን
+        ዙር 90
+    ጨርስ
+ጨርስ
+ተግባር ፊቦ(ን)
+    ከሆነ ን < 2
+        መልስ ን
+    ጨርስ
+    መልስ ፊቦ(ን - 1) + ፊቦ(ን - 2)
+ጨርስ
+ቁጥር ሀ = ጠይቅ
+ካሬ(ሀ)
+ያሳይ ፊቦ(ሀ)
+"""
+
+FOREVER = 'ቁጥር i = 0\nድገም i >= 0\n    አስቀምጥ i = i + 1\nጨርስ\n'
+
+class TestScheduler(unittest.TestCase):
+    def compile(self, code: str, target: str = 'steps'):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'program.mesel')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        return compile_program(path, target=target)
+
+    def test_same_result_as_python_target(self):
+        program = self.compile(SQUARE_AND_FIBONACCI)
+        runs = run_programs([ProgramRun(program, [n]) for n in (5, 10)], slice_steps=7)
+        expected = run_cases(self.compile(SQUARE_AND_FIBONACCI, 'python'), [[5], [10]])
+
+        for run, case in zip(runs, expected):
+            self.assertIsNone(run.error)
+            self.assertEqual(run.output.lines, case.output)
+            self.assertEqual(run.turtle.segments, case.segments)
+        # Each program counts its own steps: more calls to ፊቦ for 10 than for 5
+        self.assertLess(runs[0].steps, runs[1].steps)
+
+    def test_generated_code(self):
+        code = compile_source(SQUARE_AND_FIBONACCI, CompileOptions(target='steps')).code
+        self.assertIn("from mesel_runtime import run as _run, complete as _complete, show as _show, ask as _ask",
+                      code)
+        self.assertIn("        yield\n        t.forward(መጠን)\n        yield\n", code)
+        self.assertIn("return (yield from ፊቦ(ን - 1.0)) + (yield from ፊቦ(ን - 2.0))", code)
+        self.assertTrue(code.endswith("_run(_complete(main))"))
+        self.assertFalse(compile_source(SQUARE_AND_FIBONACCI, CompileOptions(target='steps', optimize=True)).ok)
+        self.assertIn("can't compile imports", compile_source('አስገባ "ሌላ.mesel"\n',
+                                                              CompileOptions(target='steps')).diagnostics[0].message)
+
+    def test_fair_turns_and_timeout(self):
+        forever = self.compile(FOREVER)
+        quick = self.compile('ያሳይ "ጨረስኩ"\n')
+        runs = run_programs([ProgramRun(forever), ProgramRun(forever), ProgramRun(quick)],
+                            slice_steps=100, timeout=0.3)
+
+        self.assertEqual([run.cancelled for run in runs], [True, True, False])
+        self.assertEqual(runs[2].output.lines, ['ጨረስኩ'])
+        self.assertTrue(runs[0].error.startswith('Cancelled'))
+        # Round robin: the endless programs are never more than a turn apart
+        self.assertLessEqual(abs(runs[0].steps - runs[1].steps), 100)
+        self.assertGreater(runs[0].steps, 1000)
+
+    def test_step_limit(self):
+        run, = run_programs([ProgramRun(self.compile(FOREVER), max_steps=250)], slice_steps=100)
+
+        self.assertFalse(run.cancelled)
+        self.assertEqual(run.steps, 251)
+        self.assertEqual(run.error, 'StepLimit: ran more than 250 steps')
+
+    def test_command_line(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'program.mesel')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('እድግ 1000\n    ሂድ 1\nጨርስ\nያሳይ "ጨረስኩ"\n')
+        scheduler = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scheduler.py')
+        run = lambda *args: json.loads(subprocess.run(
+            [sys.executable, scheduler, path, *args], capture_output=True, text=True, timeout=60, check=True).stdout)
+
+        plain = run()
+        self.assertEqual((plain['output'], plain['error']), (['ጨረስኩ'], None))
+        # A program the estimate says needs more steps than it may take isn't started
+        limited = run('--max-steps', '100')
+        self.assertEqual((limited['steps'], limited['error']), (0, 'StepLimit: needs at least 2001 steps'))
+
+if __name__ == '__main__':
+    unittest.main()
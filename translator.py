@@ -1,49 +1,148 @@
+import os
 import sys
-from lexer import Lexer
-from parser import Parser
-from code_generator import CodeGenerator
+import json
+import argparse
+from parser import Import, walk
+from code_generator import TARGETS, generator_class
+from compiler import PARSERS, CompileOptions, compile_source, parse, tokenize
+from build import BuildCache
+from instrumentation import Metrics
+import ast_binary
+from bundle import build_bundle
+
+def parse_source(source: str, metrics: Metrics, parser: str = 'hand', lex_workers: int = 1):
+    """Lex and parse with the hand-written front end, or parse with the Lark grammar.
+
+    lex_workers > 1 lexes large sources in that many processes.
+    """
+    tokens = tokenize(source, metrics, lex_workers) if parser == 'hand' else None
+    return parse(source, tokens, metrics, parser)
+
+def build_imports(ast, source_file: str, output_file: str, metrics: Metrics,
+                  optimize: bool = False) -> dict:
+    """Compile the modules ast imports into the cache next to output_file."""
+    if not any(isinstance(node, Import) for node in walk(ast)):
+        return {}
+    with metrics.phase('imports'):
+        cache = BuildCache.for_output(output_file, optimize)
+        modules = cache.compile_imports(source_file, ast)
+    metrics.count('modules_compiled', len(cache.compiled))
+    metrics.count('modules_cached', len(cache.cached))
+    return modules
+
+def translate_file(input_file: str, output_file: str = None, metrics: Metrics = None,
+                   source_map: bool = False, parser: str = 'hand', ast_file: str = None,
+                   optimize: bool = False, target: str = 'python', lex_workers: int = 1) -> Metrics:
+    if metrics is None:
+        metrics = Metrics()
 
-def translate_file(input_file: str, output_file: str = None):
     # Read input file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        source = f.read()
-    
+    with metrics.phase('read'):
+        with open(input_file, 'r', encoding='utf-8') as f:
+            source = f.read()
+    metrics.count('source_bytes', len(source.encode('utf-8')))
+
     # Generate output filename if not provided
     if output_file is None:
-        output_file = input_file.rsplit('.', 1)[0] + '.py'
-    
+        output_file = input_file.rsplit('.', 1)[0] + generator_class(target).extension
+
     try:
-        # Tokenize
-        lexer = Lexer(source)
-        tokens = lexer.tokenize()
-        
-        # Parse
-        parser = Parser(tokens)
-        ast = parser.parse()
-        
-        # Generate code
-        generator = CodeGenerator()
-        python_code = generator.generate(ast)
-        
+        # Lex, parse and generate code, compiling imported modules on the way
+        imports = None
+        if target == 'python':
+            imports = lambda ast: build_imports(ast, input_file, output_file, metrics, optimize)
+        result = compile_source(source, CompileOptions(parser, target, optimize, lex_workers),
+                                imports, metrics)
+        if not result.ok:
+            raise Exception(result.diagnostics[0].message)
+        generator, code = result.generator, result.code
+
+        # Keep the AST for tools that would otherwise have to re-parse
+        if ast_file:
+            with metrics.phase('dump'):
+                data = ast_binary.dump(result.ast)
+                with open(ast_file, 'wb') as f:
+                    f.write(data)
+            metrics.count('ast_bytes', len(data))
+
         # Write output
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(python_code)
-        
+        with metrics.phase('write'):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(code)
+            # Generated line -> Mesel line and column, next to the output
+            if source_map:
+                with open(output_file + '.map', 'w', encoding='utf-8') as f:
+                    json.dump(generator.source_map_data(input_file), f, ensure_ascii=False)
+
         print(f"Successfully translated {input_file} to {output_file}")
-        
+
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python translator.py input_file [output_file]")
+    return metrics
+
+def bundle_lessons(directory: str, output_file: str = None, optimize: bool = False) -> dict:
+    if output_file is None:
+        output_file = os.path.normpath(directory) + '.pyz'
+    try:
+        index = build_bundle(directory, output_file, optimize)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    translate_file(input_file, output_file)
+    print(f"Bundled {len(index['lessons'])} lessons from {directory} into {output_file}")
+    return index
+
+def add_profile_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='print time spent in each compiler phase (run.py also '
+                                 'profiles the program per Mesel line and loop)')
+    arg_parser.add_argument('--profile-memory', action='store_true',
+                            help='also record peak memory per phase (slower)')
+    arg_parser.add_argument('--metrics-file',
+                            help='write the phase metrics here in Prometheus text format')
+
+def add_parser_argument(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument('--parser', choices=PARSERS, default='hand',
+                            help='front end to use: the hand-written parser or the Lark grammar in mesel.lark')
+    arg_parser.add_argument('-O', '--optimize', action='store_true',
+                            help='memoize procedures that only compute a value (bounded LRU cache)')
+
+def write_metrics(metrics: Metrics, args, source_file: str):
+    if args.profile or args.profile_memory:
+        print(metrics.report(), file=sys.stderr)
+    if args.metrics_file:
+        with open(args.metrics_file, 'w', encoding='utf-8') as f:
+            f.write(metrics.to_prometheus({'file': source_file}))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Translate a Mesel program to Python.')
+    arg_parser.add_argument('input_file')
+    arg_parser.add_argument('output_file', nargs='?')
+    arg_parser.add_argument('--source-map', action='store_true',
+                            help='also write OUTPUT.map mapping generated lines to Mesel lines')
+    arg_parser.add_argument('--ast', metavar='FILE',
+                            help='also write the parsed AST in the ast_binary format')
+    arg_parser.add_argument('--target', choices=TARGETS, default='python',
+                            help='language to generate: Python, JavaScript that runs in a browser, '
+                                 'or Python that runs a step at a time for scheduler.py')
+    arg_parser.add_argument('--lex-workers', type=int, default=1, metavar='N',
+                            help='lex sources of a megabyte or more in N processes')
+    arg_parser.add_argument('--bundle', action='store_true',
+                            help='compile every lesson in the directory input_file into the zipapp '
+                                 'output_file (default: input_file.pyz)')
+    add_parser_argument(arg_parser)
+    add_profile_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    if args.bundle:
+        bundle_lessons(args.input_file, args.output_file, args.optimize)
+        return
+
+    metrics = translate_file(args.input_file, args.output_file,
+                             Metrics(trace_memory=args.profile_memory), args.source_map,
+                             args.parser, args.ast, args.optimize, args.target, args.lex_workers)
+    write_metrics(metrics, args, args.input_file)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()